@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Moduł z długo żyjącą pulą przeglądarek dla Crawl4AI.
+Zamiast uruchamiać Chromium od nowa dla każdego żądania, pula utrzymuje
+uruchomione przeglądarki i recyklinguje je po N stronach lub po przekroczeniu
+limitu pamięci RSS. Każde żądanie dostaje świeży kontekst przeglądarki
+(czyste cookies i sesja). HTML jest zwracany według polityki gotowości strony
+(selektory lub networkidle).
+"""
+
+import asyncio
+import re
+import sys
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
+
+from page_readiness import ReadinessPolicy
+from resource_blocking import BlockingProfile
+
+try:
+    import psutil
+except ImportError:  # psutil jest opcjonalny - bez niego pula recyklinguje tylko po liczbie stron
+    psutil = None
+
+# Procesy przeglądarki (sterownik Playwright, Chromium i jego procesy potomne) - pozostałe procesy
+# potomne (pula parsowania, openvpn) nie są wliczane do RSS przeglądarek
+BROWSER_PROCESS_PATTERN = re.compile(r"playwright|chrom|headless_shell", re.I)
+
+
+def _is_browser_process(process) -> bool:
+    """Sprawdza po nazwie i linii poleceń, czy proces należy do przeglądarki."""
+    try:
+        return bool(
+            BROWSER_PROCESS_PATTERN.search(process.name())
+            or BROWSER_PROCESS_PATTERN.search(" ".join(process.cmdline()))
+        )
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        return False
+
+
+def browser_tree_rss(children) -> int:
+    """Sumuje RSS (bajty) procesów przeglądarki i ich procesów potomnych.
+
+    Args:
+        children: Procesy potomne scrapera (psutil.Process, np. Process().children(recursive=True))
+    """
+    browser_pids = set()
+    for child in children:
+        if child.pid in browser_pids or not _is_browser_process(child):
+            continue
+        browser_pids.add(child.pid)
+        try:
+            browser_pids.update(descendant.pid for descendant in child.children(recursive=True))
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    total = 0
+    for child in children:
+        if child.pid not in browser_pids:
+            continue
+        try:
+            total += child.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    return total
+
+
+class PooledBrowser:
+    """Pojedyncza przeglądarka w puli wraz z licznikiem obsłużonych stron."""
+
+    def __init__(self, slot_id: int):
+        self.slot_id = slot_id
+        self.crawler: Optional[AsyncWebCrawler] = None
+        self.pages_served = 0
+        self.launches = 0
+
+
+class BrowserPool:
+    """Pula długo żyjących przeglądarek Crawl4AI.
+
+    Tworzona raz (np. w process_all_links.main) i przekazywana do funkcji scrapujących.
+    Każda przeglądarka obsługuje jedno żądanie naraz; po `max_pages_per_browser` stronach
+    lub gdy RSS procesów przeglądarki przekroczy `max_rss_mb`, jest zamykana i uruchamiana od nowa.
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        max_pages_per_browser: int = 100,
+        max_rss_mb: Optional[float] = 1500.0,
+        headless: bool = True,
+        blocking_profile: Optional[BlockingProfile] = None,
+        readiness: Optional[ReadinessPolicy] = None,
+        rss_probe: Optional[Callable[[], Optional[float]]] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Inicjalizuje BrowserPool.
+
+        Args:
+            size: Liczba przeglądarek w puli (maksymalna liczba równoległych stron)
+            max_pages_per_browser: Po ilu stronach przeglądarka jest recyklingowana (0 = bez limitu)
+            max_rss_mb: Limit pamięci RSS wszystkich procesów przeglądarek w MB (None = bez limitu)
+            headless: Czy uruchamiać przeglądarki bez interfejsu
+            blocking_profile: Profil blokowania zasobów (obrazy, czcionki, reklamy...) lub None
+            readiness: Polityka gotowości strony (None = czekaj na networkidle)
+            rss_probe: Funkcja zwracająca RSS przeglądarek w MB (domyślnie get_browser_rss_mb, do testów)
+            clock: Zegar pomiaru czasu gotowości strony (do testów)
+        """
+        if size < 1:
+            raise ValueError("Rozmiar puli musi być większy od 0")
+
+        self.size = size
+        self.max_pages_per_browser = max_pages_per_browser
+        self.max_rss_mb = max_rss_mb
+        self.headless = headless
+        self.blocking_profile = blocking_profile
+        self.readiness = readiness or ReadinessPolicy(selectors=())
+        self.rss_probe = rss_probe or self.get_browser_rss_mb
+        self.clock = clock
+        self.slots: List[PooledBrowser] = [PooledBrowser(i) for i in range(size)]
+        self._idle: Optional[asyncio.Queue] = None
+        self.recycle_count = 0
+        self.closed = False
+
+    def _get_idle_queue(self) -> asyncio.Queue:
+        """Zwraca kolejkę wolnych slotów (tworzoną leniwie w działającej pętli zdarzeń)."""
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for slot in self.slots:
+                self._idle.put_nowait(slot)
+        return self._idle
+
+    def _browser_config(self) -> BrowserConfig:
+        """Tworzy konfigurację przeglądarki."""
+        return BrowserConfig(
+            headless=self.headless,
+            verbose=False,
+        )
+
+    async def _launch(self, slot: PooledBrowser) -> None:
+        """Uruchamia przeglądarkę w danym slocie."""
+        crawler = AsyncWebCrawler(config=self._browser_config())
+        # Ustaw nagłówki żądania dla każdej strony osobno (przekazywane przez shared_data)
+        crawler.crawler_strategy.set_hook("before_goto", self._apply_request_headers)
+        if self.blocking_profile is not None:
+            # Przerywaj niepotrzebne żądania zanim zostaną wysłane
+            crawler.crawler_strategy.set_hook("on_page_context_created", self._install_blocking)
+        await crawler.__aenter__()
+        slot.crawler = crawler
+        slot.pages_served = 0
+        slot.launches += 1
+
+    async def _shutdown(self, slot: PooledBrowser) -> None:
+        """Zamyka przeglądarkę w danym slocie."""
+        crawler = slot.crawler
+        slot.crawler = None
+        slot.pages_served = 0
+        if crawler is None:
+            return
+        try:
+            await crawler.__aexit__(None, None, None)
+        except Exception as e:
+            print(f"⚠️  Błąd podczas zamykania przeglądarki: {e}", file=sys.stderr)
+
+    @staticmethod
+    async def _apply_request_headers(page, context=None, url=None, config=None, **kwargs):
+        """Hook before_goto - ustawia losowe nagłówki HTTP danego żądania."""
+        shared_data = getattr(config, "shared_data", None) or {}
+        headers = shared_data.get("headers")
+        if headers:
+            # Pusty Referer nie jest poprawnym nagłówkiem dla przeglądarki
+            headers = {k: v for k, v in headers.items() if v}
+            await page.set_extra_http_headers(headers)
+        return page
+
+    async def _install_blocking(self, page, context=None, config=None, **kwargs):
+        """Hook on_page_context_created - włącza profil blokowania zasobów na nowej stronie."""
+        await self.blocking_profile.install(page)
+        return page
+
+    def get_browser_rss_mb(self) -> Optional[float]:
+        """Zwraca łączny RSS drzew procesów przeglądarek w MB lub None gdy psutil niedostępny.
+
+        Liczone są tylko procesy przeglądarki (BROWSER_PROCESS_PATTERN) i ich procesy potomne -
+        bez procesów puli parsowania, openvpn i innych procesów potomnych scrapera.
+        """
+        if psutil is None:
+            return None
+        try:
+            return browser_tree_rss(psutil.Process().children(recursive=True)) / (1024 * 1024)
+        except Exception:
+            return None
+
+    def _needs_recycle(self, slot: PooledBrowser) -> bool:
+        """Sprawdza czy przeglądarka w slocie powinna zostać zrestartowana."""
+        if self.max_pages_per_browser and slot.pages_served >= self.max_pages_per_browser:
+            return True
+        if self.max_rss_mb:
+            rss_mb = self.rss_probe()
+            if rss_mb is not None and rss_mb > self.max_rss_mb:
+                print(f"♻️  RSS przeglądarek {rss_mb:.0f} MB > {self.max_rss_mb:.0f} MB, recykling...")
+                return True
+        return False
+
+    async def recycle(self, slot: PooledBrowser) -> None:
+        """Zamyka przeglądarkę w slocie - zostanie uruchomiona ponownie przy następnym żądaniu."""
+        await self._shutdown(slot)
+        self.recycle_count += 1
+
+    def build_run_config(
+        self,
+        session_id: str,
+        headers: Optional[Dict[str, str]] = None,
+        use_selectors: bool = True,
+    ) -> CrawlerRunConfig:
+        """Tworzy konfigurację pojedynczego żądania.
+
+        Args:
+            session_id: Identyfikator sesji żądania
+            headers: Nagłówki HTTP żądania
+            use_selectors: Czy czekać na selektory polityki gotowości (False = networkidle)
+        """
+        if use_selectors:
+            wait_kwargs = self.readiness.run_config_kwargs()
+        else:
+            # Czekaj na zakończenie ładowania sieci
+            wait_kwargs = {"wait_until": "networkidle"}
+        return CrawlerRunConfig(
+            # Wyłącz cache aby zawsze pobierać świeżą stronę
+            cache_mode=CacheMode.BYPASS,
+            session_id=session_id,
+            delay_before_return_html=0.0,  # Brak opóźnienia - maksymalna prędkość
+            shared_data={"headers": headers or {}},
+            verbose=False,
+            **wait_kwargs,
+        )
+
+    async def _run(self, slot: PooledBrowser, url: str, headers: Optional[Dict[str, str]], use_selectors: bool):
+        """Pobiera stronę w osobnej sesji, której kontekst jest zamykany po pobraniu."""
+        session_id = f"req-{uuid.uuid4().hex}"
+        try:
+            return await slot.crawler.arun(
+                url=url,
+                config=self.build_run_config(session_id, headers, use_selectors),
+            )
+        finally:
+            slot.pages_served += 1
+            await self._kill_session(slot, session_id)
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None):
+        """Pobiera stronę używając wolnej przeglądarki z puli.
+
+        Args:
+            url: URL strony
+            headers: Nagłówki HTTP żądania
+
+        Returns:
+            Wynik Crawl4AI (CrawlResult) z polami html, status_code, success, error_message
+        """
+        result, _ = await self.fetch_with_readiness(url, headers)
+        return result
+
+    async def fetch_with_readiness(self, url: str, headers: Optional[Dict[str, str]] = None) -> Tuple[object, Dict]:
+        """Pobiera stronę i zwraca wynik Crawl4AI razem z pomiarem gotowości strony.
+
+        Każde żądanie działa w osobnej sesji, której kontekst (cookies, storage)
+        jest zamykany po pobraniu strony. Gdy selektory nie pojawią się w limicie
+        czasu, strona jest pobierana ponownie z networkidle.
+
+        Args:
+            url: URL strony
+            headers: Nagłówki HTTP żądania
+
+        Returns:
+            Krotka (CrawlResult, {"mode": tryb gotowości, "seconds": czas pobrania strony})
+        """
+        if self.closed:
+            raise RuntimeError("Pula przeglądarek została zamknięta")
+
+        idle = self._get_idle_queue()
+        slot = await idle.get()
+        try:
+            if slot.crawler is None:
+                await self._launch(slot)
+
+            policy = self.readiness
+            mode = "selectors" if policy.uses_selectors else "networkidle"
+            start_time = self.clock()
+            result = await self._run(slot, url, headers, use_selectors=True)
+
+            if policy.uses_selectors and policy.fallback_to_networkidle and policy.is_timeout(result):
+                print(f"⏱️  Selektory nie pojawiły się w {policy.timeout:.0f}s, ponawiam z networkidle...")
+                mode = "networkidle-fallback"
+                result = await self._run(slot, url, headers, use_selectors=False)
+
+            readiness = {"mode": mode, "seconds": self.clock() - start_time}
+            policy.stats.record(mode, readiness["seconds"])
+
+            if self._needs_recycle(slot):
+                await self.recycle(slot)
+
+            return result, readiness
+        except Exception:
+            # Przeglądarka mogła się wysypać - uruchom ją od nowa przy następnym żądaniu
+            await self.recycle(slot)
+            raise
+        finally:
+            idle.put_nowait(slot)
+
+    async def _kill_session(self, slot: PooledBrowser, session_id: str) -> None:
+        """Zamyka kontekst sesji żądania (świeży kontekst dla każdego żądania)."""
+        if slot.crawler is None:
+            return
+        browser_manager = getattr(slot.crawler.crawler_strategy, "browser_manager", None)
+        if browser_manager is None:
+            return
+        try:
+            await browser_manager.kill_session(session_id)
+        except Exception:
+            pass
+
+    async def close(self) -> None:
+        """Zamyka wszystkie przeglądarki w puli."""
+        self.closed = True
+        for slot in self.slots:
+            await self._shutdown(slot)
+
+    def stats(self) -> Dict[str, object]:
+        """Zwraca statystyki puli."""
+        stats = {
+            "size": self.size,
+            "launches": sum(slot.launches for slot in self.slots),
+            "recycles": self.recycle_count,
+            "readiness": self.readiness.stats.summary(),
+        }
+        if self.blocking_profile is not None:
+            stats["blocked"] = self.blocking_profile.stats()
+        return stats
+
+    async def __aenter__(self):
+        """Context manager entry."""
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        await self.close()
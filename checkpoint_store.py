@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Moduł z punktami kontrolnymi częściowych wyników scrapowania perfum.
+Wynik każdego etapu (metadane pobrania, dane szczegółowe, recenzje) jest
+zapisywany w bazie magazynu zadań zaraz po jego zakończeniu. Gdy późniejszy
+etap się nie powiedzie (np. wyciąganie recenzji lub zapis wyniku), ponowna
+próba wykonuje tylko brakujące etapy - przy komplecie punktów kontrolnych
+strona nie jest ponownie pobierana. Punkty kontrolne są usuwane, gdy wynik
+perfum zostanie trwale zapisany.
+
+Użycie:
+    python checkpoint_store.py stats   - liczba punktów kontrolnych per etap
+"""
+
+import json
+import os
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from job_store import DEFAULT_JOB_STORE_PATH, JobStore
+from scraper import PAGE_SECTIONS, SECTION_DETAILS, SECTION_REVIEWS
+
+
+# Metadane pobrania (scrapeMeta) - sam HTML jest w cache HTML lub archiwum stron
+STAGE_FETCH = "fetch"
+CHECKPOINT_STAGES = (STAGE_FETCH,) + PAGE_SECTIONS
+
+CHECKPOINT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    url TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (url, stage)
+);
+"""
+
+
+class CheckpointStore:
+    """Punkty kontrolne etapów scrapowania w bazie magazynu zadań."""
+
+    def __init__(self, job_store: JobStore):
+        """
+        Inicjalizuje CheckpointStore.
+
+        Args:
+            job_store: Magazyn zadań (punkty kontrolne są zapisywane w jego bazie)
+        """
+        self.job_store = job_store
+        self.conn = job_store.conn
+        self.conn.executescript(CHECKPOINT_SCHEMA)
+        self.conn.commit()
+        self.saved = 0
+        self.restored = 0
+
+    def save(self, url: str, stage: str, data: Any) -> None:
+        """Trwale zapisuje wynik etapu (od razu, bez buforowania)."""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (url, stage, data, updated_at) VALUES (?, ?, ?, ?)",
+                (url, stage, json.dumps(data, ensure_ascii=False), time.time()),
+            )
+        self.saved += 1
+
+    def load(self, url: str) -> Dict[str, Any]:
+        """Zwraca zapisane wyniki etapów URL: {etap: dane}."""
+        checkpoints = {
+            stage: json.loads(data)
+            for stage, data in self.conn.execute("SELECT stage, data FROM checkpoints WHERE url = ?", (url,))
+        }
+        self.restored += len(checkpoints)
+        return checkpoints
+
+    @staticmethod
+    def missing(checkpoints: Dict[str, Any], stages=CHECKPOINT_STAGES) -> List[str]:
+        """Zwraca etapy bez punktu kontrolnego (w kolejności wykonywania)."""
+        return [stage for stage in stages if stage not in checkpoints]
+
+    @staticmethod
+    def assemble(checkpoints: Dict[str, Any]) -> Dict[str, Any]:
+        """Składa dane perfum z kompletu punktów kontrolnych (format parse_perfume_page + scrapeMeta)."""
+        perfume_data = dict(checkpoints[SECTION_DETAILS])
+        perfume_data["review"] = checkpoints[SECTION_REVIEWS]
+        perfume_data["scrapeMeta"] = checkpoints[STAGE_FETCH]
+        return perfume_data
+
+    async def complete(
+        self,
+        url: str,
+        result,
+        checkpoints: Dict[str, Any],
+        parse_sections: Callable[[str, str, Tuple[str, ...]], Awaitable[Tuple[Dict[str, Any], Dict[str, str]]]],
+    ) -> Dict[str, Any]:
+        """Wykonuje brakujące etapy strony, zapisując każdy od razu, i zwraca komplet danych perfum.
+
+        Args:
+            url: URL strony perfum
+            result: Wynik pobrania (FetchResult) lub None gdy wszystkie etapy są już zapisane
+            checkpoints: Zapisane wcześniej wyniki etapów (load()) - uzupełniane w miejscu
+            parse_sections: Funkcja async (html, url, sekcje) zwracająca (dane sekcji, błędy sekcji)
+        """
+        if result is not None:
+            checkpoints[STAGE_FETCH] = result.meta()
+            self.save(url, STAGE_FETCH, checkpoints[STAGE_FETCH])
+        missing = self.missing(checkpoints, PAGE_SECTIONS)
+        if missing:
+            if result is None:
+                raise Exception(f"Brak pobranej strony dla etapów: {', '.join(missing)}")
+            sections, errors = await parse_sections(result.html, url, tuple(missing))
+            for section in missing:
+                if section in sections:
+                    checkpoints[section] = sections[section]
+                    self.save(url, section, sections[section])
+            if errors:
+                raise Exception("; ".join(f"{section}: {error}" for section, error in errors.items()))
+        return self.assemble(checkpoints)
+
+    def clear(self, url: str) -> None:
+        """Usuwa punkty kontrolne URL (wynik został trwale zapisany)."""
+        with self.conn:
+            self.conn.execute("DELETE FROM checkpoints WHERE url = ?", (url,))
+
+    def counts(self) -> Dict[str, int]:
+        """Zwraca liczbę punktów kontrolnych per etap."""
+        return dict(self.conn.execute("SELECT stage, COUNT(*) FROM checkpoints GROUP BY stage"))
+
+    def stats(self) -> Dict[str, object]:
+        """Zwraca statystyki zapisów i odczytów punktów kontrolnych."""
+        return {"saved": self.saved, "restored": self.restored, "pending": self.counts()}
+
+
+def main():
+    """Narzędzie wiersza poleceń punktów kontrolnych."""
+    if len(sys.argv) < 2 or sys.argv[1] != "stats":
+        print(__doc__)
+        sys.exit(1)
+
+    store = JobStore(os.getenv("JOB_STORE_PATH", DEFAULT_JOB_STORE_PATH))
+    try:
+        print(json.dumps(CheckpointStore(store).counts(), indent=2))
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
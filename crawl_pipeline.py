@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Moduł z potokiem crawlowania: pobieranie -> parsowanie -> zapis.
+Etapy są połączone ograniczonymi kolejkami asyncio (backpressure - szybszy etap
+czeka, gdy kolejka do wolniejszego jest pełna) i każdy ma własną liczbę
+workerów. Dzięki temu sieć nie stoi bezczynnie podczas parsowania, a procesor
+podczas oczekiwania na sieć. Statystyki etapów (głębokość kolejki wejściowej,
+czas oczekiwania na dane i na miejsce w kolejce) pokazują najwolniejszy etap.
+"""
+
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+
+STAGE_FETCH = "fetch"
+STAGE_PARSE = "parse"
+STAGE_PERSIST = "persist"
+
+
+class JobLog:
+    """Dziennik zadań (JSONL) z buforem przywracającym kolejność wejściową."""
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Inicjalizuje JobLog.
+
+        Args:
+            path: Ścieżka pliku dziennika (None = dziennik tylko w pamięci)
+        """
+        self.path = Path(path) if path else None
+        self._file = open(self.path, "a", encoding="utf-8") if self.path else None
+        self._pending: Dict[int, Dict[str, object]] = {}
+        self._next_index = 0
+        self.entries: List[Dict[str, object]] = []
+
+    def record(self, index: int, entry: Dict[str, object]) -> None:
+        """Zapisuje wynik zadania - wpisy trafiają do dziennika gdy wszystkie wcześniejsze są gotowe."""
+        self._pending[index] = entry
+        while self._next_index in self._pending:
+            self._write(self._pending.pop(self._next_index))
+            self._next_index += 1
+
+    def _write(self, entry: Dict[str, object]) -> None:
+        """Dopisuje wpis do dziennika."""
+        self.entries.append(entry)
+        if self._file:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        """Zapisuje pozostałe wpisy (np. po przerwaniu) w kolejności wejściowej i zamyka plik."""
+        for index in sorted(self._pending):
+            self._write(self._pending[index])
+        self._pending = {}
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class PipelineJob:
+    """Zadanie przekazywane między etapami potoku."""
+
+    __slots__ = ("index", "url", "payload", "started", "tunnel")
+
+    def __init__(self, index: int, url: str):
+        self.index = index
+        self.url = url
+        self.payload: Any = url
+        self.started = time.time()
+        self.tunnel: Optional[str] = None
+
+
+class StageStats:
+    """Statystyki etapu potoku i jego kolejki wejściowej."""
+
+    def __init__(self, name: str, workers: int, queue: asyncio.Queue):
+        self.name = name
+        self.workers = workers
+        self.queue = queue
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        # Czas oczekiwania workerów na zadanie (etap szybszy niż poprzedni)
+        self.idle_seconds = 0.0
+        # Czas oczekiwania na miejsce w kolejce następnego etapu (następny etap wolniejszy)
+        self.blocked_seconds = 0.0
+        self.max_depth = 0
+        self._depth_total = 0
+        self._depth_samples = 0
+
+    def sample_depth(self) -> None:
+        """Zapisuje aktualną głębokość kolejki wejściowej."""
+        depth = self.queue.qsize()
+        self.max_depth = max(self.max_depth, depth)
+        self._depth_total += depth
+        self._depth_samples += 1
+
+    def to_dict(self) -> Dict[str, object]:
+        """Zwraca statystyki etapu jako słownik."""
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "processed": self.processed,
+            "failed": self.failed,
+            "busySeconds": round(self.busy_seconds, 1),
+            "idleSeconds": round(self.idle_seconds, 1),
+            "blockedSeconds": round(self.blocked_seconds, 1),
+            "queueDepth": {
+                "current": self.queue.qsize(),
+                "max": self.max_depth,
+                "avg": round(self._depth_total / self._depth_samples, 2) if self._depth_samples else 0.0,
+                "capacity": self.queue.maxsize,
+            },
+        }
+
+
+class CrawlPipeline:
+    """Potok etapów pobierania, parsowania i zapisu połączonych ograniczonymi kolejkami."""
+
+    def __init__(
+        self,
+        fetch: Callable[[str], Awaitable[Any]],
+        parse: Callable[[str, Any], Awaitable[Any]],
+        persist: Callable[[str, Any], Awaitable[Optional[str]]],
+        fetch_workers: int = 4,
+        parse_workers: int = 1,
+        persist_workers: int = 1,
+        queue_size: int = 8,
+        job_log: Optional[JobLog] = None,
+        tunnel_provider: Optional[Callable[[], Optional[str]]] = None,
+        on_error: Optional[Callable[[str, str, str], None]] = None,
+    ):
+        """
+        Inicjalizuje CrawlPipeline.
+
+        Args:
+            fetch: Funkcja async (url) zwracająca pobraną stronę
+            parse: Funkcja async (url, strona) zwracająca wyciągnięte dane
+            persist: Funkcja async (url, dane) zwracająca ścieżkę zapisanego pliku
+            fetch_workers: Liczba równoległych workerów pobierania
+            parse_workers: Liczba równoległych workerów parsowania
+            persist_workers: Liczba równoległych workerów zapisu
+            queue_size: Pojemność kolejki przed każdym etapem
+            job_log: Dziennik zadań (wpisy w kolejności wejściowej)
+            tunnel_provider: Funkcja zwracająca nazwę aktualnego tunelu VPN (zapisywana w dzienniku)
+            on_error: Funkcja (url, etap, błąd) wywoływana gdy zadanie nie powiodło się
+        """
+        if min(fetch_workers, parse_workers, persist_workers) < 1:
+            raise ValueError("Liczba workerów każdego etapu musi być większa od 0")
+        if queue_size < 1:
+            raise ValueError("Pojemność kolejki musi być większa od 0")
+        self.stages = [
+            (STAGE_FETCH, lambda job: fetch(job.url), fetch_workers),
+            (STAGE_PARSE, lambda job: parse(job.url, job.payload), parse_workers),
+            (STAGE_PERSIST, lambda job: persist(job.url, job.payload), persist_workers),
+        ]
+        self.queue_size = queue_size
+        self.job_log = job_log or JobLog()
+        self.tunnel_provider = tunnel_provider
+        self.on_error = on_error
+        self.stats: List[StageStats] = []
+        self.total = 0
+        self.succeeded = 0
+        self.failed = 0
+
+    def _finish(self, job: PipelineJob, output: Optional[str], stage: Optional[str], error: Optional[str]) -> None:
+        """Zapisuje wynik zadania w dzienniku."""
+        elapsed = time.time() - job.started
+        if output:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+            if self.on_error:
+                self.on_error(job.url, stage, error)
+        self.job_log.record(job.index, {
+            "index": job.index,
+            "url": job.url,
+            "status": "ok" if output else "error",
+            "output": output,
+            "error": error,
+            "stage": stage,
+            "tunnel": job.tunnel,
+            "seconds": round(elapsed, 2),
+        })
+        print(f"[{self.succeeded + self.failed}/{self.total}] {'✓' if output else '✗'} {job.url} "
+              f"({elapsed:.1f}s{'' if output else ', etap: ' + stage})")
+
+    async def _worker(self, position: int, queue: asyncio.Queue, next_queue: Optional[asyncio.Queue]) -> None:
+        """Przetwarza zadania etapu aż do otrzymania znacznika końca (None)."""
+        name, handler, _ = self.stages[position]
+        stats = self.stats[position]
+        while True:
+            wait_start = time.time()
+            job = await queue.get()
+            stats.idle_seconds += time.time() - wait_start
+            try:
+                if job is None:
+                    return
+                stats.sample_depth()
+                if name == STAGE_FETCH:
+                    # Czas zadania liczony od rozpoczęcia pobierania (bez oczekiwania w kolejce)
+                    job.started = time.time()
+                    job.tunnel = self.tunnel_provider() if self.tunnel_provider else None
+                start_time = time.time()
+                error = None
+                try:
+                    result = await handler(job)
+                except Exception as e:
+                    result = None
+                    error = f"{type(e).__name__}: {e}"
+                stats.busy_seconds += time.time() - start_time
+                stats.processed += 1
+
+                if result is None:
+                    stats.failed += 1
+                    self._finish(job, None, name, error)
+                elif next_queue is None:
+                    self._finish(job, result, None, None)
+                else:
+                    job.payload = result
+                    wait_start = time.time()
+                    await next_queue.put(job)
+                    stats.blocked_seconds += time.time() - wait_start
+            finally:
+                queue.task_done()
+
+    async def _run_stage(self, position: int, queues: List[asyncio.Queue]) -> None:
+        """Uruchamia workery etapu, a po ich zakończeniu przekazuje znaczniki końca do następnego etapu."""
+        workers = self.stages[position][2]
+        next_queue = queues[position + 1] if position + 1 < len(queues) else None
+        await asyncio.gather(*(self._worker(position, queues[position], next_queue) for _ in range(workers)))
+        if next_queue is not None:
+            for _ in range(self.stages[position + 1][2]):
+                await next_queue.put(None)
+
+    async def run(self, urls: Iterable[str]) -> Dict[str, int]:
+        """Przetwarza wszystkie URL i zwraca podsumowanie {"succeeded", "failed"}."""
+        urls = [url.strip() for url in urls if url and url.strip()]
+        self.total = len(urls)
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        self.stats = [StageStats(name, workers, queue) for (name, _, workers), queue in zip(self.stages, queues)]
+        tasks = [asyncio.ensure_future(self._run_stage(position, queues)) for position in range(len(self.stages))]
+
+        try:
+            for index, url in enumerate(urls):
+                await queues[0].put(PipelineJob(index, url))
+            for _ in range(self.stages[0][2]):
+                await queues[0].put(None)
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.job_log.close()
+
+        return {"succeeded": self.succeeded, "failed": self.failed}
+
+    def stage_stats(self) -> List[Dict[str, object]]:
+        """Zwraca statystyki wszystkich etapów (w kolejności potoku)."""
+        return [stats.to_dict() for stats in self.stats]
+
+    def bottleneck(self) -> Optional[str]:
+        """Zwraca nazwę najbardziej obciążonego etapu (najwięcej czasu pracy na workera)."""
+        if not self.stats:
+            return None
+        return max(self.stats, key=lambda stats: stats.busy_seconds / stats.workers).name
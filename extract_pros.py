@@ -4,7 +4,8 @@ Skrypt do wyodrębniania pros z pliku HTML
 """
 
 import json
-from bs4 import BeautifulSoup
+
+from html_parser import make_soup
 
 def extract_pros(html_file):
     """Wyodrębnia pros z sekcji Pros w HTML"""
@@ -12,7 +13,7 @@ def extract_pros(html_file):
     with open(html_file, 'r', encoding='utf-8') as f:
         html_content = f.read()
     
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = make_soup(html_content)
     
     # Znajdź główny div z Pros (z klasą cell small-12 medium-6)
     # Szukamy diva który zawiera tekst "Pros" w nagłówku
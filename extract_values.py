@@ -4,7 +4,8 @@ Skrypt do wyodrębniania wartości procentowych width z pliku HTML
 """
 
 import re
-from bs4 import BeautifulSoup
+
+from html_parser import make_soup
 
 def extract_values(html_file):
     """Wyodrębnia wartości procentowe width dla każdej kategorii"""
@@ -12,7 +13,7 @@ def extract_values(html_file):
     with open(html_file, 'r', encoding='utf-8') as f:
         html_content = f.read()
     
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = make_soup(html_content)
     
     # Znajdź wszystkie divy z atrybutem index
     items = soup.find_all('div', attrs={'index': True})
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Moduł z backendami pobierania stron.
+Domyślnie strona jest pobierana zwykłym klientem HTTP (połączenia keep-alive,
+HTTP/2, gzip/br). Przeglądarka Crawl4AI jest używana tylko wtedy, gdy w pobranym
+HTML brakuje wymaganych sekcji (np. nazwy perfum lub danych głosowania).
+Każde pobranie czeka na token ze współdzielonego limitera żądań (rate_limiter).
+"""
+
+import abc
+import hashlib
+import re
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from browser_pool import BrowserPool
+from rate_limiter import RateLimiter, get_default_rate_limiter
+
+
+# Znaczniki sekcji w surowym HTML, które czytają ekstraktory (sprawdzane bez parsowania)
+SECTION_MARKERS = {
+    "name": re.compile(r"<h1[^>]*itemprop=[\"']name[\"']", re.I),
+    "pyramid": re.compile(r"id=[\"']pyramid[\"']", re.I),
+    "votes": re.compile(r"vote-button-legend", re.I),
+    "reviews": re.compile(r"itemprop=[\"']review[\"']", re.I),
+}
+
+# Sekcje, których brak powoduje przejście na przeglądarkę
+# (piramida nut i recenzje nie występują na każdej stronie perfum)
+DEFAULT_REQUIRED_SECTIONS = ("name", "votes")
+
+# Nagłówki specyficzne dla połączenia - niedozwolone w HTTP/2
+HOP_BY_HOP_HEADERS = {"connection", "keep-alive", "proxy-connection", "transfer-encoding", "upgrade"}
+
+# Nagłówki żądania warunkowego - nie są wysyłane przez przeglądarkę (304 dałoby pustą stronę)
+CONDITIONAL_HEADERS = {"if-none-match", "if-modified-since"}
+
+
+class FetchResult:
+    """Wynik pobrania strony (pola zgodne z wynikiem Crawl4AI używanym w scraperze)."""
+
+    def __init__(
+        self,
+        url: str,
+        html: str = "",
+        status_code: Optional[int] = None,
+        success: bool = True,
+        error_message: Optional[str] = None,
+        backend: str = "http",
+        response_headers: Optional[Dict[str, str]] = None,
+        elapsed: float = 0.0,
+    ):
+        self.url = url
+        self.html = html
+        self.status_code = status_code
+        self.success = success
+        self.error_message = error_message
+        self.backend = backend
+        self.response_headers = response_headers or {}
+        self.elapsed = elapsed
+        self.fallback_reason: Optional[str] = None
+        # Pomiar gotowości strony w przeglądarce ({"mode", "seconds"}) - tylko backend przeglądarki
+        self.readiness: Optional[Dict[str, object]] = None
+        # Metadane oryginalnego pobrania gdy strona pochodzi z cache HTML ({"fetchedAt", "backend", "tunnel"})
+        self.cache_meta: Optional[Dict[str, object]] = None
+        # Strona z drzewem DOM (scraper.PerfumePage) - ustawiana przy sprawdzaniu błędu 404
+        self.page = None
+        # Dane wyciągnięte wcześniej z tej samej treści (odpowiedź 304) - ekstrakcja jest pomijana
+        self.extracted: Optional[Dict[str, Any]] = None
+
+    def meta(self) -> Dict[str, object]:
+        """Zwraca metadane pobrania zapisywane razem z wynikiem scrapowania."""
+        meta = {
+            "backend": self.backend,
+            "statusCode": self.status_code,
+            "fetchSeconds": round(self.elapsed, 3),
+            # Hash treści - pozwala wykryć, czy strona zmieniła się od poprzedniego pobrania
+            "contentHash": hashlib.sha256(self.html.encode("utf-8")).hexdigest() if self.html else None,
+        }
+        if self.fallback_reason:
+            meta["fallbackReason"] = self.fallback_reason
+        if self.readiness:
+            meta["readinessMode"] = self.readiness["mode"]
+            meta["readinessSeconds"] = round(self.readiness["seconds"], 3)
+        if self.cache_meta:
+            meta["cache"] = self.cache_meta
+        if self.extracted is not None:
+            meta["extractionReused"] = True
+        return meta
+
+
+def find_missing_sections(html: str, required: tuple = DEFAULT_REQUIRED_SECTIONS) -> List[str]:
+    """Zwraca listę wymaganych sekcji, których nie ma w surowym HTML."""
+    if not html:
+        return list(required)
+    return [name for name in required if not SECTION_MARKERS[name].search(html)]
+
+
+class FetchBackend(abc.ABC):
+    """Bazowa klasa backendu pobierania stron (backend bez fetch() nie da się utworzyć)."""
+
+    name = "base"
+
+    @abc.abstractmethod
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        """Pobiera stronę i zwraca FetchResult."""
+
+    async def close(self) -> None:
+        """Zwalnia zasoby backendu."""
+
+    async def __aenter__(self):
+        """Context manager entry."""
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        await self.close()
+
+
+class HttpBackend(FetchBackend):
+    """Backend pobierający surowy HTML asynchronicznym klientem HTTP (httpx)."""
+
+    name = "http"
+
+    def __init__(self, timeout: float = 30.0, max_connections: int = 10, http2: bool = True):
+        """
+        Inicjalizuje HttpBackend.
+
+        Args:
+            timeout: Timeout żądania w sekundach
+            max_connections: Maksymalna liczba połączeń w puli (utrzymywanych jako keep-alive)
+            http2: Czy negocjować HTTP/2
+        """
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.http2 = http2
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Zwraca współdzielonego klienta HTTP (tworzonego leniwie)."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                follow_redirects=True,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    @staticmethod
+    def _prepare_headers(headers: Optional[Dict[str, str]]) -> Dict[str, str]:
+        """Usuwa puste i specyficzne dla połączenia nagłówki."""
+        if not headers:
+            return {}
+        return {k: v for k, v in headers.items() if v and k.lower() not in HOP_BY_HOP_HEADERS}
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        """Pobiera stronę klientem HTTP."""
+        start_time = time.time()
+        try:
+            response = await self._get_client().get(url, headers=self._prepare_headers(headers))
+        except httpx.HTTPError as e:
+            return FetchResult(
+                url,
+                success=False,
+                error_message=f"{type(e).__name__}: {e}",
+                backend=self.name,
+                elapsed=time.time() - start_time,
+            )
+
+        return FetchResult(
+            str(response.url),
+            html=response.text,
+            status_code=response.status_code,
+            success=response.status_code < 400,
+            error_message=None if response.status_code < 400 else f"HTTP {response.status_code}",
+            backend=self.name,
+            response_headers=dict(response.headers),
+            elapsed=time.time() - start_time,
+        )
+
+    async def close(self) -> None:
+        """Zamyka klienta HTTP."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class BrowserBackend(FetchBackend):
+    """Backend renderujący stronę w przeglądarce z puli Crawl4AI."""
+
+    name = "browser"
+
+    def __init__(self, browser_pool: Optional[BrowserPool] = None):
+        """
+        Inicjalizuje BrowserBackend.
+
+        Args:
+            browser_pool: Współdzielona pula przeglądarek (jeśli None, tworzona i zamykana przez backend)
+        """
+        self.own_pool = browser_pool is None
+        self.browser_pool = browser_pool or BrowserPool()
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        """Pobiera stronę przeglądarką."""
+        start_time = time.time()
+        if headers:
+            headers = {k: v for k, v in headers.items() if k.lower() not in CONDITIONAL_HEADERS}
+        result, readiness = await self.browser_pool.fetch_with_readiness(url, headers=headers)
+        fetch_result = FetchResult(
+            url,
+            html=result.html or "",
+            status_code=result.status_code,
+            success=result.success,
+            error_message=result.error_message,
+            backend=self.name,
+            response_headers=dict(getattr(result, "response_headers", None) or {}),
+            elapsed=time.time() - start_time,
+        )
+        fetch_result.readiness = readiness
+        return fetch_result
+
+    async def close(self) -> None:
+        """Zamyka pulę przeglądarek jeśli została utworzona przez backend."""
+        if self.own_pool:
+            await self.browser_pool.close()
+
+
+class FallbackFetcher(FetchBackend):
+    """Pobiera stronę klientem HTTP, a przeglądarką tylko gdy brakuje wymaganych sekcji."""
+
+    name = "auto"
+
+    def __init__(
+        self,
+        primary: FetchBackend,
+        fallback: FetchBackend,
+        required_sections: tuple = DEFAULT_REQUIRED_SECTIONS,
+    ):
+        """
+        Inicjalizuje FallbackFetcher.
+
+        Args:
+            primary: Backend używany jako pierwszy (zwykle HttpBackend)
+            fallback: Backend używany gdy walidacja się nie powiedzie (zwykle BrowserBackend)
+            required_sections: Nazwy sekcji z SECTION_MARKERS wymaganych w HTML
+        """
+        self.primary = primary
+        self.fallback = fallback
+        self.required_sections = required_sections
+        self.counts: Dict[str, int] = {primary.name: 0, fallback.name: 0, "fallbacks": 0}
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        """Pobiera stronę, w razie potrzeby przechodząc na backend zapasowy."""
+        result = await self.primary.fetch(url, headers=headers)
+
+        # 429 i 404 są odpowiedzią serwera - przeglądarka dostałaby to samo,
+        # a 304 (żądanie warunkowe) oznacza, że treść w cache jest aktualna
+        if result.status_code in (304, 404, 429):
+            self.counts[self.primary.name] += 1
+            return result
+
+        if result.success:
+            missing = find_missing_sections(result.html, self.required_sections)
+            if not missing:
+                self.counts[self.primary.name] += 1
+                return result
+            reason = f"brak sekcji: {', '.join(missing)}"
+        else:
+            reason = result.error_message or f"HTTP {result.status_code}"
+
+        print(f"🌐 Przejście na {self.fallback.name} ({reason})", file=sys.stderr)
+        self.counts["fallbacks"] += 1
+        fallback_result = await self.fallback.fetch(url, headers=headers)
+        fallback_result.fallback_reason = reason
+        self.counts[self.fallback.name] += 1
+        return fallback_result
+
+    def stats(self) -> Dict[str, float]:
+        """Zwraca liczniki backendów i odsetek stron obsłużonych przez backend główny."""
+        total = self.counts[self.primary.name] + self.counts[self.fallback.name]
+        stats = dict(self.counts)
+        stats["primaryHitRate"] = round(self.counts[self.primary.name] / total, 4) if total else 0.0
+        # Statystyki backendów (np. stan limitera) bez nadpisywania liczników
+        for backend in (self.primary, self.fallback):
+            if hasattr(backend, "stats"):
+                for key, value in backend.stats().items():
+                    stats.setdefault(key, value)
+        return stats
+
+    async def close(self) -> None:
+        """Zamyka oba backendy."""
+        await self.primary.close()
+        await self.fallback.close()
+
+
+class RateLimitedFetcher(FetchBackend):
+    """Pobiera stronę dopiero po uzyskaniu tokenu ze współdzielonego limitera (per host i tunel VPN)."""
+
+    def __init__(
+        self,
+        inner: FetchBackend,
+        rate_limiter: RateLimiter,
+        tunnel_provider: Optional[Callable[[], Optional[str]]] = None,
+    ):
+        """
+        Inicjalizuje RateLimitedFetcher.
+
+        Args:
+            inner: Właściwy backend pobierania
+            rate_limiter: Współdzielony limiter żądań
+            tunnel_provider: Funkcja zwracająca nazwę aktualnego tunelu VPN
+        """
+        self.inner = inner
+        self.rate_limiter = rate_limiter
+        self.tunnel_provider = tunnel_provider
+
+    @property
+    def name(self) -> str:
+        """Nazwa backendu wewnętrznego (liczniki FallbackFetcher pozostają per backend)."""
+        return self.inner.name
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        """Czeka na token, pobiera stronę i aktualizuje tempo limitera na podstawie wyniku."""
+        host = urlparse(url).hostname or ""
+        tunnel = self.tunnel_provider() if self.tunnel_provider else None
+        await self.rate_limiter.acquire(host, tunnel)
+        result = await self.inner.fetch(url, headers=headers)
+        self.rate_limiter.record(host, tunnel, result)
+        return result
+
+    def stats(self) -> Dict[str, object]:
+        """Zwraca statystyki backendu wewnętrznego oraz stan limitera."""
+        stats: Dict[str, object] = {"rateLimiter": self.rate_limiter.snapshot()}
+        if hasattr(self.inner, "stats"):
+            stats.update(self.inner.stats())
+        return stats
+
+    async def close(self) -> None:
+        """Zamyka backend wewnętrzny."""
+        await self.inner.close()
+
+
+def create_fetcher(
+    mode: str = "auto",
+    browser_pool: Optional[BrowserPool] = None,
+    rate_limiter: Optional[RateLimiter] = None,
+    tunnel_provider: Optional[Callable[[], Optional[str]]] = None,
+) -> FetchBackend:
+    """Tworzy backend pobierania ograniczony współdzielonym limiterem żądań.
+
+    W trybie "auto" każdy backend pobiera własny token, więc przejście
+    na przeglądarkę jest osobnym żądaniem również dla limitera.
+
+    Args:
+        mode: "auto" (HTTP z przejściem na przeglądarkę), "http" lub "browser"
+        browser_pool: Współdzielona pula przeglądarek dla backendu przeglądarki
+        rate_limiter: Limiter żądań (domyślnie współdzielony limiter procesu)
+        tunnel_provider: Funkcja zwracająca nazwę aktualnego tunelu VPN (osobne tempo per tunel)
+    """
+    rate_limiter = rate_limiter or get_default_rate_limiter()
+
+    def limited(backend: FetchBackend) -> RateLimitedFetcher:
+        return RateLimitedFetcher(backend, rate_limiter, tunnel_provider)
+
+    if mode == "http":
+        return limited(HttpBackend())
+    if mode == "browser":
+        return limited(BrowserBackend(browser_pool))
+    if mode == "auto":
+        return FallbackFetcher(limited(HttpBackend()), limited(BrowserBackend(browser_pool)))
+    raise ValueError(f"Nieznany backend pobierania: {mode}")
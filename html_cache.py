@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Moduł z trwałym cache surowych odpowiedzi (HTML) stron perfum.
+HTML jest zapisywany raz per treść (adres = hash SHA-256 treści), skompresowany zstd,
+a dla każdego URL zapisywane są metadane pobrania: status, czas pobrania, backend,
+tunel VPN oraz walidatory (ETag, Last-Modified). Nieświeże wpisy są rewalidowane
+żądaniem warunkowym - odpowiedź 304 oznacza użycie HTML z cache bez pobierania treści.
+Cache pozwala też ponownie uruchomić ekstrakcję bez sieci (tryb --replay).
+Dane wyciągnięte z HTML są zapisywane po hashu treści - po odpowiedzi 304
+są używane ponownie zamiast ponownej ekstrakcji.
+
+Układ katalogu:
+    html_cache/objects/ab/abcdef....html.zst     - skompresowany HTML (po hashu treści)
+    html_cache/extracted/ab/abcdef....json.zst   - dane wyciągnięte z HTML (po hashu treści)
+    html_cache/meta/12/123456....json            - metadane URL (po hashu URL)
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import zstandard
+
+from fetch_backends import FetchBackend, FetchResult, find_missing_sections
+
+
+DEFAULT_CACHE_DIR = "html_cache"
+
+# Domyślny czas świeżości wpisu (7 dni)
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+
+def normalize_cache_url(url: str) -> str:
+    """Normalizuje URL dla klucza cache (fragment #... nie jest wysyłany do serwera)."""
+    return url.split("#", 1)[0].strip()
+
+
+def _sha256(data: bytes) -> str:
+    """Zwraca hash SHA-256 w postaci szesnastkowej."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def get_validators(response_headers: Optional[Dict[str, str]]) -> Dict[str, str]:
+    """Wyciąga walidatory (ETag, Last-Modified) z nagłówków odpowiedzi (bez względu na wielkość liter)."""
+    validators = {}
+    for name, value in (response_headers or {}).items():
+        lower_name = name.lower()
+        if lower_name == "etag" and value:
+            validators["etag"] = value
+        elif lower_name == "last-modified" and value:
+            validators["lastModified"] = value
+    return validators
+
+
+def conditional_headers(meta: Dict[str, object]) -> Dict[str, str]:
+    """Zwraca nagłówki żądania warunkowego (If-None-Match / If-Modified-Since) dla wpisu cache."""
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("lastModified"):
+        headers["If-Modified-Since"] = meta["lastModified"]
+    return headers
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """Zapisuje plik atomowo (plik tymczasowy + rename) - przerwany zapis nie psuje cache."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class HtmlCache:
+    """Cache surowego HTML adresowany treścią z metadanymi per URL."""
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS,
+        compression_level: int = 10,
+    ):
+        """
+        Inicjalizuje HtmlCache.
+
+        Args:
+            cache_dir: Katalog cache
+            ttl_seconds: Czas świeżości wpisu w sekundach (None = wpisy zawsze świeże)
+            compression_level: Poziom kompresji zstd
+        """
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / "objects"
+        self.extracted_dir = self.cache_dir / "extracted"
+        self.meta_dir = self.cache_dir / "meta"
+        self.ttl_seconds = ttl_seconds
+        self._compressor = zstandard.ZstdCompressor(level=compression_level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def _object_path(self, content_hash: str) -> Path:
+        """Ścieżka pliku z HTML o danym hashu treści."""
+        return self.objects_dir / content_hash[:2] / f"{content_hash}.html.zst"
+
+    def _extracted_path(self, content_hash: str) -> Path:
+        """Ścieżka pliku z danymi wyciągniętymi z HTML o danym hashu treści."""
+        return self.extracted_dir / content_hash[:2] / f"{content_hash}.json.zst"
+
+    def _meta_path(self, url: str) -> Path:
+        """Ścieżka pliku metadanych dla URL."""
+        url_hash = _sha256(normalize_cache_url(url).encode("utf-8"))
+        return self.meta_dir / url_hash[:2] / f"{url_hash}.json"
+
+    def put(
+        self,
+        url: str,
+        html: str,
+        status_code: Optional[int] = 200,
+        backend: Optional[str] = None,
+        tunnel: Optional[str] = None,
+        fetched_at: Optional[float] = None,
+        validators: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, object]:
+        """Zapisuje HTML strony i metadane pobrania. Zwraca zapisane metadane.
+
+        Args:
+            validators: Walidatory odpowiedzi {"etag", "lastModified"} (z get_validators)
+        """
+        data = html.encode("utf-8")
+        content_hash = _sha256(data)
+        object_path = self._object_path(content_hash)
+        # Ta sama treść jest zapisywana tylko raz
+        if not object_path.exists():
+            _atomic_write(object_path, self._compressor.compress(data))
+
+        meta = {
+            "url": normalize_cache_url(url),
+            "contentHash": content_hash,
+            "size": len(data),
+            "statusCode": status_code,
+            "fetchedAt": fetched_at if fetched_at is not None else time.time(),
+            "backend": backend,
+            "tunnel": tunnel,
+        }
+        meta.update(validators or {})
+        self._write_meta(url, meta)
+        return meta
+
+    def _write_meta(self, url: str, meta: Dict[str, object]) -> None:
+        """Zapisuje metadane URL."""
+        _atomic_write(self._meta_path(url), json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+
+    def mark_revalidated(
+        self,
+        url: str,
+        meta: Dict[str, object],
+        tunnel: Optional[str] = None,
+        validators: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, object]:
+        """Odświeża czas pobrania wpisu po odpowiedzi 304 (treść bez zmian)."""
+        meta = dict(meta)
+        meta["fetchedAt"] = time.time()
+        meta["revalidatedCount"] = int(meta.get("revalidatedCount") or 0) + 1
+        if tunnel is not None:
+            meta["tunnel"] = tunnel
+        # Serwer może przysłać nowe walidatory razem z 304
+        meta.update(validators or {})
+        self._write_meta(url, meta)
+        return meta
+
+    def get_meta(self, url: str) -> Optional[Dict[str, object]]:
+        """Zwraca metadane URL lub None gdy strony nie ma w cache."""
+        meta_path = self._meta_path(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def read_html(self, content_hash: str) -> Optional[str]:
+        """Zwraca HTML o danym hashu treści lub None gdy obiektu brak."""
+        try:
+            with open(self._object_path(content_hash), "rb") as f:
+                return self._decompressor.decompress(f.read()).decode("utf-8")
+        except FileNotFoundError:
+            return None
+
+    def put_extracted(self, content_hash: str, data: Dict[str, object]) -> None:
+        """Zapisuje dane wyciągnięte z HTML o danym hashu treści."""
+        encoded = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        _atomic_write(self._extracted_path(content_hash), self._compressor.compress(encoded))
+
+    def get_extracted(self, content_hash: str) -> Optional[Dict[str, object]]:
+        """Zwraca dane wyciągnięte z HTML o danym hashu treści lub None."""
+        try:
+            with open(self._extracted_path(content_hash), "rb") as f:
+                return json.loads(self._decompressor.decompress(f.read()).decode("utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def is_fresh(self, meta: Dict[str, object], now: Optional[float] = None) -> bool:
+        """Sprawdza czy wpis mieści się w czasie świeżości (TTL)."""
+        if self.ttl_seconds is None:
+            return True
+        now = now if now is not None else time.time()
+        return now - float(meta.get("fetchedAt") or 0) <= self.ttl_seconds
+
+    def get(self, url: str, require_fresh: bool = True) -> Optional[Tuple[Dict[str, object], str]]:
+        """Zwraca (metadane, HTML) dla URL lub None gdy brak wpisu (albo wpis jest nieświeży).
+
+        Args:
+            url: URL strony
+            require_fresh: Czy pomijać wpisy starsze niż TTL
+        """
+        meta = self.get_meta(url)
+        if meta is None:
+            return None
+        if require_fresh and not self.is_fresh(meta):
+            return None
+        html = self.read_html(meta["contentHash"])
+        if html is None:
+            return None
+        return meta, html
+
+    def iter_urls(self) -> Iterator[str]:
+        """Zwraca URL wszystkich stron zapisanych w cache (posortowane po ścieżce metadanych)."""
+        if not self.meta_dir.exists():
+            return
+        for meta_path in sorted(self.meta_dir.glob("*/*.json")):
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    yield json.load(f)["url"]
+            except (json.JSONDecodeError, KeyError):
+                continue
+
+
+class CachingFetcher(FetchBackend):
+    """Backend pobierania z cache HTML przed właściwym backendem.
+
+    Świeże wpisy z cache są zwracane bez sieci, nieświeże są rewalidowane
+    (If-None-Match / If-Modified-Since), a poprawne strony pobrane przez
+    backend wewnętrzny są zapisywane do cache. W trybie replay sieć nie jest
+    używana wcale - brak strony w cache kończy się błędem.
+    """
+
+    name = "cache"
+
+    def __init__(
+        self,
+        inner: Optional[FetchBackend],
+        cache: HtmlCache,
+        replay: bool = False,
+        tunnel_provider: Optional[Callable[[], Optional[str]]] = None,
+        archive=None,
+        last_crawled_provider: Optional[Callable[[str], Optional[float]]] = None,
+    ):
+        """
+        Inicjalizuje CachingFetcher.
+
+        Args:
+            inner: Backend używany gdy strony nie ma w cache (None tylko w trybie replay)
+            cache: Cache HTML (w trybie replay także PageArchive)
+            replay: Tryb replay - tylko cache, bez sieci (wpisy używane niezależnie od TTL)
+            tunnel_provider: Funkcja zwracająca nazwę aktualnego tunelu VPN (zapisywana w metadanych)
+            archive: Opcjonalne archiwum (PageArchive), do którego dopisywane są pobrane strony
+            last_crawled_provider: Funkcja zwracająca czas poprzedniego pobrania URL (harmonogram odświeżania) -
+                wpis cache nie nowszy niż to pobranie jest rewalidowany mimo TTL
+        """
+        if inner is None and not replay:
+            raise ValueError("Backend wewnętrzny jest wymagany poza trybem replay")
+        self.inner = inner
+        self.cache = cache
+        self.replay = replay
+        self.tunnel_provider = tunnel_provider
+        self.archive = archive
+        self.last_crawled_provider = last_crawled_provider
+        self.counts: Dict[str, int] = {"hits": 0, "misses": 0, "revalidated": 0, "reused": 0, "stored": 0}
+
+    @staticmethod
+    def _cached_result(url: str, meta: Dict[str, object], html: str, backend: str) -> FetchResult:
+        """Tworzy FetchResult z wpisu cache."""
+        result = FetchResult(
+            url,
+            html=html,
+            status_code=meta.get("statusCode"),
+            success=True,
+            backend=backend,
+        )
+        result.cache_meta = {
+            "fetchedAt": meta.get("fetchedAt"),
+            "backend": meta.get("backend"),
+            "tunnel": meta.get("tunnel"),
+        }
+        return result
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        """Zwraca stronę z cache lub pobiera ją backendem wewnętrznym i zapisuje do cache.
+
+        Nieświeży wpis jest rewalidowany żądaniem warunkowym - przy 304 zwracany jest HTML z cache.
+        """
+        if self.replay:
+            # Tylko get() - źródłem stron może być też archiwum (PageArchive)
+            cached = self.cache.get(url, require_fresh=False)
+            if cached is not None:
+                self.counts["hits"] += 1
+                meta, html = cached
+                return self._cached_result(url, meta, html, "replay")
+            self.counts["misses"] += 1
+            return FetchResult(
+                url,
+                success=False,
+                error_message="Brak strony w cache HTML (tryb replay)",
+                backend="replay",
+            )
+
+        meta = self.cache.get_meta(url)
+        if meta is not None and self.cache.is_fresh(meta) and not self._seen_by_last_crawl(url, meta):
+            html = self.cache.read_html(meta["contentHash"])
+            if html is not None:
+                self.counts["hits"] += 1
+                return self._cached_result(url, meta, html, "cache")
+
+        self.counts["misses"] += 1
+        request_headers = dict(headers or {})
+        if meta is not None:
+            request_headers.update(conditional_headers(meta))
+        result = await self.inner.fetch(url, headers=request_headers)
+        tunnel = self.tunnel_provider() if self.tunnel_provider else None
+
+        if result.status_code == 304 and meta is not None:
+            html = self.cache.read_html(meta["contentHash"])
+            if html is not None:
+                # Treść bez zmian - ekstrakcja z HTML zapisanego w cache
+                self.counts["revalidated"] += 1
+                meta = self.cache.mark_revalidated(url, meta, tunnel, get_validators(result.response_headers))
+                cached = self._cached_result(url, meta, html, "revalidated")
+                cached.elapsed = result.elapsed
+                # Dane wyciągnięte z tej samej treści przy poprzednim pobraniu
+                cached.extracted = self.cache.get_extracted(meta["contentHash"])
+                if cached.extracted is not None:
+                    self.counts["reused"] += 1
+                return cached
+            # Obiekt HTML zniknął z cache - pobierz pełną stronę bez walidatorów
+            result = await self.inner.fetch(url, headers=headers)
+
+        # Zapisuj tylko kompletne strony - strony błędów i wyzwania antybotowe nie trafiają do cache
+        if result.success and result.status_code == 200 and not find_missing_sections(result.html):
+            self.cache.put(
+                url,
+                result.html,
+                result.status_code,
+                result.backend,
+                tunnel,
+                validators=get_validators(result.response_headers),
+            )
+            if self.archive is not None:
+                self.archive.append(url, result.html, result.status_code, result.backend, tunnel)
+            self.counts["stored"] += 1
+        return result
+
+    def _seen_by_last_crawl(self, url: str, meta: Dict[str, object]) -> bool:
+        """Czy wpis cache był już użyty przy poprzednim pobraniu URL.
+
+        Ponowne pobranie z harmonogramu odświeżania ma sprawdzić aktualną treść -
+        zwrócenie tego samego HTML zostałoby uznane za brak zmian danych.
+        """
+        if self.last_crawled_provider is None:
+            return False
+        last_crawled_at = self.last_crawled_provider(url)
+        return last_crawled_at is not None and float(meta.get("fetchedAt") or 0) <= last_crawled_at
+
+    def stats(self) -> Dict[str, object]:
+        """Zwraca liczniki cache oraz statystyki backendu wewnętrznego."""
+        stats: Dict[str, object] = dict(self.counts)
+        if hasattr(self.inner, "stats"):
+            stats["inner"] = self.inner.stats()
+        return stats
+
+    async def close(self) -> None:
+        """Zamyka backend wewnętrzny i archiwum (mapowania segmentów)."""
+        if self.inner is not None:
+            await self.inner.close()
+        for store in (self.cache, self.archive):
+            close = getattr(store, "close", None)
+            if close is not None:
+                close()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Moduł z wyborem parsera HTML dla ekstraktorów (BeautifulSoup).
+Parser "html.parser" (czysty Python) jest najwolniejszy - strona perfum 1-3 MB
+parsuje się w nim prawie sekundę. Domyślnie używany jest parser lxml (libxml2,
+kod C), a gdy lxml nie jest zainstalowany - html.parser. Ekstraktory korzystają
+z API BeautifulSoup niezależnie od parsera (HTML_PARSER wymusza wybrany).
+Tryb zgodności parsuje zapisane strony wszystkimi parserami i porównuje
+wyciągnięte dane JSON z wynikiem dotychczasowego parsera (html.parser).
+
+Ekstraktory czytają tylko #main-content i sekcję recenzji, dlatego przed
+parsowaniem te regiony są wyszukiwane w surowym HTML, a skrypty, iframy i SVG
+są z nich wycinane - drzewo jest budowane tylko dla potrzebnych fragmentów.
+
+Użycie:
+    python html_parser.py conformance [plik.html ...]   - porównanie parserów na zapisanych stronach
+"""
+
+import json
+import os
+import re
+import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, FeatureNotFound
+
+
+# Kolejność preferencji: pierwszy dostępny jest domyślny
+PARSER_BACKENDS = ("lxml", "html.parser")
+
+# Parser, z którym porównywane są pozostałe w trybie zgodności
+REFERENCE_PARSER = "html.parser"
+
+# Zapisane strony do trybu zgodności (pełna strona perfum i fragmenty)
+SAMPLE_FILES = ("index.html", "example.html", "reminad.html")
+SAMPLE_URL = "https://www.fragrantica.com/perfume/Sample/Sample-1.html"
+
+# Regiony strony czytane przez ekstraktory (na stronie perfum #all-reviews jest w #main-content)
+CONTENT_REGION_IDS = ("main-content", "all-reviews")
+
+# Elementy wycinane przed parsowaniem regionów (ekstraktory i tak je usuwają)
+DROPPED_TAGS = ("script", "iframe", "svg")
+
+# Elementy bez znacznika zamykającego
+VOID_TAGS = frozenset((
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr",
+))
+
+# Atrybuty znacznika (wartości w cudzysłowach mogą zawierać ">")
+_ATTRS = r"""((?:[^>"']|"[^"]*"|'[^']*')*)"""
+
+# Komentarze i treść skryptów/stylów nie są przeszukiwane w poszukiwaniu znaczników
+_SKIPPED = r"<!--.*?-->|<(script|style)\b[^>]*>.*?</\1\s*>"
+
+_DROP_PATTERN = re.compile(
+    r"<!--.*?-->|<(script|iframe|style)\b[^>]*>.*?</\1\s*>|<(/?)svg\b" + _ATTRS + ">",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+@lru_cache(maxsize=None)
+def _is_available(parser: str) -> bool:
+    try:
+        BeautifulSoup("<p></p>", parser)
+    except FeatureNotFound:
+        return False
+    return True
+
+
+def available_parsers() -> List[str]:
+    """Zwraca zainstalowane parsery w kolejności preferencji."""
+    return [parser for parser in PARSER_BACKENDS if _is_available(parser)]
+
+
+def resolve_parser(parser: Optional[str] = None) -> str:
+    """Zwraca parser do użycia: podany, z HTML_PARSER lub pierwszy dostępny z PARSER_BACKENDS."""
+    parser = parser or os.getenv("HTML_PARSER")
+    if not parser:
+        return available_parsers()[0]
+    if parser not in PARSER_BACKENDS:
+        raise ValueError(f"Nieznany parser HTML: {parser} (dostępne: {', '.join(PARSER_BACKENDS)})")
+    if not _is_available(parser):
+        raise ValueError(f"Parser HTML {parser} nie jest zainstalowany")
+    return parser
+
+
+def make_soup(html, parser: Optional[str] = None) -> BeautifulSoup:
+    """Parsuje HTML wybranym parserem (domyślnie najszybszym dostępnym)."""
+    return BeautifulSoup(html, resolve_parser(parser))
+
+
+@lru_cache(maxsize=None)
+def _tag_pattern(tag: str):
+    return re.compile(_SKIPPED + r"|<(/?)" + re.escape(tag) + r"\b" + _ATTRS + ">", re.IGNORECASE | re.DOTALL)
+
+
+def locate_element(html: str, element_id: str) -> Optional[Tuple[int, int]]:
+    """Zwraca zakres (początek, koniec) elementu o podanym id w surowym HTML lub None.
+
+    Element kończy się na pasującym znaczniku zamykającym (zagnieżdżenia tego samego
+    znacznika są liczone, komentarze i skrypty pomijane) lub na końcu dokumentu.
+    """
+    # Atrybut id poprzedzony białym znakiem (\b dopasowałoby też data-id= i aria-id=)
+    match = re.search(
+        r"<([a-zA-Z][\w-]*)\b[^>]*?\sid\s*=\s*[\"']?" + re.escape(element_id) + r"[\"'\s/>]", html
+    )
+    if not match:
+        return None
+    tag = match.group(1).lower()
+    tag_end = html.find(">", match.end() - 1) + 1
+    if tag in VOID_TAGS:
+        return match.start(), tag_end
+
+    depth = 1
+    for token in _tag_pattern(tag).finditer(html, tag_end):
+        if token.group(2) is None:
+            continue  # komentarz, skrypt lub styl
+        if token.group(2):
+            depth -= 1
+            if depth == 0:
+                return match.start(), token.end()
+        elif not token.group(3).rstrip().endswith("/"):
+            depth += 1
+    return match.start(), len(html)
+
+
+def strip_dropped_elements(html: str) -> str:
+    """Wycina z HTML skrypty, iframy i SVG (razem z zawartością) przed tokenizacją."""
+    pieces = []
+    position = 0
+    svg_start = None
+    svg_depth = 0
+    for token in _DROP_PATTERN.finditer(html):
+        closing, attrs = token.group(2), token.group(3)
+        if closing is None:
+            if token.group(1) and token.group(1).lower() != "style" and svg_depth == 0:
+                # Skrypt lub iframe z zawartością
+                pieces.append(html[position:token.start()])
+                position = token.end()
+            continue
+        if closing:
+            if svg_depth == 0:
+                continue  # zamknięcie bez otwarcia - zostawiamy parserowi
+            svg_depth -= 1
+        elif attrs.rstrip().endswith("/"):
+            if svg_depth == 0:
+                pieces.append(html[position:token.start()])
+                position = token.end()
+            continue
+        else:
+            if svg_depth == 0:
+                svg_start = token.start()
+            svg_depth += 1
+        if svg_depth == 0:
+            pieces.append(html[position:svg_start])
+            position = token.end()
+    if svg_depth:
+        # Niezamknięte SVG - parser i tak objąłby nim resztę dokumentu
+        pieces.append(html[position:svg_start])
+        position = len(html)
+    pieces.append(html[position:])
+    return "".join(pieces)
+
+
+def make_region_soup(
+    html: str, region_ids: Tuple[str, ...] = CONTENT_REGION_IDS, parser: Optional[str] = None
+) -> Optional[BeautifulSoup]:
+    """Parsuje tylko regiony strony o podanych id (bez skryptów, iframów i SVG).
+
+    Zwraca None gdy pierwszego regionu nie ma w HTML - wtedy potrzebny jest cały dokument.
+    Regiony zawarte w innych regionach nie są dodawane ponownie.
+    """
+    spans = []
+    for index, element_id in enumerate(region_ids):
+        span = locate_element(html, element_id)
+        if span is None:
+            if index == 0:
+                return None
+            continue
+        if not any(start <= span[0] and span[1] <= end for start, end in spans):
+            spans = [(start, end) for start, end in spans if not (span[0] <= start and end <= span[1])]
+            spans.append(span)
+    fragment = "".join(strip_dropped_elements(html[start:end]) for start, end in sorted(spans))
+    return make_soup(f"<html><body>{fragment}</body></html>", parser)
+
+
+def diff_json(expected: Any, actual: Any, path: str = "$") -> List[str]:
+    """Zwraca różnice między dwiema strukturami JSON jako listę "ścieżka: oczekiwane != otrzymane"."""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        diffs = []
+        for key in list(expected) + [key for key in actual if key not in expected]:
+            if key not in actual:
+                diffs.append(f"{path}.{key}: brak klucza")
+            elif key not in expected:
+                diffs.append(f"{path}.{key}: nadmiarowy klucz")
+            else:
+                diffs.extend(diff_json(expected[key], actual[key], f"{path}.{key}"))
+        return diffs
+    if isinstance(expected, list) and isinstance(actual, list):
+        diffs = [
+            diff
+            for index, (a, b) in enumerate(zip(expected, actual))
+            for diff in diff_json(a, b, f"{path}[{index}]")
+        ]
+        if len(expected) != len(actual):
+            diffs.append(f"{path}: długość {len(expected)} != {len(actual)}")
+        return diffs
+    if expected != actual:
+        expected_text = json.dumps(expected, ensure_ascii=False)[:80]
+        actual_text = json.dumps(actual, ensure_ascii=False)[:80]
+        return [f"{path}: {expected_text} != {actual_text}"]
+    return []
+
+
+def extract_sample(html: str, url: str, parser: str) -> Dict[str, Any]:
+    """Wyciąga dane z zapisanej strony tą samą ścieżką co scraper (fragmenty bez #main-content - fallback)."""
+    from scraper import parse_perfume_page
+
+    return parse_perfume_page(html, url, parser=parser)
+
+
+def run_conformance(
+    files: Iterable[Path], parsers: Optional[List[str]] = None, url: str = SAMPLE_URL
+) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Parsuje zapisane strony każdym parserem i porównuje dane z parserem referencyjnym.
+
+    Zwraca {plik: {parser: {"seconds": czas, "diffs": [różnice]}}}.
+    """
+    parsers = parsers or available_parsers()
+    report = {}
+    for path in files:
+        with open(path, "r", encoding="utf-8") as f:
+            html = f.read()
+        results = {}
+        for parser in [REFERENCE_PARSER] + [p for p in parsers if p != REFERENCE_PARSER]:
+            start_time = time.time()
+            data = extract_sample(html, url, parser)
+            # Porównanie w postaci JSON (tak jak dane trafiają do plików wynikowych)
+            results[parser] = (json.loads(json.dumps(data, ensure_ascii=False)), time.time() - start_time)
+        reference = results[REFERENCE_PARSER][0]
+        report[str(path)] = {
+            parser: {"seconds": round(seconds, 3), "diffs": diff_json(reference, data)}
+            for parser, (data, seconds) in results.items()
+        }
+    return report
+
+
+def main():
+    """Narzędzie wiersza poleceń parserów HTML."""
+    if len(sys.argv) < 2 or sys.argv[1] != "conformance":
+        print(__doc__)
+        sys.exit(1)
+
+    files = [Path(arg) for arg in sys.argv[2:]] or [Path(name) for name in SAMPLE_FILES if Path(name).exists()]
+    report = run_conformance(files)
+    failed = False
+    for path, results in report.items():
+        for parser, result in results.items():
+            status = "✓" if not result["diffs"] else "✗"
+            print(f"{status} {path} [{parser}]: {result['seconds']}s, różnic: {len(result['diffs'])}")
+            for diff in result["diffs"][:20]:
+                print(f"    {diff}")
+            failed = failed or bool(result["diffs"])
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
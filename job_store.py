@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Moduł z trwałym magazynem zadań crawlowania (SQLite).
+Jeden wiersz na URL: status, liczba prób, ostatni błąd, znaczniki czasu,
+ścieżka pliku wynikowego i hash treści strony. Zmiany statusów są buforowane
+i zapisywane partiami w jednej transakcji, więc zakończenie zadania nie wymaga
+przepisywania całej listy linków. Magazyn importuje (strumieniowo, z kanonizacją
+i deduplikacją po ID perfum) i eksportuje format all-links.json.
+Przy pracy na kilku maszynach (wspólna baza) workery pobierają partie zadań
+z czasową dzierżawą (lease_batch), przedłużaną sygnałem życia (renew_leases);
+zadania z wygasłą dzierżawą trafiają do kolejnego workera. Baza na wspólnym
+wolumenie (shared=True lub JOB_STORE_SHARED=1) używa dziennika DELETE zamiast
+WAL - indeks WAL (-shm) wymaga pamięci współdzielonej jednej maszyny i na
+sieciowym systemie plików grozi uszkodzeniem bazy.
+
+Użycie:
+    python job_store.py import [all-links.json]   - dodaje linki do magazynu
+    python job_store.py export [all-links.json]   - zapisuje linki do przetworzenia
+    python job_store.py stats                     - liczba zadań per status
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from link_ingest import LinkIngestor, PerfumeIdSet, perfume_id_from_url
+
+
+DEFAULT_JOB_STORE_PATH = "jobs.sqlite3"
+
+STATUS_PENDING = "pending"
+STATUS_IN_PROGRESS = "in_progress"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    url TEXT PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    output_path TEXT,
+    content_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status);
+"""
+
+# Kolumny dodane później (bazy z poprzednich wersji są uzupełniane przy otwarciu)
+MIGRATION_COLUMNS = (
+    ("rating_count", "INTEGER"),
+    ("vote_total", "INTEGER"),
+    ("crawled_at", "REAL"),
+    ("next_due_at", "REAL"),
+    ("lease_owner", "TEXT"),
+    ("lease_expires_at", "REAL"),
+)
+
+
+class JobStore:
+    """Magazyn zadań w SQLite z buforowanymi (partiami) aktualizacjami."""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_JOB_STORE_PATH,
+        batch_size: int = 50,
+        flush_interval: float = 5.0,
+        shared: Optional[bool] = None,
+    ):
+        """
+        Inicjalizuje JobStore.
+
+        Args:
+            path: Ścieżka pliku bazy SQLite
+            batch_size: Po ilu buforowanych zmianach zapisywać je w transakcji
+            flush_interval: Maksymalny czas (s) przechowywania zmian w buforze
+            shared: Czy baza jest na wspólnym (sieciowym) wolumenie kilku maszyn
+                (domyślnie z JOB_STORE_SHARED=1)
+        """
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.shared = shared if shared is not None else os.getenv("JOB_STORE_SHARED") == "1"
+        # Przy kilku workerach na wspólnej bazie zapis czeka na zwolnienie blokady zamiast błędu
+        self.conn = sqlite3.connect(str(self.path), timeout=30.0)
+        if self.shared:
+            # Wspólny wolumen: dziennik DELETE (blokady plikowe, bez indeksu -shm w pamięci współdzielonej)
+            self.conn.execute("PRAGMA journal_mode=DELETE")
+            self.conn.execute("PRAGMA synchronous=FULL")
+        else:
+            # WAL - odczyty nie blokują zapisu, a przerwany zapis nie psuje bazy
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+        self.conn.commit()
+        self._pending_updates: List[Tuple[str, tuple]] = []
+        # Liczniki z record_snapshot jeszcze w buforze (odczyt snapshot() bez zapisu bufora)
+        self._pending_snapshots: Dict[str, Tuple[Optional[int], Optional[int], float]] = {}
+        self._last_flush = time.time()
+
+    def _migrate(self) -> None:
+        """Dodaje brakujące kolumny do tabeli zadań."""
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+        for name, column_type in MIGRATION_COLUMNS:
+            if name not in existing:
+                self.conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {column_type}")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_next_due ON jobs (next_due_at)")
+
+    def import_links(self, urls: Iterable[str], chunk_size: int = 1000) -> int:
+        """Dodaje linki jako zadania oczekujące (istniejące zadania są pomijane). Zwraca liczbę nowych.
+
+        Linki są zapisywane partiami, więc mogą pochodzić ze strumienia (bez listy w pamięci).
+        """
+        before = self.conn.total_changes
+        rows = []
+        for url in urls:
+            if url and url.strip():
+                now = time.time()
+                rows.append((url.strip(), now, now))
+            if len(rows) >= chunk_size:
+                self._insert_links(rows)
+                rows = []
+        if rows:
+            self._insert_links(rows)
+        return self.conn.total_changes - before
+
+    def _insert_links(self, rows: List[tuple]) -> None:
+        """Wstawia partię nowych zadań w jednej transakcji."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO jobs (url, created_at, updated_at) VALUES (?, ?, ?)",
+                rows,
+            )
+
+    def known_perfume_ids(self) -> PerfumeIdSet:
+        """Zwraca zbiór ID perfum wszystkich zadań w magazynie."""
+        seen = PerfumeIdSet()
+        for (url,) in self.conn.execute("SELECT url FROM jobs"):
+            perfume_id = perfume_id_from_url(url)
+            if perfume_id:
+                seen.add(perfume_id)
+        return seen
+
+    def import_json(self, path: Path, ingestor: Optional[LinkIngestor] = None) -> int:
+        """Importuje linki z pliku (all-links.json, links.json lub tekstowego) strumieniowo.
+
+        Linki są kanonizowane, a perfumy już obecne w magazynie (pod dowolnym wariantem URL)
+        są pomijane.
+
+        Args:
+            path: Ścieżka pliku z linkami
+            ingestor: Opcjonalny LinkIngestor (np. aby odczytać liczniki odrzuconych linków)
+        """
+        if ingestor is None:
+            ingestor = LinkIngestor()
+        ingestor.seen = self.known_perfume_ids()
+        return self.import_links(ingestor.ingest_file(path))
+
+    def export_json(self, path: Path, statuses: Tuple[str, ...] = (STATUS_PENDING, STATUS_FAILED)) -> int:
+        """Zapisuje linki o podanych statusach w formacie all-links.json (atomowo). Zwraca ich liczbę."""
+        self.flush()
+        placeholders = ",".join("?" for _ in statuses)
+        links = [
+            row[0]
+            for row in self.conn.execute(
+                f"SELECT url FROM jobs WHERE status IN ({placeholders}) ORDER BY rowid", statuses
+            )
+        ]
+        path = Path(path)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"links": links}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return len(links)
+
+    def reset_in_progress(self) -> int:
+        """Przywraca zadania przerwane w poprzednim przebiegu do stanu oczekującego."""
+        with self.conn:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = ?, lease_owner = NULL, lease_expires_at = NULL, updated_at = ? "
+                "WHERE status = ?",
+                (STATUS_PENDING, time.time(), STATUS_IN_PROGRESS),
+            )
+        return cursor.rowcount
+
+    def pending_urls(self, max_attempts: int = 3) -> List[str]:
+        """Zwraca URL do przetworzenia (oczekujące i nieudane z limitem prób) w kolejności importu."""
+        self.flush()
+        return [
+            row[0]
+            for row in self.conn.execute(
+                "SELECT url FROM jobs WHERE status IN (?, ?) AND attempts < ? ORDER BY rowid",
+                (STATUS_PENDING, STATUS_FAILED, max_attempts),
+            )
+        ]
+
+    def _queue_update(self, sql: str, params: tuple) -> None:
+        """Buforuje zmianę i zapisuje bufor gdy jest pełny lub minął czas flush_interval."""
+        self._pending_updates.append((sql, params))
+        if len(self._pending_updates) >= self.batch_size or time.time() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def mark_started(self, url: str, owner: Optional[str] = None) -> None:
+        """Oznacza zadanie jako rozpoczęte (zwiększa licznik prób, owner - jak w mark_done)."""
+        now = time.time()
+        where, params = self._owner_filter(url, owner)
+        self._queue_update(
+            "UPDATE jobs SET status = ?, attempts = attempts + 1, started_at = ?, updated_at = ? " + where,
+            (STATUS_IN_PROGRESS, now, now) + params,
+        )
+
+    @staticmethod
+    def _owner_filter(url: str, owner: Optional[str]) -> Tuple[str, tuple]:
+        """Warunek WHERE zadania (z owner - tylko gdy zadanie jest nadal dzierżawione przez tego workera)."""
+        if owner is None:
+            return "WHERE url = ?", (url,)
+        return "WHERE url = ? AND lease_owner = ?", (url, owner)
+
+    def mark_done(
+        self,
+        url: str,
+        output_path: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        owner: Optional[str] = None,
+    ) -> None:
+        """Oznacza zadanie jako zakończone sukcesem.
+
+        Z owner (worker z dzierżawą) zmiana jest pomijana, gdy dzierżawa wygasła i zadanie
+        przejął inny worker.
+        """
+        now = time.time()
+        where, params = self._owner_filter(url, owner)
+        self._queue_update(
+            "UPDATE jobs SET status = ?, last_error = NULL, finished_at = ?, updated_at = ?, "
+            "output_path = ?, content_hash = ?, lease_owner = NULL, lease_expires_at = NULL " + where,
+            (STATUS_DONE, now, now, output_path, content_hash) + params,
+        )
+
+    def mark_failed(self, url: str, error: Optional[str] = None, owner: Optional[str] = None) -> None:
+        """Oznacza zadanie jako nieudane i zapisuje ostatni błąd (owner - jak w mark_done)."""
+        now = time.time()
+        where, params = self._owner_filter(url, owner)
+        self._queue_update(
+            "UPDATE jobs SET status = ?, last_error = ?, finished_at = ?, updated_at = ?, "
+            "lease_owner = NULL, lease_expires_at = NULL " + where,
+            (STATUS_FAILED, error, now, now) + params,
+        )
+
+    def lease_batch(self, owner: str, size: int, lease_seconds: float, max_attempts: int = 3) -> List[str]:
+        """Dzierżawi partię zadań dla workera i zwraca ich URL w kolejności importu.
+
+        Dzierżawione są zadania oczekujące, nieudane z limitem prób oraz rozpoczęte,
+        których dzierżawa wygasła (worker przestał wysyłać sygnał życia).
+
+        Args:
+            owner: Identyfikator workera
+            size: Maksymalna liczba zadań w partii
+            lease_seconds: Czas dzierżawy (s)
+            max_attempts: Limit prób zadania
+        """
+        self.flush()
+        now = time.time()
+        # BEGIN IMMEDIATE - wybór i przejęcie zadań w jednej transakcji zapisu (bez wyścigu między workerami)
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            urls = [
+                row[0]
+                for row in self.conn.execute(
+                    "SELECT url FROM jobs WHERE attempts < ? AND (status IN (?, ?) OR "
+                    "(status = ? AND (lease_expires_at IS NULL OR lease_expires_at < ?))) ORDER BY rowid LIMIT ?",
+                    (max_attempts, STATUS_PENDING, STATUS_FAILED, STATUS_IN_PROGRESS, now, size),
+                )
+            ]
+            self.conn.executemany(
+                "UPDATE jobs SET status = ?, lease_owner = ?, lease_expires_at = ?, updated_at = ? WHERE url = ?",
+                [(STATUS_IN_PROGRESS, owner, now + lease_seconds, now, url) for url in urls],
+            )
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        return urls
+
+    def renew_leases(self, owner: str, lease_seconds: float) -> int:
+        """Przedłuża dzierżawy niezakończonych zadań workera (sygnał życia). Zwraca ich liczbę."""
+        self.flush()
+        now = time.time()
+        with self.conn:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE lease_owner = ? AND status = ?",
+                (now + lease_seconds, owner, STATUS_IN_PROGRESS),
+            )
+        return cursor.rowcount
+
+    def release_leases(self, owner: str) -> int:
+        """Zwalnia niezakończone zadania workera (powrót do kolejki). Zwraca ich liczbę."""
+        self.flush()
+        with self.conn:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = ?, lease_owner = NULL, lease_expires_at = NULL, updated_at = ? "
+                "WHERE lease_owner = ? AND status = ?",
+                (STATUS_PENDING, time.time(), owner, STATUS_IN_PROGRESS),
+            )
+        return cursor.rowcount
+
+    def record_snapshot(self, url: str, rating_count: Optional[int], vote_total: Optional[int],
+                        crawled_at: float, next_due_at: float) -> None:
+        """Zapisuje liczniki z ostatniego pobrania i termin kolejnego (harmonogram odświeżania)."""
+        self._pending_snapshots[url] = (rating_count, vote_total, crawled_at)
+        self._queue_update(
+            "UPDATE jobs SET rating_count = ?, vote_total = ?, crawled_at = ?, next_due_at = ?, updated_at = ? "
+            "WHERE url = ?",
+            (rating_count, vote_total, crawled_at, next_due_at, time.time(), url),
+        )
+
+    def snapshot(self, url: str) -> Optional[Tuple[Optional[int], Optional[int], Optional[float]]]:
+        """Zwraca liczniki ostatniego pobrania (rating_count, vote_total, crawled_at) lub None.
+
+        W przeciwieństwie do get() nie zapisuje bufora - zmiany nadal trafiają do bazy partiami.
+        """
+        if url in self._pending_snapshots:
+            return self._pending_snapshots[url]
+        row = self.conn.execute(
+            "SELECT rating_count, vote_total, crawled_at FROM jobs WHERE url = ?", (url,)
+        ).fetchone()
+        return tuple(row) if row else None
+
+    def flush(self) -> None:
+        """Zapisuje buforowane zmiany w jednej transakcji."""
+        self._last_flush = time.time()
+        if not self._pending_updates:
+            return
+        updates = self._pending_updates
+        self._pending_updates = []
+        self._pending_snapshots = {}
+        with self.conn:
+            for sql, params in updates:
+                self.conn.execute(sql, params)
+
+    def get(self, url: str) -> Optional[Dict[str, object]]:
+        """Zwraca wiersz zadania jako słownik lub None."""
+        self.flush()
+        cursor = self.conn.execute("SELECT * FROM jobs WHERE url = ?", (url,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([column[0] for column in cursor.description], row))
+
+    def counts(self) -> Dict[str, int]:
+        """Zwraca liczbę zadań per status."""
+        self.flush()
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+
+    def close(self) -> None:
+        """Zapisuje bufor i zamyka bazę."""
+        self.flush()
+        self.conn.close()
+
+
+def main():
+    """Narzędzie wiersza poleceń magazynu zadań."""
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    command = sys.argv[1]
+    store = JobStore(os.getenv("JOB_STORE_PATH", DEFAULT_JOB_STORE_PATH))
+    links_file = Path(sys.argv[2] if len(sys.argv) > 2 else "all-links.json")
+
+    try:
+        if command == "import":
+            ingestor = LinkIngestor()
+            added = store.import_json(links_file, ingestor)
+            print(f"📥 Dodano {added} nowych linków z {links_file} "
+                  f"(duplikaty: {ingestor.counts['duplicates']}, niepoprawne: {ingestor.counts['invalid']})")
+        elif command == "export":
+            exported = store.export_json(links_file)
+            print(f"📤 Zapisano {exported} linków do przetworzenia w {links_file}")
+        elif command == "stats":
+            print(json.dumps(store.counts(), indent=2))
+        else:
+            print(__doc__)
+            sys.exit(1)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Moduł do strumieniowego wczytywania linków do perfum.
+Pliki z linkami (all-links.json, links.json lub pliki tekstowe z jednym URL
+w linii) są czytane fragmentami, bez wczytywania całego pliku do pamięci.
+Każdy link jest sprowadzany do postaci kanonicznej (host, wariant językowy
+ścieżki /perfumy/ -> /perfume/, bez fragmentu i parametrów), a duplikaty są
+odrzucane po ID perfum przy użyciu zwartej mapy bitowej.
+Zbiór linków można podzielić na N rozłącznych części (shardów) według
+stabilnego hasha ID perfum - niezależne instancje crawlera (--shard i/N)
+przetwarzają wtedy różne perfumy bez koordynacji.
+"""
+
+import json
+import re
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+
+
+CANONICAL_HOST = "www.fragrantica.com"
+
+# Hosty serwisu (wersje językowe i bez www) sprowadzane do CANONICAL_HOST
+FRAGRANTICA_HOSTS = ("fragrantica.com", "fragrantica.pl")
+
+# Warianty językowe pierwszego segmentu ścieżki strony perfum
+PERFUME_PATH_VARIANTS = ("perfume", "perfumy")
+
+# /perfume/Marka/Nazwa-ID.html
+PERFUME_PATH_PATTERN = re.compile(r"^/([^/]+)/([^/]+)/([^/]+-(\d+)\.html)$")
+
+# Łańcuch znaków JSON (do strumieniowego czytania plików .json)
+JSON_STRING_PATTERN = re.compile(r'"((?:[^"\\]|\\.)*)"')
+
+
+def perfume_id_from_url(url: str) -> Optional[str]:
+    """Zwraca ID perfum z URL (np. .../Black-Sea-69652.html -> "69652") lub None."""
+    match = re.search(r"-(\d+)\.html", url)
+    return match.group(1) if match else None
+
+
+def canonicalize_url(url: str) -> Optional[str]:
+    """Zwraca kanoniczny URL strony perfum lub None gdy link nie prowadzi do strony perfum.
+
+    Przykład: "http://fragrantica.pl/perfumy/Chanel/No-5-40069.html#all-reviews"
+        -> "https://www.fragrantica.com/perfume/Chanel/No-5-40069.html"
+    """
+    url = (url or "").strip()
+    if not url:
+        return None
+    if "://" not in url:
+        url = "https://" + url
+
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    if not any(host == h or host.endswith("." + h) for h in FRAGRANTICA_HOSTS):
+        return None
+
+    match = PERFUME_PATH_PATTERN.match(parsed.path)
+    if not match or match.group(1).lower() not in PERFUME_PATH_VARIANTS:
+        return None
+
+    return f"https://{CANONICAL_HOST}/perfume/{match.group(2)}/{match.group(3)}"
+
+
+def parse_shard_spec(spec: str) -> Tuple[int, int]:
+    """Zamienia specyfikację shardu "i/N" (0 <= i < N) na krotkę (i, N)."""
+    match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", spec or "")
+    if not match:
+        raise ValueError(f"Niepoprawny shard: {spec!r} (oczekiwano i/N, np. 0/4)")
+    index, count = int(match.group(1)), int(match.group(2))
+    if count < 1 or index >= count:
+        raise ValueError(f"Niepoprawny shard: {spec!r} (numer shardu musi być z zakresu 0..{max(count, 1) - 1})")
+    return index, count
+
+
+def shard_of(perfume_id, count: int) -> int:
+    """Zwraca numer shardu ID perfum (CRC32 - stały między procesami i maszynami, w przeciwieństwie do hash())."""
+    return zlib.crc32(str(int(perfume_id)).encode("ascii")) % count
+
+
+def shard_tag(shard: Tuple[int, int]) -> str:
+    """Zwraca oznaczenie shardu do nazw plików i katalogów (np. "shard-0-of-4")."""
+    return f"shard-{shard[0]}-of-{shard[1]}"
+
+
+class PerfumeIdSet:
+    """Zwarty zbiór ID perfum (mapa bitowa - 1 bit na ID, ok. 125 KB na milion ID)."""
+
+    def __init__(self):
+        self._bits = bytearray()
+        self._count = 0
+
+    def add(self, perfume_id) -> bool:
+        """Dodaje ID. Zwraca True gdy ID było nowe, False gdy już było w zbiorze."""
+        value = int(perfume_id)
+        byte_index, bit = divmod(value, 8)
+        if byte_index >= len(self._bits):
+            # Rośnij co najmniej dwukrotnie, aby uniknąć częstego kopiowania
+            self._bits.extend(bytes(max(byte_index + 1 - len(self._bits), len(self._bits))))
+        mask = 1 << bit
+        if self._bits[byte_index] & mask:
+            return False
+        self._bits[byte_index] |= mask
+        self._count += 1
+        return True
+
+    def __contains__(self, perfume_id) -> bool:
+        value = int(perfume_id)
+        byte_index, bit = divmod(value, 8)
+        return byte_index < len(self._bits) and bool(self._bits[byte_index] & (1 << bit))
+
+    def __len__(self) -> int:
+        return self._count
+
+
+def iter_raw_links(path: Path, chunk_size: int = 1 << 16) -> Iterator[str]:
+    """Czyta linki z pliku fragmentami.
+
+    Pliki .json (np. {"links": [...]} lub lista) są skanowane w poszukiwaniu łańcuchów
+    znaków wyglądających jak URL, pozostałe pliki są czytane linia po linii.
+    """
+    path = Path(path)
+    if path.suffix.lower() != ".json":
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield line
+        return
+
+    buffer = ""
+    with open(path, "r", encoding="utf-8") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            buffer += chunk
+            last_end = 0
+            for match in JSON_STRING_PATTERN.finditer(buffer):
+                # Łańcuch może być ucięty na końcu fragmentu - dokończ go z następnym fragmentem
+                if chunk and match.end() == len(buffer):
+                    break
+                last_end = match.end()
+                value = json.loads(match.group(0))
+                if "/" in value:
+                    yield value
+            if not chunk:
+                return
+            # Zostaw w buforze tylko nieprzetworzoną końcówkę (od ostatniego cudzysłowu otwierającego)
+            rest = buffer[last_end:]
+            quote = rest.find('"')
+            buffer = rest[quote:] if quote != -1 else ""
+
+
+class LinkIngestor:
+    """Kanonizuje i deduplikuje linki po ID perfum, zliczając odrzucone."""
+
+    def __init__(self, seen: Optional[PerfumeIdSet] = None, shard: Optional[Tuple[int, int]] = None):
+        """
+        Inicjalizuje LinkIngestor.
+
+        Args:
+            seen: Zbiór ID perfum już znanych (np. z magazynu zadań) - ich linki są pomijane
+            shard: Opcjonalny shard (i, N) - przyjmowane są tylko perfumy z tego shardu
+        """
+        self.seen = seen if seen is not None else PerfumeIdSet()
+        self.shard = shard
+        self.counts: Dict[str, int] = {"accepted": 0, "invalid": 0, "duplicates": 0, "otherShard": 0}
+
+    def ingest(self, urls: Iterable[str]) -> Iterator[str]:
+        """Zwraca kanoniczne URL perfum, których ID nie pojawiło się wcześniej."""
+        for url in urls:
+            canonical = canonicalize_url(url)
+            if canonical is None:
+                self.counts["invalid"] += 1
+                continue
+            perfume_id = perfume_id_from_url(canonical)
+            if self.shard is not None and shard_of(perfume_id, self.shard[1]) != self.shard[0]:
+                self.counts["otherShard"] += 1
+                continue
+            if not self.seen.add(perfume_id):
+                self.counts["duplicates"] += 1
+                continue
+            self.counts["accepted"] += 1
+            yield canonical
+
+    def ingest_file(self, path: Path) -> Iterator[str]:
+        """Strumieniowo czyta plik z linkami i zwraca nowe kanoniczne URL."""
+        return self.ingest(iter_raw_links(path))
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Moduł z ujściami wyników scrapowania (gdzie trafiają dane perfum).
+JsonFileSink - dotychczasowy format: osobny plik JSON (indent=2) na perfumy,
+nazwany od nazwy perfum i marki.
+JsonlShardSink - pliki JSON Lines (jeden rekord na linię) dzielone na shardy
+według liczby rekordów lub rozmiaru. Rekordy są zapisywane partiami z fsync
+po każdej partii, a shard trafia pod docelową nazwę (atomowa zmiana nazwy
+pliku tymczasowego) dopiero gdy jest kompletny. Zadanie można oznaczyć jako
+zakończone dopiero gdy jego rekord jest trwale zapisany - pop_committed()
+zwraca takie rekordy.
+
+Użycie:
+    python output_sink.py recover [katalog]   - domyka shardy przerwanego przebiegu
+"""
+
+import abc
+import json
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+
+SHARD_PATTERN = re.compile(r"^(?P<prefix>.+)-(?P<number>\d{6})\.jsonl$")
+# Katalogi wyników shardów linków (link_ingest.shard_tag, np. output/shard-0-of-4)
+SHARD_DIR_PATTERN = re.compile(r"^shard-\d+-of-\d+$")
+
+# (url, lokalizacja rekordu, dane) - rekord trwale zapisany
+CommittedRecord = Tuple[str, str, Dict[str, Any]]
+
+
+def generate_filename_from_url(url: str) -> str:
+    """Generuje nazwę pliku na podstawie URL."""
+    # Format URL: https://www.fragrantica.com/perfume/Brand/Name-ID.html (lub wariant /perfumy/)
+    match = re.search(r'/perfumy?/([^/]+)/(.+?)-(\d+)\.html', url)
+    if match:
+        brand = match.group(1).replace("-", "_")
+        name = match.group(2).replace("-", "_")
+        perfume_id = match.group(3)
+        # Usuń niebezpieczne znaki dla nazwy pliku
+        filename = f"{brand}_{name}_{perfume_id}.json"
+        # Zamień niebezpieczne znaki na podkreślniki
+        filename = re.sub(r'[^\w\-_.]', '_', filename)
+        return filename
+
+    # Fallback: użyj ostatniej części URL
+    parsed = urlparse(url)
+    path_parts = [p for p in parsed.path.split('/') if p]
+    if path_parts:
+        filename = "_".join(path_parts[-2:]) if len(path_parts) >= 2 else path_parts[-1]
+        filename = filename.replace('.html', '.json')
+        filename = re.sub(r'[^\w\-_.]', '_', filename)
+        return filename
+
+    # Ostateczny fallback
+    return "perfume.json"
+
+
+def generate_filename_from_perfume_name(perfume_name: str, brand: str = None) -> str:
+    """Generuje nazwę pliku na podstawie nazwy perfum i marki."""
+    if not perfume_name:
+        return None
+
+    # Normalizuj nazwę: usuń niebezpieczne znaki, zamień spacje na podkreślniki
+    name = perfume_name.strip()
+    name = re.sub(r'[^\w\s\-]', '', name)  # Usuń znaki specjalne
+    name = re.sub(r'\s+', '_', name)  # Zamień spacje na podkreślniki
+    name = name.lower()
+
+    if brand:
+        brand_normalized = brand.strip()
+        brand_normalized = re.sub(r'[^\w\s\-]', '', brand_normalized)
+        brand_normalized = re.sub(r'\s+', '_', brand_normalized)
+        brand_normalized = brand_normalized.lower()
+        filename = f"{brand_normalized}_{name}.json"
+    else:
+        filename = f"{name}.json"
+
+    # Skróć jeśli zbyt długie
+    if len(filename) > 200:
+        filename = filename[:200] + ".json"
+
+    return filename
+
+
+class OutputSink(abc.ABC):
+    """Bazowa klasa ujścia wyników. Metody są bezpieczne dla wątków (zapis w executorze)."""
+
+    name = "base"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._committed: List[CommittedRecord] = []
+        self.records = 0
+
+    @abc.abstractmethod
+    def write(self, url: str, data: Dict[str, Any]) -> str:
+        """Zapisuje dane perfum i zwraca lokalizację rekordu."""
+
+    def flush(self) -> None:
+        """Trwale zapisuje buforowane rekordy."""
+
+    def pop_committed(self) -> List[CommittedRecord]:
+        """Zwraca rekordy trwale zapisane od poprzedniego wywołania."""
+        with self._lock:
+            committed = self._committed
+            self._committed = []
+        return committed
+
+    def stats(self) -> Dict[str, object]:
+        """Zwraca statystyki ujścia."""
+        return {"sink": self.name, "records": self.records}
+
+    def close(self) -> None:
+        """Zapisuje bufor i zamyka ujście."""
+        self.flush()
+
+
+class JsonFileSink(OutputSink):
+    """Osobny plik JSON (indent=2) na każde perfumy - dotychczasowy format wyników."""
+
+    name = "files"
+
+    def __init__(self, output_dir: Path):
+        """
+        Inicjalizuje JsonFileSink.
+
+        Args:
+            output_dir: Katalog plików wynikowych
+        """
+        super().__init__()
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    def write(self, url: str, data: Dict[str, Any]) -> str:
+        """Zapisuje dane do pliku nazwanego od nazwy perfum i marki (lub URL) i zwraca jego ścieżkę."""
+        filename = generate_filename_from_perfume_name(data.get("perfumeName"), data.get("brand"))
+        if not filename:
+            filename = generate_filename_from_url(url)
+
+        output_path = self.output_dir / filename
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+        with self._lock:
+            self.records += 1
+            self._committed.append((url, str(output_path), data))
+        return str(output_path)
+
+
+class JsonlShardSink(OutputSink):
+    """Shardy JSON Lines z zapisem partiami, fsync po partii i atomową zmianą nazwy gotowego sharda."""
+
+    name = "jsonl"
+
+    def __init__(
+        self,
+        output_dir: Path,
+        prefix: str = "perfumes",
+        max_records: int = 5000,
+        max_bytes: int = 256 * 1024 * 1024,
+        batch_size: int = 100,
+        flush_interval: float = 10.0,
+    ):
+        """
+        Inicjalizuje JsonlShardSink.
+
+        Args:
+            output_dir: Katalog shardów
+            prefix: Prefiks nazw shardów (<prefix>-000001.jsonl)
+            max_records: Maksymalna liczba rekordów w shardzie
+            max_bytes: Maksymalny rozmiar sharda w bajtach
+            batch_size: Po ilu rekordach zapisywać partię (z fsync)
+            flush_interval: Maksymalny czas (s) przechowywania rekordów w buforze
+        """
+        super().__init__()
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.prefix = prefix
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # Shardy przerwanego przebiegu - domknij przed rozpoczęciem nowych
+        recover_shards(self.output_dir, self.prefix)
+        self._shard_number = self._last_shard_number()
+        self._shard_records = 0
+        self._shard_bytes = 0
+        self._file = None
+        self._buffer: List[Tuple[bytes, CommittedRecord]] = []
+        self._last_flush = time.time()
+        self.batches = 0
+        self.shards = 0
+        self.bytes_written = 0
+        self.fsync_seconds = 0.0
+
+    def _last_shard_number(self) -> int:
+        """Zwraca numer ostatniego sharda w katalogu (0 gdy brak)."""
+        numbers = [
+            int(match.group("number"))
+            for match in (SHARD_PATTERN.match(path.name) for path in self.output_dir.iterdir())
+            if match and match.group("prefix") == self.prefix
+        ]
+        return max(numbers, default=0)
+
+    def _shard_name(self) -> str:
+        return f"{self.prefix}-{self._shard_number:06d}.jsonl"
+
+    def _open_shard(self) -> None:
+        """Rozpoczyna nowy shard (plik tymczasowy do czasu domknięcia)."""
+        self._shard_number += 1
+        self._shard_records = 0
+        self._shard_bytes = 0
+        self._file = open(self.output_dir / f".{self._shard_name()}.tmp", "wb")
+
+    def _seal_shard(self) -> None:
+        """Domyka shard: fsync i atomowa zmiana nazwy na docelową."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        os.replace(self.output_dir / f".{self._shard_name()}.tmp", self.output_dir / self._shard_name())
+        self.shards += 1
+
+    def write(self, url: str, data: Dict[str, Any]) -> str:
+        """Buforuje rekord i zwraca jego lokalizację (<shard>:<numer linii>)."""
+        line = (json.dumps({"url": url, **data}, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            if self._file is None:
+                self._open_shard()
+            elif self._shard_records >= self.max_records or (
+                self._shard_records and self._shard_bytes + len(line) > self.max_bytes
+            ):
+                self._flush_locked()
+                self._seal_shard()
+                self._open_shard()
+            self._shard_records += 1
+            self._shard_bytes += len(line)
+            location = f"{self._shard_name()}:{self._shard_records}"
+            self._buffer.append((line, (url, location, data)))
+            self.records += 1
+            if len(self._buffer) >= self.batch_size or time.time() - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+        return location
+
+    def _flush_locked(self) -> None:
+        """Zapisuje partię rekordów jednym wywołaniem write i fsync (wywoływane z blokadą)."""
+        self._last_flush = time.time()
+        if not self._buffer:
+            return
+        batch = self._buffer
+        self._buffer = []
+        payload = b"".join(line for line, _ in batch)
+        self._file.write(payload)
+        self._file.flush()
+        start_time = time.time()
+        os.fsync(self._file.fileno())
+        self.fsync_seconds += time.time() - start_time
+        self.batches += 1
+        self.bytes_written += len(payload)
+        self._committed.extend(record for _, record in batch)
+
+    def flush(self) -> None:
+        """Trwale zapisuje buforowane rekordy."""
+        with self._lock:
+            self._flush_locked()
+
+    def stats(self) -> Dict[str, object]:
+        """Zwraca statystyki ujścia."""
+        return {
+            "sink": self.name,
+            "records": self.records,
+            "batches": self.batches,
+            "shards": self.shards + (1 if self._file is not None else 0),
+            "bytes": self.bytes_written,
+            "fsyncSeconds": round(self.fsync_seconds, 2),
+        }
+
+    def close(self) -> None:
+        """Zapisuje bufor i domyka bieżący shard."""
+        with self._lock:
+            if self._file is not None:
+                self._flush_locked()
+                self._seal_shard()
+
+
+def recover_shards(output_dir: Path, prefix: Optional[str] = None) -> List[Path]:
+    """Domyka shardy przerwanego przebiegu (pliki .tmp).
+
+    Zapisane partie są trwałe, więc plik jest obcinany do ostatniej pełnej linii
+    (ucięty rekord jest odrzucany) i przenoszony pod docelową nazwę.
+    Z prefix domykane są tylko shardy o tym prefiksie (shardy innych workerów
+    w tym samym katalogu mogą być w trakcie zapisu).
+    """
+    recovered = []
+    for tmp_path in sorted(Path(output_dir).glob(".*.jsonl.tmp")):
+        match = SHARD_PATTERN.match(tmp_path.name[1:-len(".tmp")])
+        if prefix is not None and (not match or match.group("prefix") != prefix):
+            continue
+        with open(tmp_path, "rb+") as f:
+            size = f.read().rfind(b"\n") + 1
+            f.truncate(size)
+            f.flush()
+            os.fsync(f.fileno())
+        if not size:
+            tmp_path.unlink()
+            continue
+        target = tmp_path.with_name(tmp_path.name[1:-len(".tmp")])
+        if target.exists():
+            raise FileExistsError(f"Shard {target} już istnieje")
+        os.replace(tmp_path, target)
+        recovered.append(target)
+    return recovered
+
+
+def iter_result_files(sources: Iterable[Path]) -> Iterator[Path]:
+    """Zwraca pliki wyników: shardy JSON Lines i pliki JSON z katalogów (także shard-i-of-N) oraz pliki podane wprost."""
+    for source in sources:
+        source = Path(source)
+        if not source.is_dir():
+            yield source
+            continue
+        for path in sorted(source.iterdir()):
+            if path.is_dir():
+                # Wyniki uruchomień z --shard leżą w podkatalogach shard-i-of-N
+                if SHARD_DIR_PATTERN.match(path.name):
+                    yield from iter_result_files([path])
+                continue
+            # W katalogu wyników jest też dziennik zadań (job-log.jsonl) - tylko shardy i pliki perfum
+            if SHARD_PATTERN.match(path.name) or (path.suffix == ".json" and not path.name.startswith(".")):
+                yield path
+
+
+def iter_results(sources: Iterable[Path]) -> Iterator[Dict[str, Any]]:
+    """Czyta wyniki scrapowania po jednym rekordzie (pliki .jsonl linia po linii)."""
+    for path in iter_result_files(sources):
+        if path.suffix == ".jsonl":
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+            if isinstance(record, dict):
+                yield record
+
+
+def create_sink(kind: str, output_dir: Path, **kwargs) -> OutputSink:
+    """Tworzy ujście wyników: "files" (plik JSON na perfumy) lub "jsonl" (shardy JSON Lines)."""
+    if kind == "files":
+        return JsonFileSink(output_dir)
+    if kind == "jsonl":
+        return JsonlShardSink(output_dir, **kwargs)
+    raise ValueError(f"Nieznany typ ujścia wyników: {kind}")
+
+
+def main():
+    """Narzędzie wiersza poleceń ujścia wyników."""
+    if len(sys.argv) < 2 or sys.argv[1] != "recover":
+        print(__doc__)
+        sys.exit(1)
+
+    output_dir = Path(sys.argv[2] if len(sys.argv) > 2 else "output")
+    recovered = recover_shards(output_dir)
+    print(f"🧩 Domknięto {len(recovered)} shardów w {output_dir}")
+    for path in recovered:
+        print(f"  - {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Moduł z archiwum surowych stron perfum (append-only).
+Strony są dopisywane jako rekordy skompresowane zstd do dużych plików segmentów,
+a indeks przesunięć (URL i ID perfum -> segment, offset, długość) pozwala odczytać
+dowolną stronę jednym odczytem z pliku mapowanego w pamięci (mmap). Odczyt
+sekwencyjny przechodzi po segmentach w kolejności zapisu, a kompaktowanie usuwa
+nieaktualne wersje stron.
+
+Układ katalogu:
+    page_archive/segment-000001.seg   - rekordy: nagłówek (magic, długości) + metadane JSON + HTML zstd
+    page_archive/index.jsonl          - indeks (jedna linia na rekord, późniejsza linia zastępuje wcześniejszą)
+
+Użycie:
+    python page_archive.py pack [katalog_cache]   - dopisuje strony z cache HTML do archiwum
+    python page_archive.py compact                - usuwa nieaktualne wersje stron
+    python page_archive.py stats                  - statystyki archiwum
+    python page_archive.py get <ID perfum lub URL> - wypisuje HTML strony
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+import zstandard
+
+from link_ingest import perfume_id_from_url
+
+
+DEFAULT_ARCHIVE_DIR = "page_archive"
+
+# Domyślny maksymalny rozmiar segmentu (256 MB)
+DEFAULT_MAX_SEGMENT_BYTES = 256 * 1024 * 1024
+
+RECORD_MAGIC = b"PFA1"
+# magic, długość metadanych JSON, długość skompresowanego HTML
+RECORD_HEADER = struct.Struct(">4sII")
+
+INDEX_FILE = "index.jsonl"
+
+
+def _segment_name(number: int) -> str:
+    """Nazwa pliku segmentu o danym numerze."""
+    return f"segment-{number:06d}.seg"
+
+
+class PageArchive:
+    """Archiwum stron w segmentach z indeksem po URL i ID perfum."""
+
+    def __init__(
+        self,
+        archive_dir: str = DEFAULT_ARCHIVE_DIR,
+        max_segment_bytes: int = DEFAULT_MAX_SEGMENT_BYTES,
+        compression_level: int = 10,
+    ):
+        """
+        Inicjalizuje PageArchive (wczytuje indeks, tworzy katalog jeśli nie istnieje).
+
+        Args:
+            archive_dir: Katalog archiwum
+            max_segment_bytes: Po przekroczeniu tego rozmiaru kolejne rekordy trafiają do nowego segmentu
+            compression_level: Poziom kompresji zstd
+        """
+        self.archive_dir = Path(archive_dir)
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        self.max_segment_bytes = max_segment_bytes
+        self._compressor = zstandard.ZstdCompressor(level=compression_level)
+        self._decompressor = zstandard.ZstdDecompressor()
+        # URL -> wpis indeksu najnowszej wersji strony
+        self.index: Dict[str, Dict[str, object]] = {}
+        # ID perfum -> URL najnowszej wersji strony
+        self.ids: Dict[str, str] = {}
+        self.record_count = 0
+        self._maps: Dict[int, Tuple[object, mmap.mmap]] = {}
+        # Aktywny segment i jego rozmiar (ustalane raz, potem aktualizowane przy dopisywaniu)
+        self._active_segment: Optional[int] = None
+        self._active_size = 0
+        self._load_index()
+
+    @property
+    def index_path(self) -> Path:
+        """Ścieżka pliku indeksu."""
+        return self.archive_dir / INDEX_FILE
+
+    def segment_path(self, number: int) -> Path:
+        """Ścieżka pliku segmentu."""
+        return self.archive_dir / _segment_name(number)
+
+    def segment_numbers(self) -> list:
+        """Numery istniejących segmentów (rosnąco)."""
+        numbers = []
+        for path in self.archive_dir.glob("segment-*.seg"):
+            try:
+                numbers.append(int(path.stem.split("-")[1]))
+            except (IndexError, ValueError):
+                continue
+        return sorted(numbers)
+
+    def _load_index(self) -> None:
+        """Wczytuje indeks. Przerwana ostatnia linia (bez znaku nowej linii) jest obcinana,
+        żeby następny dopisany wpis nie został z nią sklejony."""
+        if not self.index_path.exists():
+            return
+        complete_bytes = 0
+        with open(self.index_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                complete_bytes += len(line)
+                try:
+                    entry = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                self._add_to_index(entry)
+        if complete_bytes < self.index_path.stat().st_size:
+            with open(self.index_path, "r+b") as f:
+                f.truncate(complete_bytes)
+
+    def _add_to_index(self, entry: Dict[str, object]) -> None:
+        """Dodaje wpis do indeksu w pamięci (nowszy wpis zastępuje starszy)."""
+        self.record_count += 1
+        self.index[entry["url"]] = entry
+        if entry.get("id"):
+            self.ids[entry["id"]] = entry["url"]
+
+    def _current_segment(self, record_size: int) -> int:
+        """Zwraca numer segmentu, do którego trafi rekord o danym rozmiarze.
+
+        Katalog jest przeglądany tylko przy pierwszym zapisie - dalej rozmiar
+        aktywnego segmentu jest liczony w pamięci.
+        """
+        if self._active_segment is None:
+            numbers = self.segment_numbers()
+            self._active_segment = numbers[-1] if numbers else 1
+            path = self.segment_path(self._active_segment)
+            self._active_size = path.stat().st_size if path.exists() else 0
+        if self._active_size > 0 and self._active_size + record_size > self.max_segment_bytes:
+            self._active_segment += 1
+            self._active_size = 0
+        return self._active_segment
+
+    def _append_record(self, meta: Dict[str, object], payload: bytes) -> Dict[str, object]:
+        """Dopisuje rekord (metadane + skompresowany HTML) i wpis indeksu."""
+        meta_bytes = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+        record = RECORD_HEADER.pack(RECORD_MAGIC, len(meta_bytes), len(payload)) + meta_bytes + payload
+
+        segment = self._current_segment(len(record))
+        with open(self.segment_path(segment), "ab") as f:
+            offset = f.tell()
+            f.write(record)
+            f.flush()
+            os.fsync(f.fileno())
+        self._active_size = offset + len(record)
+
+        entry = {
+            "url": meta["url"],
+            "id": meta.get("perfumeId"),
+            "seg": segment,
+            "off": offset,
+            "len": len(record),
+            "hash": meta.get("contentHash"),
+            "fetchedAt": meta.get("fetchedAt"),
+        }
+        # Indeks jest dopisywany dopiero po zapisaniu rekordu - rekord bez wpisu odtworzy rebuild_index
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._add_to_index(entry)
+        return entry
+
+    def append(
+        self,
+        url: str,
+        html: str,
+        status_code: Optional[int] = 200,
+        backend: Optional[str] = None,
+        tunnel: Optional[str] = None,
+        fetched_at: Optional[float] = None,
+    ) -> Dict[str, object]:
+        """Dopisuje stronę do archiwum. Niezmieniona treść (ten sam hash) nie jest zapisywana ponownie.
+
+        Returns:
+            Wpis indeksu strony
+        """
+        url = url.split("#", 1)[0].strip()
+        data = html.encode("utf-8")
+        content_hash = hashlib.sha256(data).hexdigest()
+        existing = self.index.get(url)
+        if existing is not None and existing.get("hash") == content_hash:
+            return existing
+
+        meta = {
+            "url": url,
+            "perfumeId": perfume_id_from_url(url),
+            "contentHash": content_hash,
+            "size": len(data),
+            "statusCode": status_code,
+            "fetchedAt": fetched_at if fetched_at is not None else time.time(),
+            "backend": backend,
+            "tunnel": tunnel,
+        }
+        return self._append_record(meta, self._compressor.compress(data))
+
+    def _segment_map(self, segment: int, min_size: int) -> mmap.mmap:
+        """Zwraca mmap segmentu (mapowanie odświeżane gdy segment urósł od ostatniego odczytu)."""
+        cached = self._maps.get(segment)
+        if cached is not None and len(cached[1]) >= min_size:
+            return cached[1]
+        if cached is not None:
+            cached[1].close()
+            cached[0].close()
+        f = open(self.segment_path(segment), "rb")
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps[segment] = (f, mapped)
+        return mapped
+
+    def _parse_record(self, buffer, offset: int) -> Tuple[Dict[str, object], bytes, int]:
+        """Parsuje rekord w buforze od danego przesunięcia. Zwraca (metadane, payload, długość rekordu)."""
+        magic, meta_len, payload_len = RECORD_HEADER.unpack_from(buffer, offset)
+        if magic != RECORD_MAGIC:
+            raise ValueError(f"Uszkodzony rekord archiwum (offset {offset})")
+        start = offset + RECORD_HEADER.size
+        meta = json.loads(bytes(buffer[start:start + meta_len]).decode("utf-8"))
+        payload = bytes(buffer[start + meta_len:start + meta_len + payload_len])
+        return meta, payload, RECORD_HEADER.size + meta_len + payload_len
+
+    def read_entry(self, entry: Dict[str, object]) -> Tuple[Dict[str, object], str]:
+        """Odczytuje rekord wskazany przez wpis indeksu. Zwraca (metadane, HTML)."""
+        mapped = self._segment_map(entry["seg"], entry["off"] + entry["len"])
+        meta, payload, _ = self._parse_record(mapped, entry["off"])
+        return meta, self._decompressor.decompress(payload).decode("utf-8")
+
+    def get(self, url: str, require_fresh: bool = False) -> Optional[Tuple[Dict[str, object], str]]:
+        """Zwraca (metadane, HTML) najnowszej wersji strony lub None (interfejs zgodny z HtmlCache.get).
+
+        Archiwum nie ma TTL - require_fresh jest ignorowane.
+        """
+        entry = self.index.get(url.split("#", 1)[0].strip())
+        if entry is None:
+            return None
+        return self.read_entry(entry)
+
+    def get_by_id(self, perfume_id: str) -> Optional[Tuple[Dict[str, object], str]]:
+        """Zwraca (metadane, HTML) najnowszej wersji strony perfum o danym ID lub None."""
+        url = self.ids.get(str(perfume_id))
+        return self.get(url) if url else None
+
+    def iter_urls(self) -> Iterator[str]:
+        """Zwraca URL wszystkich stron w archiwum (w kolejności zapisu najnowszej wersji)."""
+        entries = sorted(self.index.values(), key=lambda e: (e["seg"], e["off"]))
+        for entry in entries:
+            yield entry["url"]
+
+    def _iter_raw(self) -> Iterator[Tuple[int, int, Dict[str, object], bytes]]:
+        """Przechodzi po wszystkich rekordach segmentów. Zwraca (segment, offset, metadane, payload)."""
+        for segment in self.segment_numbers():
+            path = self.segment_path(segment)
+            size = path.stat().st_size
+            if size == 0:
+                continue
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                offset = 0
+                while offset + RECORD_HEADER.size <= size:
+                    try:
+                        meta, payload, length = self._parse_record(mapped, offset)
+                    except (ValueError, struct.error, json.JSONDecodeError):
+                        # Przerwany zapis na końcu segmentu
+                        break
+                    if offset + length > size:
+                        break
+                    yield segment, offset, meta, payload
+                    offset += length
+
+    def scan(self, latest_only: bool = True) -> Iterator[Tuple[Dict[str, object], str]]:
+        """Sekwencyjny odczyt stron w kolejności zapisu. Zwraca (metadane, HTML).
+
+        Args:
+            latest_only: Czy pomijać nieaktualne wersje stron
+        """
+        for segment, offset, meta, payload in self._iter_raw():
+            if latest_only:
+                entry = self.index.get(meta["url"])
+                if entry is None or entry["seg"] != segment or entry["off"] != offset:
+                    continue
+            yield meta, self._decompressor.decompress(payload).decode("utf-8")
+
+    def rebuild_index(self) -> int:
+        """Odtwarza indeks na podstawie segmentów. Zwraca liczbę rekordów."""
+        self.index = {}
+        self.ids = {}
+        self.record_count = 0
+        lines = []
+        for segment, offset, meta, payload in self._iter_raw():
+            entry = {
+                "url": meta["url"],
+                "id": meta.get("perfumeId"),
+                "seg": segment,
+                "off": offset,
+                "len": RECORD_HEADER.size + len(json.dumps(meta, ensure_ascii=False).encode("utf-8")) + len(payload),
+                "hash": meta.get("contentHash"),
+                "fetchedAt": meta.get("fetchedAt"),
+            }
+            lines.append(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._add_to_index(entry)
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        os.replace(tmp_path, self.index_path)
+        return self.record_count
+
+    def compact(self) -> Dict[str, int]:
+        """Przepisuje archiwum zostawiając tylko najnowsze wersje stron.
+
+        Nowe segmenty są budowane w katalogu tymczasowym i podmieniane po zakończeniu,
+        więc przerwane kompaktowanie nie uszkadza archiwum.
+        """
+        bytes_before = sum(self.segment_path(n).stat().st_size for n in self.segment_numbers())
+        records_before = self.record_count
+
+        tmp_dir = self.archive_dir.with_name(self.archive_dir.name + ".compact-tmp")
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        compacted = PageArchive(tmp_dir, self.max_segment_bytes)
+        for segment, offset, meta, payload in self._iter_raw():
+            entry = self.index.get(meta["url"])
+            if entry is not None and entry["seg"] == segment and entry["off"] == offset:
+                # Payload jest kopiowany bez ponownej kompresji
+                compacted._append_record(meta, payload)
+
+        self.close()
+        old_dir = self.archive_dir.with_name(self.archive_dir.name + ".old")
+        if old_dir.exists():
+            shutil.rmtree(old_dir)
+        os.replace(self.archive_dir, old_dir)
+        os.replace(tmp_dir, self.archive_dir)
+        shutil.rmtree(old_dir)
+
+        self.index = compacted.index
+        self.ids = compacted.ids
+        self.record_count = compacted.record_count
+        self._active_segment = compacted._active_segment
+        self._active_size = compacted._active_size
+        bytes_after = sum(self.segment_path(n).stat().st_size for n in self.segment_numbers())
+        return {
+            "recordsBefore": records_before,
+            "recordsAfter": self.record_count,
+            "bytesBefore": bytes_before,
+            "bytesAfter": bytes_after,
+        }
+
+    def stats(self) -> Dict[str, int]:
+        """Zwraca statystyki archiwum."""
+        numbers = self.segment_numbers()
+        return {
+            "pages": len(self.index),
+            "records": self.record_count,
+            "segments": len(numbers),
+            "bytes": sum(self.segment_path(n).stat().st_size for n in numbers),
+        }
+
+    def close(self) -> None:
+        """Zamyka mapowania segmentów."""
+        for f, mapped in self._maps.values():
+            mapped.close()
+            f.close()
+        self._maps = {}
+
+
+def main():
+    """Narzędzie wiersza poleceń archiwum stron."""
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    command = sys.argv[1]
+    archive = PageArchive(os.getenv("PAGE_ARCHIVE_DIR", DEFAULT_ARCHIVE_DIR))
+
+    try:
+        if command == "pack":
+            # Import tutaj - archiwum nie zależy od cache HTML poza tym poleceniem
+            from html_cache import DEFAULT_CACHE_DIR, HtmlCache
+
+            cache = HtmlCache(sys.argv[2] if len(sys.argv) > 2 else DEFAULT_CACHE_DIR, ttl_seconds=None)
+            packed = 0
+            for url in cache.iter_urls():
+                cached = cache.get(url, require_fresh=False)
+                if cached is None:
+                    continue
+                meta, html = cached
+                archive.append(
+                    url,
+                    html,
+                    meta.get("statusCode"),
+                    meta.get("backend"),
+                    meta.get("tunnel"),
+                    meta.get("fetchedAt"),
+                )
+                packed += 1
+            print(f"📦 Dopisano {packed} stron z {cache.cache_dir} do {archive.archive_dir}")
+        elif command == "compact":
+            result = archive.compact()
+            print(f"🗜️  Rekordy: {result['recordsBefore']} -> {result['recordsAfter']}, "
+                  f"rozmiar: {result['bytesBefore'] / 1e6:.1f} MB -> {result['bytesAfter'] / 1e6:.1f} MB")
+        elif command == "stats":
+            print(json.dumps(archive.stats(), indent=2))
+        elif command == "get" and len(sys.argv) > 2:
+            key = sys.argv[2]
+            found = archive.get(key) if key.startswith(("http://", "https://")) else archive.get_by_id(key)
+            if found is None:
+                print(f"Błąd: Brak strony {key} w archiwum", file=sys.stderr)
+                sys.exit(1)
+            sys.stdout.write(found[1])
+        else:
+            print(__doc__)
+            sys.exit(1)
+    finally:
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Moduł z polityką gotowości strony dla przeglądarki Crawl4AI.
+Zamiast czekać na networkidle (aż ucichnie ruch reklam i trackerów), HTML jest
+zwracany gdy tylko na stronie pojawią się elementy czytane przez ekstraktory.
+Po przekroczeniu limitu czasu strona jest pobierana ponownie z networkidle.
+"""
+
+import json
+from collections import deque
+from typing import Dict, Iterable, Optional
+
+
+# Elementy, od których zależą ekstraktory (nazwa, nuty, głosy, recenzje)
+DEFAULT_READY_SELECTORS = (
+    "h1[itemprop=name]",
+    "#pyramid",
+    ".vote-button-legend",
+    "#all-reviews",
+)
+
+
+class ReadinessStats:
+    """Zbiera czasy oczekiwania na gotowość strony (do strojenia selektorów i timeoutu)."""
+
+    def __init__(self, window: int = 1000):
+        """
+        Inicjalizuje ReadinessStats.
+
+        Args:
+            window: Liczba ostatnich pomiarów używanych do percentyli
+        """
+        self.latencies = deque(maxlen=window)
+        self.counts: Dict[str, int] = {}
+
+    def record(self, mode: str, seconds: float) -> None:
+        """Zapisuje pomiar gotowości strony dla danego trybu."""
+        self.counts[mode] = self.counts.get(mode, 0) + 1
+        self.latencies.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Zwraca percentyl czasu gotowości (np. 0.95) lub None gdy brak pomiarów."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(fraction * len(ordered)))
+        return ordered[index]
+
+    def summary(self) -> Dict[str, object]:
+        """Zwraca podsumowanie: liczba stron per tryb oraz p50/p95 czasu gotowości w sekundach."""
+        p50 = self.percentile(0.5)
+        p95 = self.percentile(0.95)
+        return {
+            "counts": dict(self.counts),
+            "p50": round(p50, 3) if p50 is not None else None,
+            "p95": round(p95, 3) if p95 is not None else None,
+        }
+
+
+class ReadinessPolicy:
+    """Określa na co przeglądarka czeka zanim zwróci HTML."""
+
+    def __init__(
+        self,
+        selectors: Iterable[str] = DEFAULT_READY_SELECTORS,
+        timeout: float = 8.0,
+        fallback_to_networkidle: bool = True,
+    ):
+        """
+        Inicjalizuje ReadinessPolicy.
+
+        Args:
+            selectors: Selektory CSS, które wszystkie muszą być obecne w DOM (pusta lista = networkidle)
+            timeout: Maksymalny czas oczekiwania na selektory w sekundach
+            fallback_to_networkidle: Czy po przekroczeniu czasu pobrać stronę ponownie z networkidle
+        """
+        self.selectors = tuple(selectors)
+        self.timeout = timeout
+        self.fallback_to_networkidle = fallback_to_networkidle
+        self.stats = ReadinessStats()
+
+    @property
+    def uses_selectors(self) -> bool:
+        """Czy polityka czeka na selektory (a nie na networkidle)."""
+        return bool(self.selectors)
+
+    def wait_for_js(self) -> str:
+        """Zwraca warunek wait_for Crawl4AI sprawdzający obecność wszystkich selektorów."""
+        selectors = json.dumps(list(self.selectors))
+        return f"js:() => {selectors}.every(s => document.querySelector(s) !== null)"
+
+    def run_config_kwargs(self) -> Dict[str, object]:
+        """Zwraca parametry CrawlerRunConfig dla oczekiwania na selektory."""
+        if not self.uses_selectors:
+            return {"wait_until": "networkidle"}
+        return {
+            "wait_until": "domcontentloaded",
+            "wait_for": self.wait_for_js(),
+            "wait_for_timeout": int(self.timeout * 1000),
+        }
+
+    @staticmethod
+    def is_timeout(result) -> bool:
+        """Sprawdza czy wynik Crawl4AI oznacza przekroczenie czasu oczekiwania na selektory."""
+        if getattr(result, "success", True):
+            return False
+        return "wait condition failed" in str(getattr(result, "error_message", "")).lower()
+
+
+def parse_selectors(value: Optional[str]) -> tuple:
+    """Parsuje listę selektorów rozdzielonych przecinkami (np. ze zmiennej środowiskowej)."""
+    if value is None:
+        return DEFAULT_READY_SELECTORS
+    return tuple(s.strip() for s in value.split(",") if s.strip())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Moduł z wykonawcą parsowania stron perfum w puli procesów.
+Parsowanie BeautifulSoup i funkcje extract_* obciążają procesor - wykonywane
+w pętli zdarzeń blokują wszystkie pobierania w toku, sprawdzanie VPN i timery
+(strona 1-3 MB parsuje się kilka sekund). ParseExecutor wysyła surowy HTML
+(bajty) do ProcessPoolExecutor i zwraca słownik z wyciągniętymi danymi.
+Procesy robocze importują moduły scrapera raz, przy starcie. Przy jednym URL
+(CLI) lub gdy pula procesów przestanie działać, parsowanie odbywa się
+w bieżącym procesie.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def _warm_up() -> None:
+    """Inicjalizacja procesu roboczego - import scrapera i parsera przed pierwszym zadaniem."""
+    import scraper  # noqa: F401
+    from html_parser import make_soup
+
+    make_soup("<html><body><div id=\"main-content\"></div></body></html>")
+
+
+def _parse_html(html: bytes, url: str, include_reviews: bool = True) -> Dict[str, Any]:
+    """Parsuje HTML strony perfum (wywoływane w procesie roboczym lub w bieżącym procesie)."""
+    from scraper import parse_perfume_page
+
+    return parse_perfume_page(html.decode("utf-8", errors="replace"), url, include_reviews)
+
+
+def _parse_sections(html: bytes, url: str, sections: Tuple[str, ...]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """Parsuje wybrane sekcje strony perfum (wywoływane w procesie roboczym lub w bieżącym procesie)."""
+    from scraper import parse_perfume_sections
+
+    return parse_perfume_sections(html.decode("utf-8", errors="replace"), url, sections)
+
+
+class ParseExecutor:
+    """Wykonawca parsowania stron: pula procesów lub parsowanie w bieżącym procesie."""
+
+    def __init__(self, workers: Optional[int] = None):
+        """
+        Inicjalizuje ParseExecutor.
+
+        Args:
+            workers: Liczba procesów roboczych (None = liczba rdzeni, 0 = parsowanie w bieżącym procesie)
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self.workers = max(0, workers)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        if self.workers:
+            # spawn - procesy robocze nie dziedziczą pętli zdarzeń, przeglądarek ani połączeń SQLite
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_up,
+            )
+        self.tasks = 0
+        self.in_process = 0
+        self.fallbacks = 0
+
+    @property
+    def mode(self) -> str:
+        """Tryb parsowania: "process" (pula procesów) lub "inline" (bieżący proces)."""
+        return "process" if self._pool is not None else "inline"
+
+    async def parse(self, html: str, url: str, include_reviews: bool = True) -> Dict[str, Any]:
+        """Parsuje HTML strony perfum i zwraca wyciągnięte dane (z recenzjami pod kluczem "review")."""
+        return await self._run(_parse_html, html, url, include_reviews)
+
+    async def parse_sections(
+        self, html: str, url: str, sections: Tuple[str, ...]
+    ) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Parsuje wybrane sekcje strony (scraper.parse_perfume_sections) - zwraca (dane sekcji, błędy)."""
+        return await self._run(_parse_sections, html, url, tuple(sections))
+
+    async def _run(self, func: Callable, html: str, url: str, *args) -> Any:
+        """Wykonuje funkcję parsującą w puli procesów (lub w bieżącym procesie)."""
+        data = html.encode("utf-8") if isinstance(html, str) else html
+        self.tasks += 1
+        if self._pool is not None:
+            loop = asyncio.get_event_loop()
+            try:
+                return await loop.run_in_executor(self._pool, func, data, url, *args)
+            except BrokenProcessPool as e:
+                # Proces roboczy zginął (np. brak pamięci) - dalej parsuj w bieżącym procesie
+                print(f"⚠️  Pula procesów parsowania przestała działać ({e}), parsowanie w bieżącym procesie",
+                      file=sys.stderr)
+                self._pool.shutdown(wait=False)
+                self._pool = None
+                self.fallbacks += 1
+        self.in_process += 1
+        return func(data, url, *args)
+
+    def stats(self) -> Dict[str, object]:
+        """Zwraca statystyki wykonawcy."""
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "tasks": self.tasks,
+            "inProcess": self.in_process,
+            "fallbacks": self.fallbacks,
+        }
+
+    def close(self) -> None:
+        """Zamyka pulę procesów."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
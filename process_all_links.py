@@ -1,24 +1,52 @@
 #!/usr/bin/env python3
 """
 Program do przetwarzania wszystkich linków z DATA.json.
-Dla każdego linku uruchamia scraper.py i scrape_reviews.py,
-a następnie zapisuje wyniki do osobnego pliku JSON.
+Dla każdego linku pobiera stronę raz i wyciąga z niej dane (scraper.py)
+oraz recenzje (scrape_reviews.py), a następnie zapisuje wyniki do osobnego pliku JSON
+lub do shardów JSON Lines (output_sink.py, OUTPUT_SINK=jsonl).
+Linki przechodzą przez potok etapów pobieranie -> parsowanie -> zapis
+(crawl_pipeline.py) z osobną liczbą workerów dla każdego etapu,
+a stan każdego linku jest zapisywany w magazynie zadań SQLite (job_store.py).
+Pobrane wcześniej perfumy wracają do kolejki, gdy minie ich termin odświeżenia
+(recrawl_scheduler.py, budżet dzienny RECRAWL_DAILY_BUDGET).
+Z --worker kilka maszyn dzieli pracę przez wspólny magazyn zadań: każda pobiera
+partie linków z czasową dzierżawą (work_lease.py) i zapisuje własne shardy.
+Workery nie importują linków, nie kolejkują odświeżeń i nie eksportują
+all-links.json - robi to jeden koordynator (python job_store.py import,
+python recrawl_scheduler.py enqueue, python job_store.py export).
+Z --shard i/N instancja przetwarza tylko perfumy ze swojej części zbioru
+(stały hash ID perfum) i ma własny magazyn zadań, katalog wyników i archiwum -
+kilka instancji działa niezależnie, bez koordynacji.
 """
 
 import asyncio
-import json
 import os
 import random
-import re
 import sys
-import time
 import getpass
-from urllib.parse import urlparse
 from pathlib import Path
 
-from scraper import scrape_perfume_data
-from scrape_reviews import scrape_reviews
+from scraper import fetch_perfume_html
+from browser_pool import BrowserPool
+from checkpoint_store import CheckpointStore
+from crawl_pipeline import CrawlPipeline, JobLog
+from job_store import DEFAULT_JOB_STORE_PATH, JobStore
+from link_ingest import LinkIngestor, parse_shard_spec, perfume_id_from_url, shard_of, shard_tag
+from fetch_backends import create_fetcher
+from html_cache import DEFAULT_CACHE_DIR, CachingFetcher, HtmlCache
+from output_sink import (
+    create_sink,
+    generate_filename_from_perfume_name,
+    generate_filename_from_url,
+)
+from page_archive import PageArchive
+from parse_executor import ParseExecutor
+from page_readiness import ReadinessPolicy, parse_selectors
+from rate_limiter import get_default_rate_limiter
+from recrawl_scheduler import RecrawlScheduler
+from resource_blocking import get_blocking_profile
 from vpn_manager import VPNManager
+from work_lease import LeaseWorker
 
 
 def get_sudo_password() -> str:
@@ -37,189 +65,329 @@ def get_sudo_password() -> str:
         sys.exit(1)
 
 
-def generate_filename_from_url(url: str) -> str:
-    """Generuje nazwę pliku na podstawie URL."""
-    # Format URL: https://www.fragrantica.com/perfumy/Brand/Name-ID.html
-    match = re.search(r'/perfumy/([^/]+)/(.+?)-(\d+)\.html', url)
-    if match:
-        brand = match.group(1).replace("-", "_")
-        name = match.group(2).replace("-", "_")
-        perfume_id = match.group(3)
-        # Usuń niebezpieczne znaki dla nazwy pliku
-        filename = f"{brand}_{name}_{perfume_id}.json"
-        # Zamień niebezpieczne znaki na podkreślniki
-        filename = re.sub(r'[^\w\-_.]', '_', filename)
-        return filename
-    
-    # Fallback: użyj ostatniej części URL
-    parsed = urlparse(url)
-    path_parts = [p for p in parsed.path.split('/') if p]
-    if path_parts:
-        filename = "_".join(path_parts[-2:]) if len(path_parts) >= 2 else path_parts[-1]
-        filename = filename.replace('.html', '.json')
-        filename = re.sub(r'[^\w\-_.]', '_', filename)
-        return filename
-    
-    # Ostateczny fallback
-    return "perfume.json"
-
-
-def generate_filename_from_perfume_name(perfume_name: str, brand: str = None) -> str:
-    """Generuje nazwę pliku na podstawie nazwy perfum i marki."""
-    if not perfume_name:
-        return None
-    
-    # Normalizuj nazwę: usuń niebezpieczne znaki, zamień spacje na podkreślniki
-    name = perfume_name.strip()
-    name = re.sub(r'[^\w\s\-]', '', name)  # Usuń znaki specjalne
-    name = re.sub(r'\s+', '_', name)  # Zamień spacje na podkreślniki
-    name = name.lower()
-    
-    if brand:
-        brand_normalized = brand.strip()
-        brand_normalized = re.sub(r'[^\w\s\-]', '', brand_normalized)
-        brand_normalized = re.sub(r'\s+', '_', brand_normalized)
-        brand_normalized = brand_normalized.lower()
-        filename = f"{brand_normalized}_{name}.json"
-    else:
-        filename = f"{name}.json"
-    
-    # Skróć jeśli zbyt długie
-    if len(filename) > 200:
-        filename = filename[:200] + ".json"
-    
-    return filename
+def get_shard_arg(args: list):
+    """Zwraca shard (i, N) z argumentu --shard i/N (lub --shard=i/N) albo None."""
+    for position, arg in enumerate(args):
+        if arg == "--shard":
+            if position + 1 >= len(args):
+                raise ValueError("Brak wartości --shard (oczekiwano i/N, np. 0/4)")
+            return parse_shard_spec(args[position + 1])
+        if arg.startswith("--shard="):
+            return parse_shard_spec(arg[len("--shard="):])
+    return None
+
+
+def shard_path(path: Path, shard) -> Path:
+    """Zwraca ścieżkę pliku stanu shardu (jobs.sqlite3 -> jobs.shard-0-of-4.sqlite3)."""
+    if shard is None:
+        return path
+    return path.with_name(f"{path.stem}.{shard_tag(shard)}{path.suffix}")
+
+
+def print_stage_stats(stage_stats: list) -> None:
+    """Wypisuje statystyki etapów potoku (praca, oczekiwanie i głębokość kolejek)."""
+    for stage in stage_stats:
+        depth = stage["queueDepth"]
+        print(f"🧵 Etap {stage['stage']} ({stage['workers']} workerów): {stage['processed']} zadań, "
+              f"błędów: {stage['failed']}, praca: {stage['busySeconds']}s, "
+              f"oczekiwanie na dane: {stage['idleSeconds']}s, na następny etap: {stage['blockedSeconds']}s, "
+              f"kolejka: śr. {depth['avg']} / maks. {depth['max']} / {depth['capacity']}")
+
 
+def print_rate_limiter_state(rate_limiter) -> None:
+    """Wypisuje stan limitera żądań (tempo i liczba ograniczeń per host i tunel)."""
+    for key, state in rate_limiter.snapshot().items():
+        print(f"📈 Limiter {key}: {state['rate']} req/s, ograniczeń: {state['throttles']}, "
+              f"udanych: {state['successes']}, oczekiwanie: {state['waitSeconds']}s")
 
-async def process_single_link(url: str, output_dir: Path = None, vpn_manager: VPNManager = None) -> str:
-    """Przetwarza pojedynczy link i zapisuje wyniki do pliku JSON.
+
+async def main():
+    """Główna funkcja programu.
     
-    Zwraca ścieżkę do zapisanego pliku lub None w przypadku błędu.
+    Użycie: python process_all_links.py [--replay | --worker] [--shard i/N]
+    Z --replay ekstrakcja jest uruchamiana ponownie dla wszystkich stron z cache HTML (bez sieci),
+    a gdy ustawiono PAGE_ARCHIVE_DIR - dla wszystkich stron z archiwum segmentów.
+    Z --worker linki są pobierane partiami z dzierżawą ze wspólnego magazynu zadań (JOB_STORE_PATH),
+    więc kilka workerów (maszyn lub procesów) może pracować równolegle bez powtórzeń
+    (import linków i kolejkowanie odświeżeń wykonuje wcześniej koordynator).
+    Z --shard i/N (0 <= i < N) przetwarzane są tylko perfumy, których ID trafia do shardu i,
+    a stan i wyniki są zapisywane w lokalizacjach shardu (np. output/shard-0-of-4).
     """
-    if output_dir is None:
-        output_dir = Path(".")
+    replay = "--replay" in sys.argv[1:]
+    worker_mode = "--worker" in sys.argv[1:] and not replay
+    try:
+        shard = get_shard_arg(sys.argv[1:])
+    except ValueError as e:
+        print(f"Błąd: {e}", file=sys.stderr)
+        sys.exit(1)
+    if shard:
+        print(f"🧩 Shard {shard[0]}/{shard[1]} ({shard_tag(shard)})")
     
-    print(f"\n{'='*80}")
-    print(f"Przetwarzanie: {url}")
-    print(f"{'='*80}")
+    # Cache surowego HTML (zapis pobranych stron, źródło stron w trybie replay)
+    cache = HtmlCache(
+        os.getenv("HTML_CACHE_DIR", DEFAULT_CACHE_DIR),
+        ttl_seconds=float(os.getenv("HTML_CACHE_TTL_HOURS", "168")) * 3600,
+    )
     
-    # Rozpocznij pomiar czasu
-    start_time = time.time()
+    # Archiwum stron w segmentach (opcjonalne): dopisywane przy pobieraniu, czytane w trybie replay
+    archive_dir = os.getenv("PAGE_ARCHIVE_DIR")
+    # Archiwum jest dopisywane przez jeden proces - każdy shard ma własny podkatalog
+    if archive_dir and shard:
+        archive_dir = str(Path(archive_dir) / shard_tag(shard))
+    archive = PageArchive(archive_dir) if archive_dir else None
     
-    try:
-        # Krok 1: Scrapuj dane podstawowe z scraper.py
-        print("✓ Scrapowanie danych podstawowych...")
-        perfume_data = await scrape_perfume_data(url, vpn_manager=vpn_manager)
-        
-        # Krok 2: Scrapuj recenzje z scrape_reviews.py
-        print("✓ Scrapowanie recenzji...")
-        reviews = await scrape_reviews(url, vpn_manager=vpn_manager)
+    data_file = Path("all-links.json")
+    # Pozostałe linki shardu są zapisywane osobno (all-links.json jest wspólnym wejściem shardów)
+    remaining_file = shard_path(data_file, shard)
+    
+    if replay:
+        # Bez VPN i przeglądarki - wszystkie strony z archiwum lub cache
+        vpn_manager = None
+        browser_pool = None
+        job_store = None
+        scheduler = None
+        lease_worker = None
+        source = archive if archive is not None else cache
+        source_dir = archive.archive_dir if archive is not None else cache.cache_dir
+        links = list(source.iter_urls())
+        if shard:
+            links = [
+                url for url in links
+                if perfume_id_from_url(url) and shard_of(perfume_id_from_url(url), shard[1]) == shard[0]
+            ]
+        if not links:
+            print(f"Błąd: Brak stron w {source_dir}", file=sys.stderr)
+            sys.exit(1)
+        print(f"♻️  Tryb replay: {len(links)} stron z {source_dir}")
+    else:
+        # Pobierz hasło sudo
+        sudo_password = get_sudo_password()
         
-        # Krok 3: Połącz dane
-        perfume_data["review"] = reviews
+        # Inicjalizuj VPN Manager z hasłem sudo
+        vpn_manager = VPNManager(sudo_password=sudo_password)
         
-        # Krok 4: Wygeneruj nazwę pliku
-        # Najpierw spróbuj na podstawie nazwy perfum i marki
-        filename = generate_filename_from_perfume_name(
-            perfume_data.get("perfumeName"),
-            perfume_data.get("brand")
+        # Magazyn zadań (SQLite) - nowe linki z all-links.json są dopisywane przy każdym uruchomieniu
+        # Workery dzielą bazę przez wspólny wolumen - bez WAL (patrz job_store.py)
+        job_store = JobStore(
+            shard_path(Path(os.getenv("JOB_STORE_PATH", DEFAULT_JOB_STORE_PATH)), shard),
+            shared=True if worker_mode else None,
         )
+        lease_worker = None
+        if worker_mode:
+            # Zadania przerwanych workerów wracają do puli po wygaśnięciu ich dzierżawy
+            lease_worker = LeaseWorker(
+                job_store,
+                batch_size=int(os.getenv("LEASE_BATCH_SIZE", "50")),
+                lease_seconds=float(os.getenv("LEASE_SECONDS", "600")),
+                max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3")),
+            )
+            print(f"🤝 Worker {lease_worker.worker_id} (magazyn zadań: {job_store.path})")
+        else:
+            interrupted = job_store.reset_in_progress()
+            if interrupted:
+                print(f"↩️  Przywrócono {interrupted} przerwanych zadań")
+        scheduler = RecrawlScheduler(job_store, daily_budget=int(os.getenv("RECRAWL_DAILY_BUDGET", "500")))
+        # Import i kolejkowanie odświeżeń tylko w pojedynczej instancji - workery dostają gotową kolejkę
+        # od koordynatora (N workerów importowałoby katalog i wydawało budżet jednocześnie)
+        if not lease_worker:
+            if data_file.exists():
+                # Strumieniowe wczytanie z kanonizacją URL i deduplikacją po ID perfum
+                ingestor = LinkIngestor(shard=shard)
+                added = job_store.import_json(data_file, ingestor)
+                print(f"📥 Dodano {added} nowych linków z {data_file} "
+                      f"(duplikaty: {ingestor.counts['duplicates']}, niepoprawne: {ingestor.counts['invalid']}"
+                      f"{', innych shardów: ' + str(ingestor.counts['otherShard']) if shard else ''})")
+            
+            # Odświeżanie: najbardziej przeterminowane perfumy wracają do kolejki w ramach budżetu dziennego
+            recrawl = scheduler.enqueue_due()
+            if recrawl:
+                print(f"🔁 Do odświeżenia: {len(recrawl)} perfum (wykorzystany budżet dzienny: "
+                      f"{scheduler.budget_used()}/{scheduler.daily_budget})")
         
-        # Jeśli nie udało się wygenerować, użyj URL
-        if not filename:
-            filename = generate_filename_from_url(url)
-        
-        # Krok 5: Zapisz do pliku
-        output_path = output_dir / filename
-        
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(perfume_data, f, ensure_ascii=False, indent=2)
-        
-        # Zakończ pomiar czasu
-        elapsed_time = time.time() - start_time
-        
-        print(f"✓ Zapisano do: {output_path}")
-        print(f"  - Nazwa perfum: {perfume_data.get('perfumeName', 'N/A')}")
-        print(f"  - Marka: {perfume_data.get('brand', 'N/A')}")
-        print(f"  - Liczba recenzji: {len(reviews)}")
-        print(f"  - Czas scrapowania: {elapsed_time:.2f} sekund ({elapsed_time/60:.2f} minut)")
-        
-        return str(output_path)
-        
-    except Exception as e:
-        # Zakończ pomiar czasu również w przypadku błędu
-        elapsed_time = time.time() - start_time
-        print(f"✗ Błąd podczas przetwarzania {url}: {e}", file=sys.stderr)
-        print(f"  - Czas przed błędem: {elapsed_time:.2f} sekund ({elapsed_time/60:.2f} minut)", file=sys.stderr)
-        import traceback
-        traceback.print_exc()
-        return None
-
-
-async def main():
-    """Główna funkcja programu."""
-    # Pobierz hasło sudo
-    sudo_password = get_sudo_password()
+        if lease_worker:
+            # Linki są dzierżawione partiami w trakcie przebiegu
+            links = []
+        else:
+            links = job_store.pending_urls(max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3")))
+            if not links:
+                print(f"Błąd: Brak linków do przetworzenia (plik {data_file}, magazyn {job_store.path})",
+                      file=sys.stderr)
+                sys.exit(1)
+            
+            print(f"Znaleziono {len(links)} linków do przetworzenia")
     
-    # Inicjalizuj VPN Manager z hasłem sudo
-    vpn_manager = VPNManager(sudo_password=sudo_password)
+    # Utwórz katalog na wyniki (opcjonalnie)
+    output_dir = Path("output") / shard_tag(shard) if shard else Path("output")
+    output_dir.mkdir(parents=True, exist_ok=True)
     
-    # Wczytaj linki z DATA.json
-    data_file = Path("all-links.json")
-    if not data_file.exists():
-        print(f"Błąd: Plik {data_file} nie istnieje", file=sys.stderr)
-        sys.exit(1)
+    rate_limiter = get_default_rate_limiter()
     
-    with open(data_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    if replay:
+        fetcher = CachingFetcher(None, source, replay=True)
+    else:
+        # Jedna pula przeglądarek na cały przebieg (zamiast uruchamiania Chromium dla każdego URL)
+        browser_pool = BrowserPool(
+            size=int(os.getenv("BROWSER_POOL_SIZE", "1")),
+            max_pages_per_browser=int(os.getenv("BROWSER_MAX_PAGES", "100")),
+            max_rss_mb=float(os.getenv("BROWSER_MAX_RSS_MB", "1500")),
+            # Profil blokowania zasobów: "default", "strict" lub "off"
+            blocking_profile=get_blocking_profile(os.getenv("BROWSER_BLOCKING", "default")),
+            # Gotowość strony: selektory rozdzielone przecinkami (pusta wartość = networkidle)
+            readiness=ReadinessPolicy(
+                selectors=parse_selectors(os.getenv("BROWSER_READY_SELECTORS")),
+                timeout=float(os.getenv("BROWSER_READY_TIMEOUT", "8")),
+            ),
+        )
+        
+        # Backend pobierania: "auto" (HTTP z przejściem na przeglądarkę), "http" lub "browser",
+        # poprzedzony cache HTML (tunel VPN zapisywany w metadanych)
+        # Każde pobranie czeka na token współdzielonego limitera (osobne tempo per tunel VPN)
+        fetcher = CachingFetcher(
+            create_fetcher(
+                os.getenv("FETCH_BACKEND", "auto"),
+                browser_pool,
+                rate_limiter,
+                tunnel_provider=vpn_manager.get_current_config,
+            ),
+            cache,
+            tunnel_provider=vpn_manager.get_current_config,
+            archive=archive,
+            # Odświeżane perfumy nie dostają HTML z poprzedniego pobrania (TTL cache jest dłuższy
+            # niż odstępy harmonogramu) - wpis jest rewalidowany żądaniem warunkowym
+            last_crawled_provider=scheduler.last_crawled_at,
+        )
     
-    links = data.get("links", [])
-    if not links:
-        print("Błąd: Brak linków w pliku DATA.json", file=sys.stderr)
-        sys.exit(1)
+    # Potok etapów: pobieranie (FETCH_WORKERS), parsowanie (PARSE_WORKERS) i zapis (PERSIST_WORKERS)
+    fetch_workers = int(os.getenv("FETCH_WORKERS", os.getenv("CRAWL_CONCURRENCY", "4")))
+    # Parsowanie w puli procesów (domyślnie tyle procesów, ile rdzeni; 0 = w bieżącym procesie)
+    parse_processes = os.getenv("PARSE_WORKERS")
+    parse_executor = ParseExecutor(int(parse_processes) if parse_processes else None)
+    parse_workers = max(1, parse_executor.workers)
+    persist_workers = int(os.getenv("PERSIST_WORKERS", "1"))
+    loop = asyncio.get_event_loop()
+    processed_files = []
     
-    print(f"Znaleziono {len(links)} linków do przetworzenia")
+    # Ujście wyników: "files" (plik JSON na perfumy) lub "jsonl" (shardy JSON Lines zapisywane partiami)
+    # Worker zapisuje własne shardy (perfumes-<worker>-000001.jsonl) - łączone przez work_lease.py merge
+    sink = create_sink(
+        os.getenv("OUTPUT_SINK", "files"),
+        output_dir,
+        prefix=f"perfumes-{lease_worker.worker_id}" if lease_worker else "perfumes",
+        max_records=int(os.getenv("OUTPUT_SHARD_RECORDS", "5000")),
+        max_bytes=int(float(os.getenv("OUTPUT_SHARD_MB", "256")) * 1024 * 1024),
+        batch_size=int(os.getenv("OUTPUT_BATCH_SIZE", "100")),
+    )
     
-    # Utwórz katalog na wyniki (opcjonalnie)
-    output_dir = Path("output")
-    output_dir.mkdir(exist_ok=True)
+    # Punkty kontrolne etapów (pobranie, dane, recenzje) - ponowna próba wykonuje tylko brakujące etapy
+    checkpoints = CheckpointStore(job_store) if job_store and os.getenv("CHECKPOINTS", "1") != "0" else None
     
-    # Przetwórz każdy link
-    success_count = 0
-    error_count = 0
-    processed_files = []
+    # Worker oznacza tylko zadania, które nadal dzierżawi (wygasłe mógł przejąć inny worker)
+    lease_owner = lease_worker.worker_id if lease_worker else None
     
-    # Iteruj po kopii listy, aby móc bezpiecznie modyfikować oryginalną listę
-    links_to_process = links.copy()
+    def mark_committed() -> None:
+        """Oznacza jako zakończone zadania, których rekordy zostały już trwale zapisane."""
+        for url, location, perfume_data in sink.pop_committed():
+            if job_store:
+                # Liczniki są porównywane z poprzednim pobraniem - przed nadpisaniem stanu zadania.
+                # Dla strony z cache czasem pobrania danych jest czas pobrania wpisu, a nie zapisu wyniku
+                cache_meta = perfume_data.get("scrapeMeta", {}).get("cache") or {}
+                scheduler.record_crawl(url, perfume_data, cache_meta.get("fetchedAt"))
+                job_store.mark_done(
+                    url, location, perfume_data.get("scrapeMeta", {}).get("contentHash"), owner=lease_owner
+                )
+            if checkpoints:
+                checkpoints.clear(url)
     
-    for i, url in enumerate(links_to_process, 1):
-        if not url or not url.strip():
-            continue
-        
-        url = url.strip()
-        
-        # # Odczekaj 60-90 sekund przed każdym zapytaniem (oprócz pierwszego) - aby uniknąć 429
-        # if i > 1:
-        #     wait_time = random.uniform(30, 60)
-        #     print(f"\n⏳ Oczekiwanie {wait_time:.1f} sekund przed następnym zapytaniem...")
-        #     await asyncio.sleep(wait_time)
+    async def fetch_stage(url: str):
+        """Pobiera stronę (ponowne próby, zmiana VPN, limiter)."""
+        if job_store:
+            job_store.mark_started(url, owner=lease_owner)
+        if checkpoints is None:
+            return await fetch_perfume_html(url, vpn_manager=vpn_manager, browser_pool=browser_pool, fetcher=fetcher)
+        saved = checkpoints.load(url)
+        if not checkpoints.missing(saved):
+            # Wszystkie etapy zapisane w poprzedniej próbie (np. nieudany zapis wyniku) - bez pobierania
+            return None, saved
+        result = await fetch_perfume_html(url, vpn_manager=vpn_manager, browser_pool=browser_pool, fetcher=fetcher)
+        return result, saved
+    
+    async def parse_stage(url: str, fetched) -> dict:
+        """Parsuje stronę w puli procesów, aby nie blokować pętli zdarzeń (pobierania w toku)."""
+        result = fetched if checkpoints is None else fetched[0]
+        if result is not None and result.extracted is not None:
+            # Strona bez zmian (304) - dane z poprzedniej ekstrakcji tej samej treści
+            perfume_data = dict(result.extracted)
+            perfume_data["scrapeMeta"] = result.meta()
+            return perfume_data
+        if checkpoints is None:
+            perfume_data = await parse_executor.parse(fetched.html, url)
+            perfume_data["scrapeMeta"] = fetched.meta()
+            return perfume_data
+        result, saved = fetched
+        # Każda sekcja jest zapisywana od razu - błąd jednej nie traci pozostałych
+        return await checkpoints.complete(url, result, saved, parse_executor.parse_sections)
+    
+    async def persist_stage(url: str, perfume_data: dict) -> str:
+        """Zapisuje dane w ujściu wyników (zapis i fsync w wątku, poza pętlą zdarzeń)."""
+        output_path = await loop.run_in_executor(None, sink.write, url, perfume_data)
+        scrape_meta = perfume_data["scrapeMeta"]
+        if scrape_meta.get("contentHash") and not scrape_meta.get("extractionReused"):
+            # Dane do ponownego użycia, gdy strona odpowie 304 (treść bez zmian)
+            extracted = {key: value for key, value in perfume_data.items() if key != "scrapeMeta"}
+            await loop.run_in_executor(None, cache.put_extracted, scrape_meta["contentHash"], extracted)
+        mark_committed()
+        processed_files.append(output_path)
+        print(f"✓ Zapisano do: {output_path} ({perfume_data.get('perfumeName', 'N/A')}, "
+              f"recenzji: {len(perfume_data.get('review') or [])}, "
+              f"backend: {perfume_data['scrapeMeta'].get('backend', 'N/A')})")
         
-        print(f"\n[{i}/{len(links_to_process)}] Przetwarzanie linku {i}...")
-               
-        result = await process_single_link(url, output_dir, vpn_manager)
-        if result:
-            success_count += 1
-            processed_files.append(result)
-            
-            # Usuń przetworzony link z listy i zapisz zaktualizowany plik
-            if url in links:
-                links.remove(url)
-                # Zapisz zaktualizowaną listę do pliku
-                with open(data_file, "w", encoding="utf-8") as f:
-                    json.dump({"links": links}, f, ensure_ascii=False, indent=2)
-                print(f"✓ Usunięto link z listy. Pozostało {len(links)} linków.")
-        else:
-            error_count += 1
+        # Aktualne tempo limitera (co 25 przetworzonych linków)
+        if len(processed_files) % 25 == 0 and rate_limiter.buckets:
+            print_rate_limiter_state(rate_limiter)
+        return output_path
+    
+    def on_error(url: str, stage: str, error: str) -> None:
+        """Zapisuje błąd zadania w magazynie zadań."""
+        print(f"✗ Błąd podczas przetwarzania {url} (etap {stage}): {error}", file=sys.stderr)
+        if job_store:
+            job_store.mark_failed(url, error, owner=lease_owner)
+    
+    def create_pipeline() -> CrawlPipeline:
+        """Tworzy potok etapów (osobny dla każdej dzierżawionej partii w trybie --worker)."""
+        return CrawlPipeline(
+            fetch_stage,
+            parse_stage,
+            persist_stage,
+            fetch_workers=fetch_workers,
+            parse_workers=parse_workers,
+            persist_workers=persist_workers,
+            queue_size=int(os.getenv("PIPELINE_QUEUE_SIZE", "8")),
+            # Dziennik zadań w kolejności linków wejściowych (niezależnie od kolejności zakończenia)
+            job_log=JobLog(output_dir / "job-log.jsonl"),
+            tunnel_provider=vpn_manager.get_current_config if vpn_manager else None,
+            on_error=on_error,
+        )
+    
+    print(f"👷 Workerów: pobieranie {fetch_workers}, parsowanie {parse_workers}, zapis {persist_workers}")
+    pipelines = []
+    
+    async def run_batch(batch) -> dict:
+        pipeline = create_pipeline()
+        pipelines.append(pipeline)
+        return await pipeline.run(batch)
+    
+    if lease_worker:
+        summaries = await lease_worker.run(run_batch)
+    else:
+        summaries = [await run_batch(links)]
+    # Ostatnia partia i domknięcie sharda - dopiero wtedy pozostałe zadania są zakończone
+    await loop.run_in_executor(None, sink.close)
+    mark_committed()
+    if lease_worker:
+        released = lease_worker.release()
+        print(f"🤝 {lease_worker.stats()} (zwolniono {released} zadań)")
+    success_count = sum(summary["succeeded"] for summary in summaries)
+    error_count = sum(summary["failed"] for summary in summaries)
     
     # Podsumowanie
     print(f"\n{'='*80}")
@@ -228,6 +396,45 @@ async def main():
     print(f"✓ Pomyślnie przetworzono: {success_count}")
     print(f"✗ Błędów: {error_count}")
     print(f"📁 Pliki zapisane w katalogu: {output_dir}")
+    print(f"💾 Wyniki: {sink.stats()}")
+    if pipelines:
+        print_stage_stats(pipelines[-1].stage_stats())
+        print(f"🐌 Najwolniejszy etap: {pipelines[-1].bottleneck()}")
+    
+    # Statystyki cache i backendów pobierania (skuteczność zwykłego HTTP)
+    if hasattr(fetcher, "stats"):
+        fetch_stats = fetcher.stats()
+        print(f"📊 Backendy: {fetch_stats}")
+    await fetcher.close()
+    print(f"🧮 Parsowanie: {parse_executor.stats()}")
+    if checkpoints:
+        print(f"🔖 Punkty kontrolne: {checkpoints.stats()}")
+    parse_executor.close()
+    
+    if rate_limiter.buckets:
+        print_rate_limiter_state(rate_limiter)
+    
+    # Zamknij przeglądarki z puli
+    if browser_pool:
+        pool_stats = browser_pool.stats()
+        print(f"🌐 Uruchomień przeglądarki: {pool_stats['launches']} (recykling: {pool_stats['recycles']})")
+        if "blocked" in pool_stats:
+            print(f"🚫 Zablokowane zasoby: {pool_stats['blocked']}")
+        readiness_stats = pool_stats["readiness"]
+        if readiness_stats["counts"]:
+            print(f"⏱️  Gotowość strony: {readiness_stats['counts']} "
+                  f"(p50: {readiness_stats['p50']}s, p95: {readiness_stats['p95']}s)")
+        await browser_pool.close()
+    
+    # Zapisz pozostałe linki w formacie all-links.json (jeden zapis na przebieg;
+    # workery pomijają eksport - zapisuje go koordynator: python job_store.py export)
+    if job_store:
+        if lease_worker:
+            print(f"📋 Stan magazynu zadań: {job_store.counts()}")
+        else:
+            remaining = job_store.export_json(remaining_file)
+            print(f"📋 Pozostało {remaining} linków do przetworzenia: {job_store.counts()}")
+        job_store.close()
     
     # Rozłącz VPN na końcu
     if vpn_manager:
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Moduł ze współdzielonym limiterem żądań (token bucket z AIMD).
+Każde pobranie strony musi najpierw pobrać token z kubełka dla danego hosta
+i tunelu VPN. Po udanym pobraniu tempo rośnie addytywnie, a po 429 lub miękkiej
+blokadzie (403/503, strona wyzwania) spada multiplikatywnie - dzięki temu
+scraper działa z najwyższym tempem, jakie serwis toleruje, zamiast zgadywać
+opóźnienia. Stan każdego kubełka (tempo, liczniki, ostatnie ograniczenie) jest
+dostępny przez snapshot().
+"""
+
+import asyncio
+import os
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+
+# Statusy HTTP traktowane jako ograniczenie ruchu przez serwis
+THROTTLE_STATUS_CODES = (403, 429, 503)
+
+# Znaczniki stron wyzwania antybotowego (miękka blokada ze statusem 200)
+SOFT_BLOCK_MARKERS = ("just a moment", "checking your browser", "cf-challenge", "captcha")
+
+
+def is_throttled(result) -> bool:
+    """Sprawdza czy wynik pobrania oznacza ograniczenie ruchu (429, 403/503 lub strona wyzwania)."""
+    if getattr(result, "status_code", None) in THROTTLE_STATUS_CODES:
+        return True
+    error_message = str(getattr(result, "error_message", None) or "").lower()
+    if "429" in error_message or "too many" in error_message:
+        return True
+    html = getattr(result, "html", None) or ""
+    # Strony wyzwania są krótkie - pełna strona perfum ma kilka MB
+    if html and len(html) < 50000:
+        head = html[:5000].lower()
+        return any(marker in head for marker in SOFT_BLOCK_MARKERS)
+    return False
+
+
+class TokenBucket:
+    """Kubełek tokenów z tempem regulowanym AIMD (additive increase, multiplicative decrease)."""
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        burst: float = 1.0,
+        min_rate: float = 0.05,
+        max_rate: float = 5.0,
+        increase_step: float = 0.05,
+        decrease_factor: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Inicjalizuje TokenBucket.
+
+        Args:
+            rate: Początkowe tempo (żądania na sekundę)
+            burst: Maksymalna liczba tokenów (żądań wysłanych od razu)
+            min_rate: Minimalne tempo po obniżkach
+            max_rate: Maksymalne tempo po podwyżkach
+            increase_step: Wzrost tempa po każdym udanym żądaniu (req/s)
+            decrease_factor: Mnożnik tempa po ograniczeniu ruchu (0-1)
+            clock: Zegar monotoniczny (do testów)
+        """
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.clock = clock
+        self.tokens = burst
+        self.updated = clock()
+        self.successes = 0
+        self.throttles = 0
+        self.total_wait = 0.0
+        self.last_throttle: Optional[float] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _refill(self) -> None:
+        """Dolicza tokeny za czas od ostatniej aktualizacji."""
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> float:
+        """Pobiera token jeśli jest dostępny. Zwraca 0 lub czas (s) do pojawienia się tokenu."""
+        self._refill()
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+    async def acquire(self) -> float:
+        """Czeka na token (żądania są obsługiwane po kolei). Zwraca czas oczekiwania w sekundach."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        waited = 0.0
+        async with self._lock:
+            while True:
+                wait = self.try_acquire()
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+                waited += wait
+        self.total_wait += waited
+        return waited
+
+    def on_success(self) -> None:
+        """Udane żądanie - addytywny wzrost tempa."""
+        self.successes += 1
+        self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_throttle(self) -> None:
+        """Ograniczenie ruchu - multiplikatywny spadek tempa i wyzerowanie zgromadzonych tokenów."""
+        self._refill()
+        self.throttles += 1
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self.tokens = min(self.tokens, 0.0)
+        self.last_throttle = self.clock()
+
+    def snapshot(self) -> Dict[str, object]:
+        """Zwraca aktualny stan kubełka."""
+        return {
+            "rate": round(self.rate, 3),
+            "tokens": round(self.tokens, 3),
+            "successes": self.successes,
+            "throttles": self.throttles,
+            "waitSeconds": round(self.total_wait, 1),
+            "lastThrottleAgo": round(self.clock() - self.last_throttle, 1) if self.last_throttle else None,
+        }
+
+
+class RateLimiter:
+    """Zbiór kubełków tokenów - osobny dla każdej pary (host, tunel VPN)."""
+
+    def __init__(self, **bucket_kwargs):
+        """
+        Inicjalizuje RateLimiter.
+
+        Args:
+            bucket_kwargs: Parametry nowych kubełków (jak w TokenBucket)
+        """
+        self.bucket_kwargs = bucket_kwargs
+        self.buckets: Dict[Tuple[str, str], TokenBucket] = {}
+
+    def bucket(self, host: str, tunnel: Optional[str] = None) -> TokenBucket:
+        """Zwraca kubełek dla hosta i tunelu (tworzony przy pierwszym użyciu)."""
+        key = (host or "", tunnel or "direct")
+        if key not in self.buckets:
+            self.buckets[key] = TokenBucket(**self.bucket_kwargs)
+        return self.buckets[key]
+
+    async def acquire(self, host: str, tunnel: Optional[str] = None) -> float:
+        """Czeka na token dla hosta i tunelu. Zwraca czas oczekiwania w sekundach."""
+        return await self.bucket(host, tunnel).acquire()
+
+    def record(self, host: str, tunnel: Optional[str], result) -> None:
+        """Aktualizuje tempo na podstawie wyniku pobrania."""
+        bucket = self.bucket(host, tunnel)
+        if is_throttled(result):
+            bucket.on_throttle()
+            print(f"🐢 Ograniczenie ruchu ({host}, {tunnel or 'direct'}) - tempo: {bucket.rate:.2f} req/s")
+        elif getattr(result, "success", False):
+            bucket.on_success()
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        """Zwraca stan wszystkich kubełków (klucz "host|tunel")."""
+        return {f"{host}|{tunnel}": bucket.snapshot() for (host, tunnel), bucket in self.buckets.items()}
+
+
+_default_limiter: Optional[RateLimiter] = None
+
+
+def get_default_rate_limiter() -> RateLimiter:
+    """Zwraca współdzielony limiter procesu (parametry ze zmiennych RATE_LIMIT_*)."""
+    global _default_limiter
+    if _default_limiter is None:
+        _default_limiter = RateLimiter(
+            rate=float(os.getenv("RATE_LIMIT_INITIAL", "1.0")),
+            burst=float(os.getenv("RATE_LIMIT_BURST", "1.0")),
+            min_rate=float(os.getenv("RATE_LIMIT_MIN", "0.05")),
+            max_rate=float(os.getenv("RATE_LIMIT_MAX", "5.0")),
+        )
+    return _default_limiter
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Moduł z harmonogramem ponownego pobierania stron perfum (odświeżanie danych).
+Po każdym pobraniu perfumy dostają termin kolejnego pobrania zależny od tego,
+jak bardzo zmieniły się ratingCount i suma głosów od poprzedniego pobrania
+(szybko zmieniające się dane - krótszy odstęp) oraz od popularności (więcej
+ocen - częściej). Codzienny budżet żądań jest przydzielany perfumom najbardziej
+przeterminowanym względem ich odstępu.
+
+Użycie:
+    python recrawl_scheduler.py due [limit]   - perfumy do odświeżenia (bez zmiany stanu)
+    python recrawl_scheduler.py enqueue       - przywraca je do kolejki (koordynator workerów)
+    python recrawl_scheduler.py stats         - wykorzystanie budżetu i liczba przeterminowanych
+"""
+
+import json
+import math
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from job_store import DEFAULT_JOB_STORE_PATH, STATUS_DONE, STATUS_PENDING, JobStore
+
+
+DAY_SECONDS = 24 * 3600
+
+BUDGET_SCHEMA = """
+CREATE TABLE IF NOT EXISTS recrawl_budget (
+    day TEXT PRIMARY KEY,
+    used INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def vote_total(perfume_data: Dict[str, Any]) -> Optional[int]:
+    """Zwraca sumę głosów ze wszystkich kategorii z liczbami głosów (None gdy brak danych)."""
+    from scraper import VOTING_CATEGORIES
+
+    total = None
+    for category, (kind, options_mapping) in VOTING_CATEGORIES.items():
+        if kind != "votes":
+            continue
+        votes = perfume_data.get(category) or {}
+        for option in options_mapping:
+            value = votes.get(option)
+            if isinstance(value, (int, float)):
+                total = (total or 0) + int(value)
+    return total
+
+
+def _relative_change(previous: Optional[int], current: Optional[int]) -> float:
+    """Względna zmiana licznika (0 gdy brak jednej z wartości)."""
+    if previous is None or current is None:
+        return 0.0
+    return abs(current - previous) / max(previous, 1)
+
+
+class RecrawlPolicy:
+    """Wyznacza odstęp do kolejnego pobrania na podstawie tempa zmian i popularności."""
+
+    def __init__(
+        self,
+        min_interval_days: float = 3.0,
+        max_interval_days: float = 90.0,
+        initial_interval_days: float = 30.0,
+        target_change: float = 0.05,
+    ):
+        """
+        Inicjalizuje RecrawlPolicy.
+
+        Args:
+            min_interval_days: Najkrótszy odstęp między pobraniami
+            max_interval_days: Najdłuższy odstęp między pobraniami
+            initial_interval_days: Odstęp po pierwszym pobraniu (brak historii zmian)
+            target_change: Względna zmiana liczników, po której dane uznajemy za nieaktualne (0.05 = 5%)
+        """
+        self.min_interval_days = min_interval_days
+        self.max_interval_days = max_interval_days
+        self.initial_interval_days = initial_interval_days
+        self.target_change = target_change
+
+    def popularity_factor(self, rating_count: Optional[int]) -> float:
+        """Mnożnik częstotliwości dla popularnych perfum (1 bez ocen, ok. 2 przy 10 000 ocen)."""
+        return 1.0 + math.log10(1 + max(rating_count or 0, 0)) / 4
+
+    def interval_days(
+        self,
+        previous: Optional[Tuple[Optional[int], Optional[int], Optional[float]]],
+        rating_count: Optional[int],
+        total_votes: Optional[int],
+        crawled_at: float,
+    ) -> float:
+        """Zwraca odstęp (dni) do kolejnego pobrania.
+
+        Args:
+            previous: (ratingCount, suma głosów, czas pobrania) z poprzedniego pobrania lub None
+            rating_count: Aktualna liczba ocen
+            total_votes: Aktualna suma głosów
+            crawled_at: Czas aktualnego pobrania (timestamp)
+        """
+        if previous is None or previous[2] is None:
+            interval = self.initial_interval_days
+        else:
+            previous_rating_count, previous_votes, previous_crawled_at = previous
+            elapsed_days = max((crawled_at - previous_crawled_at) / DAY_SECONDS, 1 / 24)
+            change = max(
+                _relative_change(previous_rating_count, rating_count),
+                _relative_change(previous_votes, total_votes),
+            )
+            # Odstęp, po którym przy obecnym tempie zmian dane zmienią się o target_change
+            interval = self.target_change * elapsed_days / change if change > 0 else self.max_interval_days
+        interval /= self.popularity_factor(rating_count)
+        return min(self.max_interval_days, max(self.min_interval_days, interval))
+
+
+class RecrawlScheduler:
+    """Harmonogram odświeżania zadań w magazynie zadań z codziennym budżetem żądań."""
+
+    def __init__(self, job_store: JobStore, daily_budget: int = 500, policy: Optional[RecrawlPolicy] = None):
+        """
+        Inicjalizuje RecrawlScheduler.
+
+        Args:
+            job_store: Magazyn zadań (harmonogram jest zapisywany w jego bazie)
+            daily_budget: Maksymalna liczba ponownych pobrań na dobę (UTC)
+            policy: Polityka odstępów (domyślnie RecrawlPolicy())
+        """
+        self.job_store = job_store
+        self.daily_budget = daily_budget
+        self.policy = policy or RecrawlPolicy()
+        self.job_store.conn.executescript(BUDGET_SCHEMA)
+        self.job_store.conn.commit()
+
+    def record_crawl(self, url: str, perfume_data: Dict[str, Any], crawled_at: Optional[float] = None) -> float:
+        """Zapisuje liczniki pobranej strony i wyznacza termin kolejnego pobrania. Zwraca ten termin."""
+        crawled_at = crawled_at if crawled_at is not None else time.time()
+        rating_count = perfume_data.get("ratingCount")
+        rating_count = int(rating_count) if isinstance(rating_count, (int, float)) else None
+        total_votes = vote_total(perfume_data)
+
+        # Odczyt bez zapisu bufora - zmiany stanu zadań pozostają zapisywane partiami
+        previous = self.job_store.snapshot(url)
+        interval = self.policy.interval_days(previous, rating_count, total_votes, crawled_at)
+        next_due_at = crawled_at + interval * DAY_SECONDS
+        self.job_store.record_snapshot(url, rating_count, total_votes, crawled_at, next_due_at)
+        return next_due_at
+
+    def last_crawled_at(self, url: str) -> Optional[float]:
+        """Zwraca czas ostatniego zapisanego pobrania URL (None przed pierwszym pobraniem)."""
+        previous = self.job_store.snapshot(url)
+        return previous[2] if previous else None
+
+    @staticmethod
+    def _day(now: float) -> str:
+        return datetime.fromtimestamp(now, timezone.utc).strftime("%Y-%m-%d")
+
+    def budget_used(self, now: Optional[float] = None) -> int:
+        """Zwraca liczbę ponownych pobrań przydzielonych w bieżącej dobie."""
+        row = self.job_store.conn.execute(
+            "SELECT used FROM recrawl_budget WHERE day = ?", (self._day(now or time.time()),)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def due_urls(self, now: Optional[float] = None, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Zwraca przeterminowane perfumy od najbardziej nieaktualnych: (url, przeterminowanie).
+
+        Przeterminowanie to czas od pobrania podzielony przez wyznaczony odstęp (1.0 = termin właśnie minął).
+        """
+        now = now or time.time()
+        self.job_store.flush()
+        query = (
+            "SELECT url, (? - crawled_at) / MAX(next_due_at - crawled_at, 1) AS staleness FROM jobs "
+            "WHERE status = ? AND next_due_at IS NOT NULL AND next_due_at <= ? "
+            "ORDER BY staleness DESC, next_due_at"
+        )
+        params: tuple = (now, STATUS_DONE, now)
+        if limit is not None:
+            query += " LIMIT ?"
+            params += (limit,)
+        return [(url, staleness) for url, staleness in self.job_store.conn.execute(query, params)]
+
+    def enqueue_due(self, now: Optional[float] = None) -> List[str]:
+        """Przywraca do kolejki najbardziej nieaktualne perfumy w ramach pozostałego budżetu doby."""
+        now = now or time.time()
+        remaining = self.daily_budget - self.budget_used(now)
+        if remaining <= 0:
+            return []
+        urls = [url for url, _ in self.due_urls(now, remaining)]
+        if not urls:
+            return []
+        with self.job_store.conn:
+            self.job_store.conn.executemany(
+                "UPDATE jobs SET status = ?, attempts = 0, updated_at = ? WHERE url = ?",
+                [(STATUS_PENDING, now, url) for url in urls],
+            )
+            self.job_store.conn.execute(
+                "INSERT INTO recrawl_budget (day, used) VALUES (?, ?) "
+                "ON CONFLICT(day) DO UPDATE SET used = used + excluded.used",
+                (self._day(now), len(urls)),
+            )
+        return urls
+
+    def stats(self, now: Optional[float] = None) -> Dict[str, object]:
+        """Zwraca wykorzystanie budżetu i liczbę przeterminowanych perfum."""
+        now = now or time.time()
+        self.job_store.flush()
+        overdue = self.job_store.conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = ? AND next_due_at <= ?", (STATUS_DONE, now)
+        ).fetchone()[0]
+        return {"dailyBudget": self.daily_budget, "usedToday": self.budget_used(now), "overdue": overdue}
+
+
+def main():
+    """Narzędzie wiersza poleceń harmonogramu odświeżania."""
+    if len(sys.argv) < 2 or sys.argv[1] not in ("due", "enqueue", "stats"):
+        print(__doc__)
+        sys.exit(1)
+
+    store = JobStore(os.getenv("JOB_STORE_PATH", DEFAULT_JOB_STORE_PATH))
+    scheduler = RecrawlScheduler(store, daily_budget=int(os.getenv("RECRAWL_DAILY_BUDGET", "500")))
+    try:
+        if sys.argv[1] == "due":
+            limit = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+            for url, staleness in scheduler.due_urls(limit=limit):
+                print(f"{staleness:6.2f}  {url}")
+        elif sys.argv[1] == "enqueue":
+            recrawl = scheduler.enqueue_due()
+            print(f"🔁 Do odświeżenia: {len(recrawl)} perfum (wykorzystany budżet dzienny: "
+                  f"{scheduler.budget_used()}/{scheduler.daily_budget})")
+        else:
+            print(json.dumps(scheduler.stats(), indent=2))
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
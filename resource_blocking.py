@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Moduł z profilem blokowania zasobów dla przeglądarki Crawl4AI.
+Przechwytuje żądania strony i przerywa pobieranie obrazów, mediów, czcionek,
+skryptów zewnętrznych, iframe'ów oraz znanych hostów reklam i trackerów,
+zanim zostaną pobrane. Lista dozwolonych adresów per typ zasobu pozwala
+zachować to, czego strona faktycznie potrzebuje.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+
+# Hosty serwisu (pierwsza strona) - ich skrypty i style nie są blokowane
+FIRST_PARTY_HOSTS = ("fragrantica.com", "fragrantica.pl", "fimgs.net")
+
+# Znane hosty reklam i trackerów (dopasowanie po sufiksie domeny)
+AD_TRACKER_HOSTS = (
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googletagservices.com",
+    "adservice.google.com",
+    "amazon-adsystem.com",
+    "adnxs.com",
+    "criteo.com",
+    "criteo.net",
+    "taboola.com",
+    "outbrain.com",
+    "pubmatic.com",
+    "rubiconproject.com",
+    "openx.net",
+    "casalemedia.com",
+    "smartadserver.com",
+    "quantserve.com",
+    "scorecardresearch.com",
+    "facebook.net",
+    "connect.facebook.net",
+    "hotjar.com",
+    "moatads.com",
+    "adsafeprotected.com",
+    "cookielaw.org",
+    "quantcast.com",
+)
+
+# Typy zasobów Playwright blokowane domyślnie
+DEFAULT_BLOCKED_TYPES = ("image", "media", "font")
+
+
+def host_matches(host: str, suffixes: Iterable[str]) -> bool:
+    """Sprawdza czy host jest równy lub jest subdomeną któregoś z podanych hostów."""
+    host = (host or "").lower()
+    for suffix in suffixes:
+        if host == suffix or host.endswith("." + suffix):
+            return True
+    return False
+
+
+class BlockingProfile:
+    """Profil przechwytywania żądań przeglądarki."""
+
+    def __init__(
+        self,
+        blocked_types: Iterable[str] = DEFAULT_BLOCKED_TYPES,
+        block_third_party_scripts: bool = True,
+        block_subframes: bool = True,
+        blocked_hosts: Iterable[str] = AD_TRACKER_HOSTS,
+        first_party_hosts: Iterable[str] = FIRST_PARTY_HOSTS,
+        allowlist: Optional[Dict[str, List[str]]] = None,
+    ):
+        """
+        Inicjalizuje BlockingProfile.
+
+        Args:
+            blocked_types: Typy zasobów blokowane w całości (image, media, font, stylesheet...)
+            block_third_party_scripts: Czy blokować skrypty spoza hostów pierwszej strony
+            block_subframes: Czy blokować dokumenty ładowane w iframe
+            blocked_hosts: Hosty reklam/trackerów blokowane dla wszystkich typów zasobów
+            first_party_hosts: Hosty serwisu
+            allowlist: Mapowanie typ zasobu -> lista wzorców (regex) URL, które są zawsze przepuszczane
+                (np. {"image": [r"/vote"], "stylesheet": [r".*"]})
+        """
+        self.blocked_types = set(blocked_types)
+        self.block_third_party_scripts = block_third_party_scripts
+        self.block_subframes = block_subframes
+        self.blocked_hosts = tuple(blocked_hosts)
+        self.first_party_hosts = tuple(first_party_hosts)
+        self.allowlist = {
+            resource_type: [re.compile(pattern, re.I) for pattern in patterns]
+            for resource_type, patterns in (allowlist or {}).items()
+        }
+        self.blocked_counts: Dict[str, int] = {}
+        self.allowed_count = 0
+
+    def is_allowlisted(self, url: str, resource_type: str) -> bool:
+        """Sprawdza czy URL jest na liście dozwolonych dla danego typu zasobu."""
+        return any(pattern.search(url) for pattern in self.allowlist.get(resource_type, ()))
+
+    def block_reason(self, url: str, resource_type: str, is_subframe: bool = False) -> Optional[str]:
+        """Zwraca powód zablokowania żądania lub None jeśli żądanie ma zostać przepuszczone."""
+        if self.is_allowlisted(url, resource_type):
+            return None
+
+        host = urlparse(url).hostname or ""
+        if host_matches(host, self.blocked_hosts):
+            return "tracker"
+        if resource_type in self.blocked_types:
+            return resource_type
+        if is_subframe and resource_type == "document" and self.block_subframes:
+            return "iframe"
+        if (
+            resource_type == "script"
+            and self.block_third_party_scripts
+            and not host_matches(host, self.first_party_hosts)
+        ):
+            return "third-party-script"
+        return None
+
+    async def handle_route(self, route) -> None:
+        """Handler Playwright dla page.route - przerywa lub przepuszcza żądanie."""
+        request = route.request
+        is_subframe = False
+        try:
+            is_subframe = request.frame.parent_frame is not None
+        except Exception:
+            # Żądania service workerów nie mają ramki
+            pass
+
+        reason = self.block_reason(request.url, request.resource_type, is_subframe)
+        if reason:
+            self.blocked_counts[reason] = self.blocked_counts.get(reason, 0) + 1
+            await route.abort("blockedbyclient")
+        else:
+            self.allowed_count += 1
+            await route.continue_()
+
+    async def install(self, page) -> None:
+        """Włącza przechwytywanie żądań na stronie."""
+        await page.route("**/*", self.handle_route)
+
+    def stats(self) -> Dict[str, int]:
+        """Zwraca liczbę zablokowanych żądań per powód oraz liczbę przepuszczonych."""
+        stats = dict(self.blocked_counts)
+        stats["allowed"] = self.allowed_count
+        return stats
+
+
+def get_blocking_profile(name: str) -> Optional[BlockingProfile]:
+    """Zwraca profil blokowania po nazwie: "off", "default" lub "strict"."""
+    if name == "off":
+        return None
+    if name == "default":
+        return BlockingProfile()
+    if name == "strict":
+        # Dodatkowo bez arkuszy stylów - dane głosowania są w stylach inline
+        return BlockingProfile(blocked_types=DEFAULT_BLOCKED_TYPES + ("stylesheet",))
+    raise ValueError(f"Nieznany profil blokowania: {name}")
@@ -11,7 +11,9 @@ import asyncio
 from typing import List, Optional, Dict
 
 from bs4 import BeautifulSoup
-from crawl4ai import AsyncWebCrawler
+from browser_pool import BrowserPool
+from fetch_backends import FetchBackend
+from html_parser import make_soup
 from vpn_manager import VPNManager
 
 
@@ -106,78 +108,32 @@ def extract_reviews(soup: BeautifulSoup) -> List[str]:
     return reviews
 
 
-async def scrape_reviews(url: str, vpn_manager: Optional[VPNManager] = None) -> List[str]:
+async def scrape_reviews(
+    url: str,
+    vpn_manager: Optional[VPNManager] = None,
+    browser_pool: Optional[BrowserPool] = None,
+    fetcher: Optional[FetchBackend] = None,
+) -> List[str]:
     """Główna funkcja scrapująca recenzje.
     
+    Cienka nakładka na scraper.fetch_perfume_html - recenzje są w tym samym dokumencie
+    co dane perfum (#all-reviews to tylko fragment URL). Aby pobrać dane i recenzje
+    jednym żądaniem, użyj scraper.scrape_perfume_page.
+    
     Args:
         url: URL strony do scrapowania
         vpn_manager: Opcjonalny menedżer VPN
+        browser_pool: Opcjonalna współdzielona pula przeglądarek
+        fetcher: Opcjonalny współdzielony backend pobierania
     """
-    # Dodaj #all-reviews do URL jeśli nie ma
-    if "#all-reviews" not in url:
-        url = url + "#all-reviews"
-    
-    # Upewnij się, że VPN jest połączony
-    if vpn_manager:
-        if not vpn_manager.is_connected():
-            print("🔌 Łączenie z VPN przed scrapowaniem recenzji...")
-            if not await vpn_manager.connect():
-                print("⚠️  Nie udało się połączyć z VPN, kontynuowanie bez VPN...", file=sys.stderr)
+    # Import wewnątrz funkcji - scraper importuje extract_reviews z tego modułu
+    from scraper import fetch_perfume_html
     
-    # Generuj losowe nagłówki
-    headers = get_random_headers()
+    result = await fetch_perfume_html(url, vpn_manager=vpn_manager, browser_pool=browser_pool, fetcher=fetcher)
+    soup = make_soup(result.html)
     
-    # Dodaj losowe opóźnienie przed żądaniem (1-3 sekundy)
-    delay = random.uniform(1.0, 3.0)
-    await asyncio.sleep(delay)
-    
-    # Utwórz nowy crawler (czyści sesję i cookies)
-    async with AsyncWebCrawler(
-        headless=True,
-        verbose=False,
-        # Wyłącz cache i cookies aby uniknąć śledzenia
-        cache_enabled=False,
-    ) as crawler:
-        # Użyj networkidle z dłuższym timeoutem i większym opóźnieniem
-        # aby zapewnić pełne załadowanie JavaScript
-        result = await crawler.arun(
-            url=url,
-            headers=headers,
-            wait_for="networkidle",
-            delay_before_return_html=0.0,  # Brak opóźnienia - maksymalna prędkość
-        )
-        
-        # Sprawdź czy otrzymaliśmy błąd 429
-        if result.status_code == 429:
-            print("⚠️  Otrzymano błąd 429 (Too Many Requests).", file=sys.stderr)
-            if vpn_manager:
-                print("🔄 Zmienianie konfiguracji VPN...", file=sys.stderr)
-                await vpn_manager.reconnect_with_new_config()
-                # Dłuższe oczekiwanie po zmianie VPN (5-10 sekund)
-                wait_time = random.uniform(5.0, 10.0)
-                print(f"⏳ Oczekiwanie {wait_time:.1f}s po zmianie VPN...")
-                await asyncio.sleep(wait_time)
-            raise Exception("Błąd 429: Too Many Requests")
-        
-        if not result.success:
-            # Sprawdź czy błąd zawiera informację o 429
-            if "429" in str(result.error_message) or "too many" in str(result.error_message).lower():
-                if vpn_manager:
-                    print("🔄 Zmienianie konfiguracji VPN...", file=sys.stderr)
-                    await vpn_manager.reconnect_with_new_config()
-                    # Dłuższe oczekiwanie po zmianie VPN (5-10 sekund)
-                    wait_time = random.uniform(5.0, 10.0)
-                    print(f"⏳ Oczekiwanie {wait_time:.1f}s po zmianie VPN...")
-                    await asyncio.sleep(wait_time)
-            raise Exception(f"Nie udało się pobrać strony: {result.error_message}")
-        
-        html = result.html
-        soup = BeautifulSoup(html, "html.parser")
-        
-        # Wyciągnij wszystkie recenzje
-        reviews = extract_reviews(soup)
-        
-        return reviews
+    # Wyciągnij wszystkie recenzje
+    return extract_reviews(soup)
 
 
 async def main():
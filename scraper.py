@@ -4,16 +4,23 @@ Program do scrapowania danych o perfumach ze strony.
 Używa Crawl4AI i BeautifulSoup do pobrania i parsowania danych.
 """
 
+import html as html_module
 import json
+import os
 import re
 import sys
 import random
 import asyncio
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple, Union
 from urllib.parse import urljoin
 
-from bs4 import BeautifulSoup, Tag, NavigableString
-from crawl4ai import AsyncWebCrawler
+from bs4 import BeautifulSoup, CData, Tag, NavigableString
+from browser_pool import BrowserPool
+from fetch_backends import FetchBackend, FetchResult, create_fetcher
+from html_cache import DEFAULT_CACHE_DIR, CachingFetcher, HtmlCache
+from html_parser import CONTENT_REGION_IDS, make_region_soup, make_soup
+from page_archive import PageArchive
+from scrape_reviews import extract_reviews
 from vpn_manager import VPNManager
 
 
@@ -90,37 +97,130 @@ def clean_text(text: str) -> str:
     return " ".join(text.split())
 
 
-def is_404_error_page(html: str, status_code: int = None) -> bool:
-    """Sprawdza czy strona jest stroną błędu 404.
+# Tytuł strony wyciągany bez budowania drzewa DOM (klasyfikacja 404 dużych stron)
+TITLE_PATTERN = re.compile(r"<title[^>]*>(.*?)</title\s*>", re.IGNORECASE | re.DOTALL)
 
-    Args:
-        html: Zawartość HTML strony
-        status_code: Kod statusu HTTP (jeśli dostępny)
 
-    Returns:
-        True jeśli strona jest błędem 404, False w przeciwnym razie
-    """
-    # Jeśli mamy kod statusu 404, to na pewno błąd
-    if status_code == 404:
-        return True
+class PerfumePage:
+    """Pobrana strona perfum z jednym sparsowanym drzewem DOM i zapamiętanymi widokami.
 
-    # Jeśli mamy inny kod statusu błędu (4xx, 5xx), prawdopodobnie błąd
-    if status_code and status_code >= 400:
-        return True
+    Drzewo jest budowane leniwie przy pierwszym użyciu - klasyfikacja 404 dużych stron
+    nie potrzebuje DOM. Ekstraktory i wyszukiwanie #main-content korzystają z drzewa
+    samych regionów treści (content_soup), budowanego raz zamiast całego dokumentu.
+    """
 
-    # Jeśli nie mamy kodu statusu lub jest 200, sprawdzamy zawartość HTML
-    if not html:
+    def __init__(
+        self,
+        html: str,
+        url: Optional[str] = None,
+        parser: Optional[str] = None,
+        soup: Optional[BeautifulSoup] = None,
+    ):
+        """
+        Inicjalizuje PerfumePage.
+
+        Args:
+            html: HTML strony perfum
+            url: URL strony (do budowania absolutnych adresów obrazów)
+            parser: Parser HTML (html_parser.py, domyślnie najszybszy dostępny)
+            soup: Już sparsowane drzewo DOM tego HTML (zamiast parsowania)
+        """
+        self.html = html or ""
+        self.url = url
+        self.parser = parser
+        self._soup: Optional[BeautifulSoup] = soup
+        self._content_soup: Optional[BeautifulSoup] = None
+        self._html_lower: Optional[str] = None
+        self._title: Optional[str] = None
+        self._body_text: Optional[str] = None
+        self._is_404: Optional[bool] = None
+        self._main_content: Optional[Tag] = None
+        self.parse_count = 0
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        """Drzewo DOM strony (parsowane najwyżej raz)."""
+        if self._soup is None:
+            self._soup = make_soup(self.html, self.parser)
+            self.parse_count += 1
+        return self._soup
+
+    @property
+    def content_soup(self) -> BeautifulSoup:
+        """Drzewo DOM samych regionów #main-content i #all-reviews (bez skryptów, iframów i SVG).
+
+        Gdy #main-content nie ma w HTML (lub całe drzewo jest już zbudowane), zwraca soup.
+        """
+        if self._content_soup is None:
+            if self._soup is None:
+                self._content_soup = make_region_soup(self.html, CONTENT_REGION_IDS, self.parser)
+            if self._content_soup is None:
+                self._content_soup = self.soup
+            else:
+                self.parse_count += 1
+        return self._content_soup
+
+    @property
+    def parsed(self) -> bool:
+        """Czy drzewo DOM zostało już zbudowane."""
+        return self._soup is not None
+
+    @property
+    def html_lower(self) -> str:
+        """HTML strony małymi literami."""
+        if self._html_lower is None:
+            self._html_lower = self.html.lower()
+        return self._html_lower
+
+    @property
+    def title(self) -> str:
+        """Znormalizowany tytuł strony małymi literami (z surowego HTML, bez DOM)."""
+        if self._title is None:
+            match = TITLE_PATTERN.search(self.html)
+            self._title = clean_text(html_module.unescape(match.group(1))).lower() if match else ""
+        return self._title
+
+    @property
+    def body_text(self) -> str:
+        """Widoczny tekst body małymi literami (bez skryptów i stylów)."""
+        if self._body_text is None:
+            body = self.soup.find("body")
+            text = ""
+            if body:
+                text = "".join(
+                    string for string in body.find_all(string=True)
+                    if string.parent is None or string.parent.name not in ("script", "style")
+                )
+            self._body_text = clean_text(text).lower()
+        return self._body_text
+
+    @property
+    def is_404(self) -> bool:
+        """Czy treść strony wygląda na stronę błędu 404 (wynik zapamiętany)."""
+        if self._is_404 is None:
+            self._is_404 = _classify_404(self)
+        return self._is_404
+
+    @property
+    def main_content(self) -> Tag:
+        """Element #main-content (lub body jako fallback) - patrz find_main_content."""
+        if self._main_content is None:
+            self._main_content = find_main_content(self.content_soup, self)
+        return self._main_content
+
+
+def _classify_404(page: PerfumePage) -> bool:
+    """Klasyfikuje treść strony jako błąd 404 (najpierw tanie sprawdzenia surowego HTML)."""
+    if not page.html:
         return False
 
-    soup = BeautifulSoup(html, "html.parser")
-    html_lower = html.lower()
+    html = page.html
+    html_lower = page.html_lower
 
     # Sprawdź tytuł strony
-    title = soup.find("title")
-    if title:
-        title_text = clean_text(title.get_text()).lower()
-        if "404" in title_text or "not found" in title_text or "page not found" in title_text:
-            return True
+    title_text = page.title
+    if "404" in title_text or "not found" in title_text or "page not found" in title_text:
+        return True
 
     # Sprawdź czy strona zawiera charakterystyczne elementy błędów 404
     # Szukaj specyficznych wzorców błędów 404, nie tylko słów
@@ -142,17 +242,9 @@ def is_404_error_page(html: str, status_code: int = None) -> bool:
     # ale zawiera słowa kluczowe błędów w widocznej treści (nie w JavaScript)
     if len(html) < 2000 and ("error" in html_lower or "not found" in html_lower):
         # Dodatkowe sprawdzenie - czy to nie jest normalna strona zawierająca te słowa
-        # w JavaScript lub innych niewidocznych elementach
-        body = soup.find("body")
-        if body:
-            # Usuń skrypty przed wyciągnięciem tekstu
-            body_copy = BeautifulSoup(str(body), "html.parser")
-            for script in body_copy.find_all("script"):
-                script.decompose()
-            for style in body_copy.find_all("style"):
-                style.decompose()
-
-            body_text = clean_text(body_copy.get_text()).lower()
+        # w JavaScript lub innych niewidocznych elementach (tekst body bez skryptów i stylów)
+        if page.soup.find("body"):
+            body_text = page.body_text
             # Jeśli główna widoczna treść strony jest bardzo krótka i zawiera specyficzne błędy 404, to prawdopodobnie 404
             error_patterns_in_body = [
                 "404 error", "404 not found", "page not found", "error 404",
@@ -164,28 +256,49 @@ def is_404_error_page(html: str, status_code: int = None) -> bool:
 
     # Sprawdź czy strona nie zawiera podstawowych elementów strony perfum
     # (np. brak nazwy perfum, opisu itp.)
-    if not soup.find("h1", itemprop="name") and not soup.find(id="pyramid"):
-        # Jeśli strona nie zawiera podstawowych elementów perfum
-        # i jest krótka, prawdopodobnie to błąd
-        if len(html) < 5000:
+    # (DOM potrzebny tylko dla krótkich stron - duże strony nie są tu parsowane)
+    if len(html) < 5000:
+        soup = page.soup
+        if not soup.find("h1", itemprop="name") and not soup.find(id="pyramid"):
             return True
 
     return False
 
 
+def is_404_error_page(html: Union[str, PerfumePage], status_code: int = None) -> bool:
+    """Sprawdza czy strona jest stroną błędu 404.
+
+    Args:
+        html: Zawartość HTML strony lub PerfumePage (współdzielone drzewo DOM)
+        status_code: Kod statusu HTTP (jeśli dostępny)
+
+    Returns:
+        True jeśli strona jest błędem 404, False w przeciwnym razie
+    """
+    # Jeśli mamy kod statusu 404, to na pewno błąd
+    if status_code == 404:
+        return True
+
+    # Jeśli mamy inny kod statusu błędu (4xx, 5xx), prawdopodobnie błąd
+    if status_code and status_code >= 400:
+        return True
+
+    # Jeśli nie mamy kodu statusu lub jest 200, sprawdzamy zawartość HTML
+    if not html:
+        return False
+
+    page = html if isinstance(html, PerfumePage) else PerfumePage(html)
+    return page.is_404
+
+
 def remove_unwanted_elements(soup: BeautifulSoup) -> None:
-    """Usuwa wszystkie skrypty, iframy i SVG z HTML."""
-    # Usuń wszystkie skrypty
-    for script in soup.find_all("script"):
-        script.decompose()
-    
-    # Usuń wszystkie iframy
-    for iframe in soup.find_all("iframe"):
-        iframe.decompose()
-    
-    # Usuń wszystkie elementy SVG
-    for svg in soup.find_all("svg"):
-        svg.decompose()
+    """Usuwa wszystkie skrypty, iframy i SVG z HTML.
+
+    Drzewo z PerfumePage.content_soup ich nie zawiera (wycięte przed parsowaniem).
+    """
+    # Jedno przejście drzewa dla wszystkich niechcianych znaczników
+    for element in soup.find_all(["script", "iframe", "svg"]):
+        element.decompose()
 
 
 def extract_perfume_name(soup: BeautifulSoup) -> str:
@@ -412,7 +525,7 @@ def extract_notes(soup: BeautifulSoup) -> Dict[str, List[str]]:
                         # Jeśli nie ma tekstu, spróbuj pobrać bezpośrednio z linka
                         if not note_text:
                             # Usuń link-span z linka
-                            link_copy = BeautifulSoup(str(link), "html.parser")
+                            link_copy = make_soup(str(link))
                             for span in link_copy.find_all(class_="link-span"):
                                 span.decompose()
                             note_text = clean_text(link_copy.get_text())
@@ -858,42 +971,173 @@ def extract_cons(soup: BeautifulSoup) -> List[str]:
     return cons_list[:5]
 
 
-def extract_voting_data(soup: BeautifulSoup, category: str, options_mapping: Dict[str, List[str]]) -> Dict[str, Any]:
-    """Wyciąga dane głosowania dla danej kategorii.
+# Mapowanie nazw kategorii na tytuły sekcji w HTML
+CATEGORY_TITLES: Dict[str, List[str]] = {
+    "longevity": ["LONGEVITY"],
+    "gender": ["GENDER", "PŁEĆ"],
+    "valueForMoney": ["VALUE FOR MONEY", "STOSUNEK JAKOŚĆ/CENA"],
+    "season": ["SEASON", "PORA ROKU"],
+    "timeOfDay": ["TIME OF DAY", "PORA DNIA"],
+    "sillage": ["SILLAGE"],
+}
+
+# Elementy, które mogą być tytułem sekcji, i klasy kontenera sekcji
+HEADING_TAGS = frozenset(("span", "h2", "h3", "h4", "div"))
+SECTION_CLASS_PATTERN = re.compile(r"cell|section|container", re.I)
+
+# Typy tekstu liczone przez get_text() elementów z HEADING_TAGS (bez komentarzy i skryptów)
+_TEXT_STRING_TYPES = (NavigableString, CData)
+
+
+def _collapse_whitespace(text: str) -> str:
+    """Zwija ciągi białych znaków do jednej spacji (zachowując spację na brzegach)."""
+    core = " ".join(text.split())
+    if not core:
+        return " " if text else ""
+    return (" " if text[0].isspace() else "") + core + (" " if text[-1].isspace() else "")
+
+
+def build_heading_index(soup: BeautifulSoup, max_length: int) -> Dict[str, Tag]:
+    """Buduje jednym przejściem indeks: tekst nagłówka (wielkie litery) -> pierwszy element z tym tekstem.
     
-    options_mapping: Dict z angielską nazwą opcji jako kluczem i listą polskich wariantów jako wartością
+    Dla każdego tytułu nie dłuższego niż max_length indeks daje ten sam element co
+    soup.find(tag z HEADING_TAGS i clean_text(tag.get_text()).upper() == tytuł), ale bez
+    wywoływania get_text() dla każdego elementu - teksty elementów są składane od liści
+    do korzenia i porzucane, gdy przekroczą max_length (czas liniowy względem rozmiaru strony).
     """
-    data = {}
-    most_voted_value = None
-    max_votes = 0
-    
-    # Mapowanie nazw kategorii na tytuły w HTML
-    category_titles = {
-        "longevity": ["LONGEVITY"],
-        "gender": ["GENDER", "PŁEĆ"],
-        "valueForMoney": ["VALUE FOR MONEY", "STOSUNEK JAKOŚĆ/CENA"],
-        "season": ["SEASON", "PORA ROKU"],
-        "timeOfDay": ["TIME OF DAY", "PORA DNIA"],
-        "sillage": ["SILLAGE"],
-    }
+    nodes = list(soup.descendants)
+    texts: Dict[int, str] = {}
     
-    # Znajdź sekcję kategorii po tytule
-    category_section = None
-    titles = category_titles.get(category, [category.upper()])
+    # Odwrotna kolejność dokumentu: dzieci przed rodzicami
+    for node in reversed(nodes):
+        if not isinstance(node, Tag):
+            continue
+        pieces = []
+        for child in node.contents:
+            if isinstance(child, Tag):
+                text = texts.get(id(child))
+                if text is None:
+                    break  # Tekst dziecka za długi - rodzica też
+            elif type(child) in _TEXT_STRING_TYPES:
+                text = _collapse_whitespace(child)
+            else:
+                continue
+            pieces.append(text)
+        else:
+            text = _collapse_whitespace("".join(pieces))
+            if len(text.strip()) <= max_length:
+                texts[id(node)] = text
+    
+    # Kolejność dokumentu: pierwszy element z danym tekstem (jak soup.find)
+    index: Dict[str, Tag] = {}
+    for node in nodes:
+        if isinstance(node, Tag) and node.name in HEADING_TAGS:
+            text = texts.get(id(node))
+            if text is not None:
+                index.setdefault(text.strip().upper(), node)
+    return index
+
+
+def find_category_section(
+    soup: BeautifulSoup, category: str, heading_index: Optional[Dict[str, Tag]] = None
+) -> Optional[Tag]:
+    """Znajduje sekcję kategorii głosowania po tytule (kontener tytułu lub None).
+    
+    heading_index: Indeks z build_heading_index (współdzielony przez kategorie strony) -
+        bez niego budowany jest indeks dla tytułów tej kategorii
+    """
+    titles = CATEGORY_TITLES.get(category, [category.upper()])
+    if heading_index is None:
+        heading_index = build_heading_index(soup, max(len(title) for title in titles))
     
     for title in titles:
         # Szukaj span lub innego elementu z tekstem tytułu
-        title_elem = soup.find(lambda tag: tag.name in ["span", "h2", "h3", "h4", "div"] 
-                               and clean_text(tag.get_text()).upper() == title.upper())
+        title_elem = heading_index.get(title.upper())
         if title_elem:
             # Znajdź kontener sekcji (zwykle rodzic lub dziadek)
-            category_section = title_elem.find_parent(class_=re.compile(r"cell|section|container", re.I))
+            category_section = title_elem.find_parent(class_=SECTION_CLASS_PATTERN)
             if not category_section:
                 category_section = title_elem.find_parent("div")
             if category_section:
-                break
+                return category_section
+    return None
+
+
+class VoteLabelMatcher:
+    """Mapowanie etykiet głosów na opcje skompilowane raz (zamiast normalizacji i sortowania przy każdym głosie).
+    
+    Kolejność dopasowań jak dotychczas:
+    1. dokładne dopasowanie po usunięciu spacji (pierwsza opcja i wariant w kolejności mapowania),
+    2. wariant zawarty w etykiecie - opcje od najdłuższego wariantu, w opcji warianty od najdłuższego
+       (żeby "more female" pasowało przed "female").
+    """
+
+    def __init__(self, options_mapping: Dict[str, List[str]]):
+        """
+        Inicjalizuje VoteLabelMatcher.
+
+        Args:
+            options_mapping: Dict z angielską nazwą opcji jako kluczem i listą wariantów etykiet jako wartością
+        """
+        self.options_mapping = options_mapping
+        
+        # Dokładne dopasowania: wariant bez spacji -> opcja (pierwszy wygrywa)
+        self.exact: Dict[str, str] = {}
+        for eng_option, variants in options_mapping.items():
+            for variant in variants:
+                self.exact.setdefault(variant.lower().replace(" ", ""), eng_option)
+        
+        # Częściowe dopasowania w kolejności pierwszeństwa (sortowanie stabilne jak dotychczas)
+        sorted_options = sorted(
+            options_mapping.items(),
+            key=lambda x: max(len(v.replace(" ", "")) for v in x[1]),
+            reverse=True
+        )
+        self.partial: Tuple[Tuple[str, str], ...] = tuple(
+            (variant.lower(), eng_option)
+            for eng_option, variants in sorted_options
+            for variant in sorted(variants, key=lambda v: len(v.replace(" ", "")), reverse=True)
+        )
+
+    @classmethod
+    def of(cls, options_mapping: Union[Dict[str, List[str]], "VoteLabelMatcher"]) -> "VoteLabelMatcher":
+        """Zwraca skompilowane mapowanie (istniejący VoteLabelMatcher bez zmian)."""
+        if isinstance(options_mapping, cls):
+            return options_mapping
+        return cls(options_mapping)
+
+    def match(self, label: str) -> Optional[str]:
+        """Zwraca opcję pasującą do etykiety głosu lub None."""
+        label_lower = label.lower()
+        eng_option = self.exact.get(label_lower.replace(" ", ""))
+        if eng_option is not None:
+            return eng_option
+        # Wariant zawarty w tekście (ale nie na odwrót!)
+        for variant, eng_option in self.partial:
+            if variant in label_lower:
+                return eng_option
+        return None
+
+
+def extract_voting_data(
+    soup: BeautifulSoup,
+    category: str,
+    options_mapping: Union[Dict[str, List[str]], VoteLabelMatcher],
+    heading_index: Optional[Dict[str, Tag]] = None,
+) -> Dict[str, Any]:
+    """Wyciąga dane głosowania dla danej kategorii.
+    
+    options_mapping: Dict z angielską nazwą opcji jako kluczem i listą polskich wariantów jako wartością
+        (lub skompilowany VoteLabelMatcher)
+    heading_index: Opcjonalny indeks tytułów sekcji (build_heading_index)
+    """
+    data = {}
+    most_voted_value = None
+    max_votes = 0
+    matcher = VoteLabelMatcher.of(options_mapping)
     
     # Jeśli nie znaleziono sekcji, szukaj w całym soup
+    category_section = find_category_section(soup, category, heading_index)
     search_soup = category_section if category_section else soup
     
     # Znajdź wszystkie elementy vote-button-name w sekcji
@@ -916,50 +1160,13 @@ def extract_voting_data(soup: BeautifulSoup, category: str, options_mapping: Dic
                 if numbers:
                     vote_count = int(numbers[0])
                     
-                    # Sprawdź, która opcja pasuje
-                    # Strategia: najpierw dokładne dopasowania, potem częściowe (najdłuższe najpierw)
-                    matched = False
-                    vote_name_lower = vote_name_text.lower()
-                    vote_name_normalized = vote_name_lower.replace(" ", "")
-                    
-                    # KROK 1: Sprawdź dokładne dopasowania (po normalizacji spacji)
-                    for eng_option, variants in options_mapping.items():
-                        for variant in variants:
-                            variant_normalized = variant.lower().replace(" ", "")
-                            if variant_normalized == vote_name_normalized:
-                                data[eng_option] = vote_count
-                                if vote_count > max_votes:
-                                    max_votes = vote_count
-                                    most_voted_value = eng_option
-                                matched = True
-                                break
-                        if matched:
-                            break
-                    
-                    # KROK 2: Jeśli nie znaleziono dokładnego, sprawdź częściowe dopasowania
-                    # Sortuj opcje od najdłuższych wariantów do najkrótszych (żeby "more female" pasowało przed "female")
-                    if not matched:
-                        sorted_options = sorted(
-                            options_mapping.items(),
-                            key=lambda x: max(len(v.replace(" ", "")) for v in x[1]),
-                            reverse=True
-                        )
-                        for eng_option, variants in sorted_options:
-                            # Sortuj warianty od najdłuższych do najkrótszych
-                            sorted_variants = sorted(variants, key=lambda v: len(v.replace(" ", "")), reverse=True)
-                            for variant in sorted_variants:
-                                variant_lower = variant.lower()
-                                # Sprawdź czy wariant jest zawarty w tekście (ale nie na odwrót!)
-                                # To zapobiega dopasowaniu "kobieta" do "kobieta / unisex"
-                                if variant_lower in vote_name_lower:
-                                    data[eng_option] = vote_count
-                                    if vote_count > max_votes:
-                                        max_votes = vote_count
-                                        most_voted_value = eng_option
-                                    matched = True
-                                    break
-                            if matched:
-                                break
+                    # Sprawdź, która opcja pasuje (dokładnie, potem częściowo - najdłuższe najpierw)
+                    eng_option = matcher.match(vote_name_text)
+                    if eng_option is not None:
+                        data[eng_option] = vote_count
+                        if vote_count > max_votes:
+                            max_votes = vote_count
+                            most_voted_value = eng_option
     
     if most_voted_value and max_votes > 0:
         data["mostVoted"] = most_voted_value
@@ -967,40 +1174,27 @@ def extract_voting_data(soup: BeautifulSoup, category: str, options_mapping: Dic
     return data
 
 
-def extract_percentage_width_data(soup: BeautifulSoup, category: str, options_mapping: Dict[str, List[str]]) -> Dict[str, Any]:
+def extract_percentage_width_data(
+    soup: BeautifulSoup,
+    category: str,
+    options_mapping: Union[Dict[str, List[str]], VoteLabelMatcher],
+    heading_index: Optional[Dict[str, Tag]] = None,
+) -> Dict[str, Any]:
     """Wyciąga wartości procentowe width dla danej kategorii (season, timeOfDay).
     
     Szuka elementów z vote-button-legend i odpowiadających im wartości width w stylach.
     
     options_mapping: Dict z angielską nazwą opcji jako kluczem i listą wariantów jako wartością
+        (lub skompilowany VoteLabelMatcher)
+    heading_index: Opcjonalny indeks tytułów sekcji (build_heading_index)
     """
     data = {}
     most_voted_value = None
     max_percentage = 0.0
-    
-    # Mapowanie nazw kategorii na tytuły w HTML
-    category_titles = {
-        "season": ["SEASON", "PORA ROKU"],
-        "timeOfDay": ["TIME OF DAY", "PORA DNIA"],
-    }
-    
-    # Znajdź sekcję kategorii po tytule
-    category_section = None
-    titles = category_titles.get(category, [category.upper()])
-    
-    for title in titles:
-        # Szukaj span lub innego elementu z tekstem tytułu
-        title_elem = soup.find(lambda tag: tag.name in ["span", "h2", "h3", "h4", "div"] 
-                               and clean_text(tag.get_text()).upper() == title.upper())
-        if title_elem:
-            # Znajdź kontener sekcji (zwykle rodzic lub dziadek)
-            category_section = title_elem.find_parent(class_=re.compile(r"cell|section|container", re.I))
-            if not category_section:
-                category_section = title_elem.find_parent("div")
-            if category_section:
-                break
+    matcher = VoteLabelMatcher.of(options_mapping)
     
     # Jeśli nie znaleziono sekcji, szukaj w całym soup
+    category_section = find_category_section(soup, category, heading_index)
     search_soup = category_section if category_section else soup
     
     # Znajdź wszystkie elementy vote-button-legend w sekcji
@@ -1031,44 +1225,12 @@ def extract_percentage_width_data(soup: BeautifulSoup, category: str, options_ma
                             width_percent = float(width_match.group(1))
                             
                             # Sprawdź, która opcja pasuje
-                            matched = False
-                            legend_lower = legend_text.lower()
-                            legend_normalized = legend_lower.replace(" ", "")
-                            
-                            # KROK 1: Sprawdź dokładne dopasowania
-                            for eng_option, variants in options_mapping.items():
-                                for variant in variants:
-                                    variant_normalized = variant.lower().replace(" ", "")
-                                    if variant_normalized == legend_normalized:
-                                        data[eng_option] = width_percent
-                                        if width_percent > max_percentage:
-                                            max_percentage = width_percent
-                                            most_voted_value = eng_option
-                                        matched = True
-                                        break
-                                if matched:
-                                    break
-                            
-                            # KROK 2: Jeśli nie znaleziono dokładnego, sprawdź częściowe dopasowania
-                            if not matched:
-                                sorted_options = sorted(
-                                    options_mapping.items(),
-                                    key=lambda x: max(len(v.replace(" ", "")) for v in x[1]),
-                                    reverse=True
-                                )
-                                for eng_option, variants in sorted_options:
-                                    sorted_variants = sorted(variants, key=lambda v: len(v.replace(" ", "")), reverse=True)
-                                    for variant in sorted_variants:
-                                        variant_lower = variant.lower()
-                                        if variant_lower in legend_lower:
-                                            data[eng_option] = width_percent
-                                            if width_percent > max_percentage:
-                                                max_percentage = width_percent
-                                                most_voted_value = eng_option
-                                            matched = True
-                                            break
-                                    if matched:
-                                        break
+                            eng_option = matcher.match(legend_text)
+                            if eng_option is not None:
+                                data[eng_option] = width_percent
+                                if width_percent > max_percentage:
+                                    max_percentage = width_percent
+                                    most_voted_value = eng_option
                             break
     
     if most_voted_value and max_percentage > 0:
@@ -1077,82 +1239,114 @@ def extract_percentage_width_data(soup: BeautifulSoup, category: str, options_ma
     return data
 
 
+# Kategorie głosowania: nazwa -> (rodzaj danych, mapowanie opcji na warianty etykiet)
+# "votes" - liczby głosów (extract_voting_data), "percent" - szerokość paska (extract_percentage_width_data)
+VOTING_CATEGORIES: Dict[str, Tuple[str, Dict[str, List[str]]]] = {
+    "longevity": (
+        "votes",
+        {
+            "veryWeak": ["very weak", "bardzo słaba"],
+            "weak": ["weak", "słaba"],
+            "moderate": ["moderate", "przeciętna"],
+            "longLasting": ["long lasting", "długotrwała"],
+            "eternal": ["eternal", "wieczna"],
+        },
+    ),
+    "gender": (
+        "votes",
+        {
+            # Ważne: kolejność i długość wariantów jest istotna - dłuższe/more specyficzne najpierw
+            "moreFemale": ["more female", "morefemale", "more feminine"],
+            "female": ["female", "kobieta", "feminine", "woman", "women", "kobiet", "for women"],
+            "unisex": ["unisex", "uni-sex"],
+            "moreMale": ["more male", "moremale", "more masculine"],
+            "male": ["male", "mężczyzna", "masculine", "man", "men", "mężczyzn", "for men"],
+        },
+    ),
+    "valueForMoney": (
+        "votes",
+        {
+            "priceTooHigh": ["way overpriced", "cena za wysoka", "price too high"],
+            "overpriced": ["overpriced", "zawyżona cena"],
+            "fair": ["ok", "fair"],
+            "goodQuality": ["good value", "dobra jakość", "good quality"],
+            "excellentQuality": ["great value", "doskonała jakość", "excellent quality"],
+        },
+    ),
+    "season": (
+        "percent",
+        {
+            "winter": ["winter", "zima"],
+            "spring": ["spring", "wiosna"],
+            "summer": ["summer", "lato"],
+            "fall": ["fall", "autumn", "jesień"],
+        },
+    ),
+    "timeOfDay": (
+        "percent",
+        {
+            "day": ["day", "dzień"],
+            "night": ["night", "noc", "evening", "wieczór"],
+        },
+    ),
+    "sillage": (
+        "votes",
+        {
+            "intimate": ["intimate"],
+            "moderate": ["moderate"],
+            "strong": ["strong"],
+            "enormous": ["enormous"],
+        },
+    ),
+}
+
+
+# Mapowania etykiet głosów skompilowane przy imporcie
+VOTE_LABEL_MATCHERS: Dict[str, VoteLabelMatcher] = {
+    category: VoteLabelMatcher(options_mapping) for category, (_, options_mapping) in VOTING_CATEGORIES.items()
+}
+
+# Najdłuższy tytuł sekcji kategorii (granica tekstu w indeksie nagłówków)
+HEADING_MAX_LENGTH = max(
+    len(title)
+    for category in VOTING_CATEGORIES
+    for title in CATEGORY_TITLES.get(category, [category.upper()])
+)
+
+
 def extract_all_voting_data(soup: BeautifulSoup) -> Dict[str, Dict[str, Any]]:
-    """Wyciąga wszystkie dane głosowania."""
+    """Wyciąga wszystkie dane głosowania (indeks tytułów sekcji budowany raz dla strony)."""
+    extractors = {"votes": extract_voting_data, "percent": extract_percentage_width_data}
+    heading_index = build_heading_index(soup, HEADING_MAX_LENGTH)
     return {
-        "longevity": extract_voting_data(
-            soup,
-            "longevity",
-            {
-                "veryWeak": ["very weak", "bardzo słaba"],
-                "weak": ["weak", "słaba"],
-                "moderate": ["moderate", "przeciętna"],
-                "longLasting": ["long lasting", "długotrwała"],
-                "eternal": ["eternal", "wieczna"],
-            },
-        ),
-        "gender": extract_voting_data(
-            soup,
-            "gender",
-            {
-                # Ważne: kolejność i długość wariantów jest istotna - dłuższe/more specyficzne najpierw
-                "moreFemale": ["more female", "morefemale", "more feminine"],
-                "female": ["female", "kobieta", "feminine", "woman", "women", "kobiet", "for women"],
-                "unisex": ["unisex", "uni-sex"],
-                "moreMale": ["more male", "moremale", "more masculine"],
-                "male": ["male", "mężczyzna", "masculine", "man", "men", "mężczyzn", "for men"],
-            },
-        ),
-        "valueForMoney": extract_voting_data(
-            soup,
-            "valueForMoney",
-            {
-                "priceTooHigh": ["way overpriced", "cena za wysoka", "price too high"],
-                "overpriced": ["overpriced", "zawyżona cena"],
-                "fair": ["ok", "fair"],
-                "goodQuality": ["good value", "dobra jakość", "good quality"],
-                "excellentQuality": ["great value", "doskonała jakość", "excellent quality"],
-            },
-        ),
-        "season": extract_percentage_width_data(
-            soup,
-            "season",
-            {
-                "winter": ["winter", "zima"],
-                "spring": ["spring", "wiosna"],
-                "summer": ["summer", "lato"],
-                "fall": ["fall", "autumn", "jesień"],
-            },
-        ),
-        "timeOfDay": extract_percentage_width_data(
-            soup,
-            "timeOfDay",
-            {
-                "day": ["day", "dzień"],
-                "night": ["night", "noc", "evening", "wieczór"],
-            },
-        ),
-        "sillage": extract_voting_data(
-            soup,
-            "sillage",
-            {
-                "intimate": ["intimate"],
-                "moderate": ["moderate"],
-                "strong": ["strong"],
-                "enormous": ["enormous"],
-            },
-        ),
+        category: extractors[kind](soup, category, VOTE_LABEL_MATCHERS[category], heading_index)
+        for category, (kind, _) in VOTING_CATEGORIES.items()
     }
 
 
-async def scrape_perfume_data(url: str, max_retries: int = 3, vpn_manager: Optional[VPNManager] = None) -> Dict[str, Any]:
-    """Główna funkcja scrapująca dane o perfumach.
+async def fetch_perfume_html(
+    url: str,
+    max_retries: int = 3,
+    vpn_manager: Optional[VPNManager] = None,
+    browser_pool: Optional[BrowserPool] = None,
+    fetcher: Optional[FetchBackend] = None,
+) -> FetchResult:
+    """Pobiera HTML strony perfum z obsługą ponownych prób (429, 404, błędy sieci).
     
     Args:
-        url: URL strony do scrapowania
+        url: URL strony do pobrania
         max_retries: Maksymalna liczba prób przy błędach 429
         vpn_manager: Opcjonalny menedżer VPN
+        browser_pool: Opcjonalna współdzielona pula przeglądarek (używana gdy nie podano fetcher)
+        fetcher: Opcjonalny współdzielony backend pobierania (jeśli None, tworzony tymczasowo:
+            HTTP z przejściem na przeglądarkę)
+    
+    Returns:
+        FetchResult z HTML pobranej strony i informacją o użytym backendzie
     """
+    # Fragment (#all-reviews) nie jest wysyłany do serwera - pobieramy zawsze ten sam dokument
+    url = url.split("#", 1)[0]
+    
     # Upewnij się, że VPN jest połączony
     if vpn_manager:
         if not vpn_manager.is_connected():
@@ -1160,32 +1354,25 @@ async def scrape_perfume_data(url: str, max_retries: int = 3, vpn_manager: Optio
             if not await vpn_manager.connect():
                 print("⚠️  Nie udało się połączyć z VPN, kontynuowanie bez VPN...", file=sys.stderr)
     
-    for attempt in range(max_retries):
-        try:
-            # Generuj nowe losowe nagłówki dla każdej próby
-            headers = get_random_headers()
-            
-            # Dodaj losowe opóźnienie przed żądaniem (1-5 sekund)
-            if attempt > 0:
-                delay = random.uniform(2.0, 5.0)
-                print(f"⏳ Oczekiwanie {delay:.1f}s przed ponowną próbą...")
-                await asyncio.sleep(delay)
-            
-            # Utwórz nowy crawler dla każdej próby (czyści sesję i cookies)
-            async with AsyncWebCrawler(
-                headless=True,
-                verbose=False,
-                # Wyłącz cache i cookies aby uniknąć śledzenia
-                cache_enabled=False,
-            ) as crawler:
-                # Użyj networkidle z dłuższym timeoutem i większym opóźnieniem
-                # aby zapewnić pełne załadowanie JavaScript
-                result = await crawler.arun(
-                    url=url,
-                    headers=headers,
-                    wait_for="networkidle",  # Czekaj na zakończenie ładowania sieci
-                    delay_before_return_html=0.0,  # Brak opóźnienia - maksymalna prędkość
-                )
+    # Jeśli nie przekazano backendu, utwórz tymczasowy (jeden klient/przeglądarka na wszystkie próby)
+    own_fetcher = fetcher is None
+    if own_fetcher:
+        fetcher = create_fetcher("auto", browser_pool)
+    
+    try:
+        for attempt in range(max_retries):
+            try:
+                # Generuj nowe losowe nagłówki dla każdej próby
+                headers = get_random_headers()
+                
+                # Dodaj losowe opóźnienie przed żądaniem (1-5 sekund)
+                if attempt > 0:
+                    delay = random.uniform(2.0, 5.0)
+                    print(f"⏳ Oczekiwanie {delay:.1f}s przed ponowną próbą...")
+                    await asyncio.sleep(delay)
+                
+                # Pobierz stronę (HTTP, a przeglądarką z puli gdy w HTML brakuje wymaganych sekcji)
+                result = await fetcher.fetch(url, headers=headers)
                 
                 # Sprawdź czy otrzymaliśmy błąd 429
                 if result.status_code == 429:
@@ -1221,7 +1408,10 @@ async def scrape_perfume_data(url: str, max_retries: int = 3, vpn_manager: Optio
                 
                 # Sprawdź czy strona zwróciła błąd 404 lub podobny
                 html = result.html
-                if html and is_404_error_page(html, getattr(result, 'status_code', None)):
+                # Strona jest współdzielona z parsowaniem (drzewo DOM budowane najwyżej raz)
+                page = PerfumePage(html, url) if html else None
+                result.page = page
+                if html and is_404_error_page(page, getattr(result, 'status_code', None)):
                     # W przypadku błędu 404, zmień VPN i spróbuj ponownie
                     if vpn_manager:
                         print("🔄 Strona zwróciła błąd (404 lub podobny), zmienianie konfiguracji VPN...", file=sys.stderr)
@@ -1236,58 +1426,70 @@ async def scrape_perfume_data(url: str, max_retries: int = 3, vpn_manager: Optio
                 # Jeśli dotarliśmy tutaj, request był udany
                 break
                 
-        except Exception as e:
-            # Jeśli to ostatnia próba, rzuć wyjątek
-            if attempt == max_retries - 1:
-                raise
-            
-            # Sprawdź czy błąd zawiera informację o 429 lub problemach z siecią
-            error_str = str(e).lower()
-            if "429" in error_str or "too many" in error_str or "rate limit" in error_str:
-                print(f"⚠️  Wykryto błąd rate limiting. Próba ponowna...", file=sys.stderr)
-                
-                # W przypadku błędu rate limiting, zmień konfigurację VPN i poczekaj dłużej
-                if vpn_manager:
-                    print("🔄 Zmienianie konfiguracji VPN...", file=sys.stderr)
-                    await vpn_manager.reconnect_with_new_config()
-                    # Dłuższe oczekiwanie po zmianie VPN (5-10 sekund)
-                    wait_time = random.uniform(5.0, 10.0)
-                    print(f"⏳ Oczekiwanie {wait_time:.1f}s po zmianie VPN...")
-                    await asyncio.sleep(wait_time)
-                
-                continue
-            elif "network" in error_str or "connection" in error_str or "timeout" in error_str:
-                # W przypadku problemów z siecią, spróbuj zmienić VPN
-                if vpn_manager:
-                    print("🔄 Problem z siecią, zmienianie konfiguracji VPN...", file=sys.stderr)
-                    await vpn_manager.reconnect_with_new_config()
-                    wait_time = random.uniform(3.0, 6.0)
-                    await asyncio.sleep(wait_time)
-                    continue
-                else:
+            except Exception as e:
+                # Jeśli to ostatnia próba, rzuć wyjątek
+                if attempt == max_retries - 1:
                     raise
-            elif "404" in error_str or "not found" in error_str or "strona zwróciła błąd" in error_str:
-                # W przypadku błędu 404, zmień VPN i spróbuj ponownie
-                if vpn_manager:
-                    print("🔄 Strona zwróciła błąd (404 lub podobny), zmienianie konfiguracji VPN...", file=sys.stderr)
-                    await vpn_manager.reconnect_with_new_config()
-                    wait_time = random.uniform(2.0, 4.0)
-                    await asyncio.sleep(wait_time)
+                
+                # Sprawdź czy błąd zawiera informację o 429 lub problemach z siecią
+                error_str = str(e).lower()
+                if "429" in error_str or "too many" in error_str or "rate limit" in error_str:
+                    print(f"⚠️  Wykryto błąd rate limiting. Próba ponowna...", file=sys.stderr)
+                    
+                    # W przypadku błędu rate limiting, zmień konfigurację VPN i poczekaj dłużej
+                    if vpn_manager:
+                        print("🔄 Zmienianie konfiguracji VPN...", file=sys.stderr)
+                        await vpn_manager.reconnect_with_new_config()
+                        # Dłuższe oczekiwanie po zmianie VPN (5-10 sekund)
+                        wait_time = random.uniform(5.0, 10.0)
+                        print(f"⏳ Oczekiwanie {wait_time:.1f}s po zmianie VPN...")
+                        await asyncio.sleep(wait_time)
+                    
                     continue
+                elif "network" in error_str or "connection" in error_str or "timeout" in error_str:
+                    # W przypadku problemów z siecią, spróbuj zmienić VPN
+                    if vpn_manager:
+                        print("🔄 Problem z siecią, zmienianie konfiguracji VPN...", file=sys.stderr)
+                        await vpn_manager.reconnect_with_new_config()
+                        wait_time = random.uniform(3.0, 6.0)
+                        await asyncio.sleep(wait_time)
+                        continue
+                    else:
+                        raise
+                elif "404" in error_str or "not found" in error_str or "strona zwróciła błąd" in error_str:
+                    # W przypadku błędu 404, zmień VPN i spróbuj ponownie
+                    if vpn_manager:
+                        print("🔄 Strona zwróciła błąd (404 lub podobny), zmienianie konfiguracji VPN...", file=sys.stderr)
+                        await vpn_manager.reconnect_with_new_config()
+                        wait_time = random.uniform(2.0, 4.0)
+                        await asyncio.sleep(wait_time)
+                        continue
+                    else:
+                        raise
                 else:
+                    # Jeśli to inny błąd, rzuć wyjątek od razu
                     raise
-            else:
-                # Jeśli to inny błąd, rzuć wyjątek od razu
-                raise
+        
+    finally:
+        if own_fetcher:
+            await fetcher.close()
     
     # Jeśli dotarliśmy tutaj, oznacza to że request był udany
     # (gdyby wszystkie próby się nie powiodły, wyjątek zostałby rzucony wcześniej)
-    html = result.html
-    soup = BeautifulSoup(html, "html.parser")
+    return result
+
+
+def find_main_content(soup: BeautifulSoup, html: Union[str, PerfumePage]) -> Tag:
+    """Znajduje element #main-content (lub body jako fallback).
     
-    # Znajdź element #main-content - spróbuj kilka razy z opóźnieniem jeśli nie znaleziono
+    Rzuca wyjątek jeśli strona jest pusta, jest stroną błędu lub nie ma treści.
+    Przekazanie PerfumePage zamiast HTML pozwala sprawdzić błąd 404 na tym samym drzewie DOM.
+    """
     main_content = soup.find(id="main-content")
     if not main_content:
+        # Sprawdzenie 404 na już sparsowanym drzewie (bez ponownego parsowania HTML)
+        page = html if isinstance(html, PerfumePage) else PerfumePage(html, soup=soup)
+        html = page.html
         # Jeśli nie znaleziono, spróbuj użyć całego body jako fallback
         # lub sprawdź czy HTML w ogóle został pobrany
         if not html or len(html) < 100:
@@ -1295,17 +1497,25 @@ async def scrape_perfume_data(url: str, max_retries: int = 3, vpn_manager: Optio
         
         # Sprawdź czy strona została przekierowana lub czy jest błąd
         # (to sprawdzenie jest już wykonane w pętli retry, ale zostawiamy jako dodatkowe zabezpieczenie)
-        if is_404_error_page(html):
+        if is_404_error_page(page):
             raise Exception("Strona zwróciła błąd (404 lub podobny)")
         
-        # Spróbuj użyć body jako fallback
+        # Spróbuj użyć body jako fallback - a gdy go nie ma (html.parser nie dodaje body
+        # do fragmentów HTML, w przeciwieństwie do lxml i html5lib), całego dokumentu
         body = soup.find("body")
+        if body is None and soup.find(True) is not None:
+            body = soup
         if body:
             print("⚠️  Ostrzeżenie: Nie znaleziono #main-content, używam body jako fallback", file=sys.stderr)
             main_content = body
         else:
             raise Exception("Nie znaleziono elementu #main-content ani body. Strona może wymagać JavaScript lub być zablokowana.")
     
+    return main_content
+
+
+def extract_perfume_details(main_content: Tag, url: str) -> Dict[str, Any]:
+    """Wyciąga dane o perfumach z elementu #main-content (BEZ recenzji)."""
     # Usuń niechciane elementy
     remove_unwanted_elements(main_content)
     
@@ -1332,10 +1542,140 @@ async def scrape_perfume_data(url: str, max_retries: int = 3, vpn_manager: Optio
     return perfume_data
 
 
+def as_perfume_page(html: Union[str, PerfumePage], url: Optional[str] = None, parser: Optional[str] = None) -> PerfumePage:
+    """Zwraca PerfumePage dla HTML (istniejąca strona jest używana bez ponownego parsowania)."""
+    if isinstance(html, PerfumePage):
+        return html
+    return PerfumePage(html, url, parser)
+
+
+def parse_perfume_page(
+    html: Union[str, PerfumePage], url: str, include_reviews: bool = True, parser: Optional[str] = None
+) -> Dict[str, Any]:
+    """Parsuje HTML strony perfum raz i wyciąga z niego dane oraz recenzje.
+    
+    Args:
+        html: HTML strony perfum lub PerfumePage (np. już sparsowana przy sprawdzaniu 404)
+        url: URL strony (do budowania absolutnych adresów obrazów)
+        include_reviews: Czy dodać recenzje pod kluczem "review"
+        parser: Parser HTML (html_parser.py, domyślnie najszybszy dostępny)
+    """
+    page = as_perfume_page(html, url, parser)
+    
+    # Recenzje wyciągamy przed usunięciem niechcianych elementów z #main-content
+    reviews = extract_reviews(page.content_soup) if include_reviews else None
+    
+    main_content = page.main_content
+    perfume_data = extract_perfume_details(main_content, url)
+    
+    if include_reviews:
+        perfume_data["review"] = reviews
+    
+    return perfume_data
+
+
+# Sekcje strony zapisywane jako osobne punkty kontrolne (checkpoint_store.py)
+SECTION_DETAILS = "details"
+SECTION_REVIEWS = "reviews"
+PAGE_SECTIONS = (SECTION_DETAILS, SECTION_REVIEWS)
+
+
+def parse_perfume_sections(
+    html: Union[str, PerfumePage], url: str, sections: Tuple[str, ...] = PAGE_SECTIONS, parser: Optional[str] = None
+) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """Parsuje HTML strony perfum raz i wyciąga wybrane sekcje niezależnie od siebie.
+    
+    Błąd jednej sekcji nie przerywa pozostałych - zwraca (dane sekcji, błędy sekcji).
+    
+    Args:
+        html: HTML strony perfum lub PerfumePage
+        url: URL strony (do budowania absolutnych adresów obrazów)
+        sections: Sekcje do wyciągnięcia (SECTION_DETAILS, SECTION_REVIEWS)
+        parser: Parser HTML (html_parser.py, domyślnie najszybszy dostępny)
+    """
+    page = as_perfume_page(html, url, parser)
+    results: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+    
+    # Recenzje wyciągamy przed usunięciem niechcianych elementów z #main-content
+    if SECTION_REVIEWS in sections:
+        try:
+            results[SECTION_REVIEWS] = extract_reviews(page.content_soup)
+        except Exception as e:
+            errors[SECTION_REVIEWS] = f"{type(e).__name__}: {e}"
+    
+    if SECTION_DETAILS in sections:
+        try:
+            results[SECTION_DETAILS] = extract_perfume_details(page.main_content, url)
+        except Exception as e:
+            errors[SECTION_DETAILS] = f"{type(e).__name__}: {e}"
+    
+    return results, errors
+
+
+async def scrape_perfume_data(
+    url: str,
+    max_retries: int = 3,
+    vpn_manager: Optional[VPNManager] = None,
+    browser_pool: Optional[BrowserPool] = None,
+    fetcher: Optional[FetchBackend] = None,
+) -> Dict[str, Any]:
+    """Główna funkcja scrapująca dane o perfumach (bez recenzji).
+    
+    Args:
+        url: URL strony do scrapowania
+        max_retries: Maksymalna liczba prób przy błędach 429
+        vpn_manager: Opcjonalny menedżer VPN
+        browser_pool: Opcjonalna współdzielona pula przeglądarek
+        fetcher: Opcjonalny współdzielony backend pobierania
+    """
+    result = await fetch_perfume_html(url, max_retries, vpn_manager, browser_pool, fetcher)
+    perfume_data = parse_perfume_page(result.page or result.html, url, include_reviews=False)
+    perfume_data["scrapeMeta"] = result.meta()
+    return perfume_data
+
+
+async def scrape_perfume_page(
+    url: str,
+    max_retries: int = 3,
+    vpn_manager: Optional[VPNManager] = None,
+    browser_pool: Optional[BrowserPool] = None,
+    fetcher: Optional[FetchBackend] = None,
+    parse_executor=None,
+) -> Dict[str, Any]:
+    """Pobiera stronę perfum jeden raz i zwraca dane razem z recenzjami (klucz "review").
+    
+    Args:
+        url: URL strony do scrapowania
+        max_retries: Maksymalna liczba prób przy błędach 429
+        vpn_manager: Opcjonalny menedżer VPN
+        browser_pool: Opcjonalna współdzielona pula przeglądarek
+        fetcher: Opcjonalny współdzielony backend pobierania
+        parse_executor: Opcjonalny ParseExecutor (parse_executor.py) - bez niego strona jest
+            parsowana w bieżącym procesie
+    """
+    result = await fetch_perfume_html(url, max_retries, vpn_manager, browser_pool, fetcher)
+    if parse_executor is not None:
+        perfume_data = await parse_executor.parse(result.html, url)
+    else:
+        perfume_data = parse_perfume_page(result.page or result.html, url)
+    # Zapisz który backend obsłużył stronę (do mierzenia skuteczności HTTP)
+    perfume_data["scrapeMeta"] = result.meta()
+    return perfume_data
+
+
 async def main():
-    """Główna funkcja programu."""
-    if len(sys.argv) > 1:
-        url = sys.argv[1]
+    """Główna funkcja programu.
+    
+    Użycie: python scraper.py [--replay] [URL]
+    Z --replay strona jest czytana z cache HTML (bez sieci),
+    a gdy ustawiono PAGE_ARCHIVE_DIR - z archiwum segmentów.
+    """
+    args = [arg for arg in sys.argv[1:] if arg != "--replay"]
+    replay = "--replay" in sys.argv[1:]
+    
+    if args:
+        url = args[0]
     else:
         url = input("Podaj URL strony do scrapowania: ").strip()
     
@@ -1348,8 +1688,18 @@ async def main():
     
     print(f"Scrapowanie strony: {url}")
     
+    # Cache HTML: zapis pobranych stron, a w trybie replay jedyne źródło HTML
+    cache = HtmlCache(os.getenv("HTML_CACHE_DIR", DEFAULT_CACHE_DIR))
+    if replay:
+        print("♻️  Tryb replay - HTML z cache, bez sieci")
+        archive_dir = os.getenv("PAGE_ARCHIVE_DIR")
+        fetcher = CachingFetcher(None, PageArchive(archive_dir) if archive_dir else cache, replay=True)
+    else:
+        fetcher = CachingFetcher(create_fetcher("auto"), cache)
+    
     try:
-        data = await scrape_perfume_data(url)
+        # Jedno pobranie strony - dane i recenzje z tego samego HTML
+        data = await scrape_perfume_page(url, fetcher=fetcher)
         
         # Zapisz do output.js
         output_file = "output.js"
@@ -1445,33 +1795,13 @@ async def main():
         except Exception as e:
             print(f"⚠️  Błąd podczas uruchamiania testów 'People who like this also like': {e}")
         
-        # Po zakończeniu wszystkich testów, uruchom scrape_reviews.py
-        print("\n" + "=" * 50)
-        print("Uruchamianie scrape_reviews.py...")
-        print("=" * 50)
-        
-        try:
-            import subprocess
-            result = subprocess.run(
-                [sys.executable, "scrape_reviews.py", url],
-                capture_output=True,
-                text=True,
-                encoding="utf-8"
-            )
-            if result.stdout:
-                print(result.stdout)
-            if result.stderr:
-                print(result.stderr, file=sys.stderr)
-            if result.returncode != 0:
-                print(f"⚠️  Błąd: scrape_reviews.py zakończył się z kodem {result.returncode}")
-        except Exception as e:
-            print(f"⚠️  Błąd podczas uruchamiania scrape_reviews.py: {e}")
-            import traceback
-            traceback.print_exc()
+        print(f"\n✓ Znaleziono {len(data.get('review', []))} recenzji (z tego samego pobrania strony)")
         
     except Exception as e:
         print(f"Błąd: {e}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        await fetcher.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Test pomiaru RSS przeglądarek i recyklingu puli (procesy i zegar testowe, bez uruchamiania Chromium)."""
+
+import asyncio
+
+from browser_pool import BrowserPool, browser_tree_rss
+
+
+MB = 1024 * 1024
+
+
+class FakeMemoryInfo:
+    """Wynik memory_info() z polem rss."""
+
+    def __init__(self, rss: int):
+        self.rss = rss
+
+
+class FakeProcess:
+    """Proces testowy z polami psutil.Process używanymi przez pulę."""
+
+    def __init__(self, pid: int, name: str, cmdline: list, rss_mb: float, children: list = ()):
+        self.pid = pid
+        self._name = name
+        self._cmdline = cmdline
+        self._rss = int(rss_mb * MB)
+        self._children = list(children)
+
+    def name(self):
+        return self._name
+
+    def cmdline(self):
+        return self._cmdline
+
+    def memory_info(self):
+        return FakeMemoryInfo(self._rss)
+
+    def children(self, recursive=False):
+        if not recursive:
+            return list(self._children)
+        return [p for child in self._children for p in [child] + child.children(recursive=True)]
+
+
+class FakeClock:
+    """Zegar testowy przesuwany ręcznie."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeResult:
+    """Udany wynik Crawl4AI."""
+
+    success = True
+    error_message = None
+    html = "<h1 itemprop=\"name\">Black Sea</h1>"
+    status_code = 200
+
+
+class FakeCrawler:
+    """Crawler testowy - każde pobranie trwa 2 s według zegara testowego."""
+
+    crawler_strategy = None
+
+    def __init__(self, clock: FakeClock):
+        self.clock = clock
+        self.closed = 0
+
+    async def arun(self, url, config):
+        self.clock.now += 2.0
+        return FakeResult()
+
+    async def __aexit__(self, *args):
+        self.closed += 1
+
+
+def test_browser_tree_rss() -> None:
+    """Do RSS przeglądarek wliczane jest tylko drzewo procesów przeglądarki."""
+    renderer = FakeProcess(12, "python", ["python", "renderer.py"], 30)
+    chromium = FakeProcess(11, "chrome", ["chrome", "--type=browser"], 100, [renderer])
+    driver = FakeProcess(10, "node", ["node", "playwright/driver.js"], 20, [chromium])
+    parse_worker = FakeProcess(20, "python", ["python", "-c", "from multiprocessing.spawn import spawn_main"], 300)
+    openvpn = FakeProcess(21, "openvpn", ["openvpn", "--config", "pl-waw.ovpn"], 15)
+    children = [driver, chromium, renderer, parse_worker, openvpn]
+
+    assert browser_tree_rss(children) == 150 * MB
+    assert browser_tree_rss([parse_worker, openvpn]) == 0
+    print("✓ RSS przeglądarek bez procesów puli parsowania i openvpn")
+
+
+def test_recycle_on_rss() -> None:
+    """Przeglądarka jest recyklingowana po przekroczeniu limitu RSS lub liczby stron."""
+    clock = FakeClock()
+    rss = {"mb": 100.0}
+    pool = BrowserPool(max_pages_per_browser=3, max_rss_mb=200, rss_probe=lambda: rss["mb"], clock=clock)
+    slot = pool.slots[0]
+    url = "https://www.fragrantica.com/perfume/A/B-1.html"
+
+    async def fetch_with(crawler):
+        slot.crawler = crawler
+        return await pool.fetch_with_readiness(url)
+
+    crawler = FakeCrawler(clock)
+    _, readiness = asyncio.run(fetch_with(crawler))
+    assert readiness == {"mode": "networkidle", "seconds": 2.0}
+    assert slot.crawler is crawler and pool.recycle_count == 0
+
+    # RSS ponad limit - przeglądarka zamknięta po pobraniu
+    rss["mb"] = 250.0
+    asyncio.run(fetch_with(crawler))
+    assert slot.crawler is None and pool.recycle_count == 1
+
+    # Limit stron niezależnie od RSS; brak pomiaru RSS (None) nie powoduje recyklingu
+    rss["mb"] = None
+    slot.pages_served = 2
+    asyncio.run(fetch_with(crawler))
+    assert slot.crawler is None and pool.recycle_count == 2
+    assert crawler.closed == 2
+    slot.crawler = crawler
+    assert not pool._needs_recycle(slot)
+    print("✓ Recykling przeglądarek po RSS i liczbie stron")
+
+
+if __name__ == "__main__":
+    test_browser_tree_rss()
+    test_recycle_on_rss()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Test punktów kontrolnych etapów (ponowna próba wykonuje tylko brakujące etapy)."""
+
+import asyncio
+import tempfile
+from pathlib import Path
+
+from checkpoint_store import STAGE_FETCH, CheckpointStore
+from job_store import JobStore
+from parse_executor import ParseExecutor
+from scraper import SECTION_DETAILS, SECTION_REVIEWS, parse_perfume_page
+
+
+URL = "https://www.fragrantica.com/perfume/Lorenzo-Pazzaglia/Black-Sea-69652.html"
+
+
+class FakeResult:
+    """Wynik pobrania z HTML i metadanymi."""
+
+    def __init__(self, html: str, content_hash: str):
+        self.html = html
+        self.content_hash = content_hash
+
+    def meta(self) -> dict:
+        return {"backend": "http", "contentHash": self.content_hash}
+
+
+def test_checkpoints(html_file: str = "index.html") -> None:
+    """Błąd recenzji nie traci danych szczegółowych, a komplet etapów pomija parsowanie."""
+    with open(html_file, "r", encoding="utf-8") as f:
+        html = f.read()
+    expected = parse_perfume_page(html, URL)
+    executor = ParseExecutor(workers=0)
+    calls = []
+
+    async def flaky_parse_sections(page_html, url, sections):
+        calls.append(sections)
+        results, errors = await executor.parse_sections(page_html, url, sections)
+        if len(calls) == 1:
+            # Pierwsza próba: recenzje niedostępne (np. 429 przy doładowaniu sekcji)
+            results.pop(SECTION_REVIEWS)
+            errors[SECTION_REVIEWS] = "Exception: 429"
+        return results, errors
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = JobStore(Path(tmp_dir) / "jobs.sqlite3")
+        checkpoints = CheckpointStore(store)
+
+        saved = checkpoints.load(URL)
+        assert checkpoints.missing(saved) == [STAGE_FETCH, SECTION_DETAILS, SECTION_REVIEWS]
+        try:
+            asyncio.run(checkpoints.complete(URL, FakeResult(html, "a"), saved, flaky_parse_sections))
+            raise AssertionError("Brak błędu etapu recenzji")
+        except Exception as e:
+            assert "reviews: Exception: 429" in str(e)
+        assert checkpoints.counts() == {STAGE_FETCH: 1, SECTION_DETAILS: 1}
+
+        # Ponowna próba (nowy proces) - parsowane są tylko recenzje
+        store.close()
+        store = JobStore(Path(tmp_dir) / "jobs.sqlite3")
+        checkpoints = CheckpointStore(store)
+        saved = checkpoints.load(URL)
+        assert checkpoints.missing(saved) == [SECTION_REVIEWS]
+        perfume_data = asyncio.run(checkpoints.complete(URL, FakeResult(html, "b"), saved, flaky_parse_sections))
+        assert calls == [(SECTION_DETAILS, SECTION_REVIEWS), (SECTION_REVIEWS,)]
+        assert {key: value for key, value in perfume_data.items() if key != "scrapeMeta"} == expected
+        assert list(perfume_data)[:-1] == list(expected)
+        assert perfume_data["scrapeMeta"] == {"backend": "http", "contentHash": "b"}
+
+        # Komplet etapów (np. nieudany zapis wyniku) - bez pobierania i parsowania
+        saved = checkpoints.load(URL)
+        assert checkpoints.missing(saved) == []
+        assert asyncio.run(checkpoints.complete(URL, None, saved, flaky_parse_sections)) == perfume_data
+        assert len(calls) == 2
+
+        checkpoints.clear(URL)
+        assert checkpoints.counts() == {}
+        stats = checkpoints.stats()
+        store.close()
+    print(f"✓ Punkty kontrolne etapów działają poprawnie: {stats}")
+
+
+if __name__ == "__main__":
+    test_checkpoints()
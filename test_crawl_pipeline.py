@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Test potoku pobieranie -> parsowanie -> zapis z ograniczonymi kolejkami."""
+
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+
+from crawl_pipeline import CrawlPipeline, JobLog
+
+
+def test_crawl_pipeline() -> None:
+    """Sprawdza przepływ przez etapy, backpressure, obsługę błędów i statystyki kolejek."""
+    urls = [f"https://www.fragrantica.com/perfume/A/B-{i}.html" for i in range(12)]
+    in_flight = {"fetch": 0, "fetch_max": 0, "parse": 0, "parse_max": 0}
+    errors = []
+
+    def index_of(url: str) -> int:
+        return int(url.rsplit("-", 1)[1].split(".")[0])
+
+    async def fetch(url: str):
+        in_flight["fetch"] += 1
+        in_flight["fetch_max"] = max(in_flight["fetch_max"], in_flight["fetch"])
+        await asyncio.sleep((12 - index_of(url)) * 0.002)
+        in_flight["fetch"] -= 1
+        if index_of(url) == 2:
+            raise RuntimeError("Strona zwróciła błąd")
+        return f"<html>{url}</html>"
+
+    async def parse(url: str, html: str):
+        in_flight["parse"] += 1
+        in_flight["parse_max"] = max(in_flight["parse_max"], in_flight["parse"])
+        # Parsowanie jest wolniejsze od pobierania - kolejka przed nim się zapełnia
+        await asyncio.sleep(0.01)
+        in_flight["parse"] -= 1
+        if index_of(url) == 7:
+            return None
+        return {"url": url, "length": len(html)}
+
+    async def persist(url: str, data):
+        return f"output/{index_of(url)}.json"
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_path = Path(tmp_dir) / "job-log.jsonl"
+        pipeline = CrawlPipeline(
+            fetch, parse, persist,
+            fetch_workers=4, parse_workers=2, persist_workers=1, queue_size=2,
+            job_log=JobLog(log_path),
+            tunnel_provider=lambda: "pl-waw.ovpn",
+            on_error=lambda url, stage, error: errors.append((index_of(url), stage)),
+        )
+        summary = asyncio.run(pipeline.run(urls + [""]))
+
+        with open(log_path, "r", encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f]
+
+    assert summary == {"succeeded": 10, "failed": 2}
+    assert [entry["url"] for entry in entries] == urls
+    assert entries[2]["stage"] == "fetch" and "RuntimeError" in entries[2]["error"]
+    assert entries[7]["stage"] == "parse" and entries[7]["status"] == "error"
+    assert entries[0]["output"] == "output/0.json" and entries[0]["tunnel"] == "pl-waw.ovpn"
+    assert sorted(errors) == [(2, "fetch"), (7, "parse")]
+    assert in_flight["fetch_max"] == 4 and in_flight["parse_max"] == 2
+
+    stats = {stage["stage"]: stage for stage in pipeline.stage_stats()}
+    assert [stage["processed"] for stage in stats.values()] == [12, 11, 10]
+    assert stats["parse"]["queueDepth"]["max"] <= 2 and stats["parse"]["queueDepth"]["capacity"] == 2
+    # Niezaokrąglony czas - pod obciążeniem blokada może być krótsza niż 0.05 s
+    assert pipeline.stats[0].blocked_seconds > 0
+    assert pipeline.bottleneck() == "parse"
+    print(f"✓ Potok etapów działa poprawnie: {pipeline.stage_stats()}")
+
+
+if __name__ == "__main__":
+    test_crawl_pipeline()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Test wyboru backendu pobierania (HTTP z przejściem na przeglądarkę)."""
+
+import asyncio
+
+from fetch_backends import FetchBackend, FetchResult, FallbackFetcher, find_missing_sections
+
+
+class StaticBackend(FetchBackend):
+    """Backend testowy zwracający zawsze ten sam HTML."""
+
+    def __init__(self, name: str, html: str, status_code: int = 200):
+        self.name = name
+        self.html = html
+        self.status_code = status_code
+        self.calls = 0
+
+    async def fetch(self, url, headers=None):
+        self.calls += 1
+        return FetchResult(
+            url,
+            html=self.html,
+            status_code=self.status_code,
+            success=self.status_code < 400,
+            backend=self.name,
+        )
+
+
+def test_find_missing_sections() -> None:
+    """Sprawdza wykrywanie sekcji na zapisanej stronie perfum."""
+    with open("index.html", "r", encoding="utf-8") as f:
+        html = f.read()
+
+    assert find_missing_sections(html) == []
+    assert find_missing_sections(html, ("name", "pyramid", "votes", "reviews")) == []
+    assert find_missing_sections("<html><body>Just a moment...</body></html>") == ["name", "votes"]
+    print("✓ Wykrywanie sekcji działa poprawnie")
+
+
+def test_fallback_fetcher() -> None:
+    """Sprawdza kiedy FallbackFetcher przechodzi na przeglądarkę."""
+    full_page = '<h1 itemprop="name">Black Sea</h1><span class="vote-button-legend">12</span>'
+    challenge_page = "<html><body>Checking your browser...</body></html>"
+
+    async def run():
+        # HTML z wszystkimi sekcjami - bez przeglądarki
+        http = StaticBackend("http", full_page)
+        browser = StaticBackend("browser", full_page)
+        fetcher = FallbackFetcher(http, browser)
+        result = await fetcher.fetch("https://www.fragrantica.com/perfume/A/B-1.html")
+        assert result.backend == "http" and browser.calls == 0
+
+        # Brak sekcji - przejście na przeglądarkę
+        fetcher = FallbackFetcher(StaticBackend("http", challenge_page), browser)
+        result = await fetcher.fetch("https://www.fragrantica.com/perfume/A/B-1.html")
+        assert result.backend == "browser"
+        assert "name" in result.fallback_reason
+        assert result.meta()["backend"] == "browser"
+        assert fetcher.stats()["fallbacks"] == 1
+
+        # 429 - bez przejścia na przeglądarkę (serwer zwróciłby to samo)
+        browser.calls = 0
+        fetcher = FallbackFetcher(StaticBackend("http", "", status_code=429), browser)
+        result = await fetcher.fetch("https://www.fragrantica.com/perfume/A/B-1.html")
+        assert result.status_code == 429 and browser.calls == 0
+
+    asyncio.run(run())
+    print("✓ FallbackFetcher wybiera backend poprawnie")
+
+
+def test_backend_requires_fetch() -> None:
+    """Backend bez fetch() nie może zostać utworzony (błąd przy tworzeniu, a nie przy pierwszym żądaniu)."""
+    class IncompleteBackend(FetchBackend):
+        name = "incomplete"
+
+    try:
+        IncompleteBackend()
+        raise AssertionError("Utworzono backend bez fetch()")
+    except TypeError as e:
+        assert "fetch" in str(e)
+    assert StaticBackend("http", "").name == "http"
+    print("✓ Backend pobierania musi implementować fetch()")
+
+
+if __name__ == "__main__":
+    test_find_missing_sections()
+    test_fallback_fetcher()
+    test_backend_requires_fetch()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Test cache surowego HTML i trybu replay."""
+
+import asyncio
+import tempfile
+import time
+
+from fetch_backends import FetchBackend, FetchResult
+from html_cache import CachingFetcher, HtmlCache
+from scraper import parse_perfume_page
+from test_fetch_backends import StaticBackend
+
+
+PAGE_URL = "https://www.fragrantica.com/perfume/Lorenzo-Pazzaglia/Black-Sea-69652.html"
+
+
+def test_cache_roundtrip() -> None:
+    """Sprawdza zapis, odczyt, deduplikację treści i TTL."""
+    with open("index.html", "r", encoding="utf-8") as f:
+        html = f.read()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = HtmlCache(cache_dir, ttl_seconds=3600)
+        meta = cache.put(PAGE_URL, html, 200, backend="http", tunnel="pl-waw.ovpn")
+        # Ta sama treść pod drugim URL - jeden obiekt HTML
+        cache.put(PAGE_URL.replace("/perfume/", "/perfumy/"), html, 200, backend="browser")
+
+        cached_meta, cached_html = cache.get(PAGE_URL + "#all-reviews")
+        assert cached_html == html
+        assert cached_meta["tunnel"] == "pl-waw.ovpn" and cached_meta["backend"] == "http"
+        assert len(list(cache.objects_dir.glob("*/*.zst"))) == 1
+        assert sorted(cache.iter_urls()) == sorted([PAGE_URL, PAGE_URL.replace("/perfume/", "/perfumy/")])
+
+        # Nieświeży wpis jest pomijany, chyba że nie wymagamy świeżości (replay)
+        assert not cache.is_fresh(meta, now=time.time() + 7200)
+        cache.put(PAGE_URL, html, 200, backend="http", fetched_at=time.time() - 7200)
+        assert cache.get(PAGE_URL) is None
+        assert cache.get(PAGE_URL, require_fresh=False) is not None
+    print("✓ Cache HTML działa poprawnie")
+
+
+def test_replay_extraction() -> None:
+    """Sprawdza zapis przez CachingFetcher i ekstrakcję z cache bez sieci."""
+    with open("index.html", "r", encoding="utf-8") as f:
+        html = f.read()
+
+    async def run(cache_dir):
+        cache = HtmlCache(cache_dir)
+        http = StaticBackend("http", html)
+        fetcher = CachingFetcher(http, cache, tunnel_provider=lambda: "de-fra.ovpn")
+        live = await fetcher.fetch(PAGE_URL)
+        cached = await fetcher.fetch(PAGE_URL)
+        assert live.backend == "http" and cached.backend == "cache" and http.calls == 1
+        assert cached.meta()["cache"]["tunnel"] == "de-fra.ovpn"
+
+        # Strona wyzwania antybotowego nie trafia do cache
+        await CachingFetcher(StaticBackend("http", "<html>Just a moment...</html>"), cache).fetch(PAGE_URL + "x")
+        assert cache.get_meta(PAGE_URL + "x") is None
+
+        replay = CachingFetcher(None, cache, replay=True)
+        result = await replay.fetch(PAGE_URL)
+        missing = await replay.fetch(PAGE_URL + "x")
+        assert not missing.success
+        return result
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        result = asyncio.run(run(cache_dir))
+    assert result.backend == "replay"
+    assert parse_perfume_page(result.html, PAGE_URL) == parse_perfume_page(html, PAGE_URL)
+    print("✓ Ekstrakcja z cache (replay) działa poprawnie")
+
+
+class ConditionalBackend(FetchBackend):
+    """Backend testowy obsługujący ETag - zwraca 304 gdy treść się nie zmieniła."""
+
+    name = "http"
+
+    def __init__(self, html: str, etag: str):
+        self.html = html
+        self.etag = etag
+        self.requests = []
+
+    async def fetch(self, url, headers=None):
+        headers = headers or {}
+        self.requests.append(headers)
+        if headers.get("If-None-Match") == self.etag:
+            return FetchResult(url, status_code=304, response_headers={"ETag": self.etag})
+        return FetchResult(
+            url,
+            html=self.html,
+            status_code=200,
+            response_headers={"ETag": self.etag, "Last-Modified": "Mon, 05 Oct 2026 10:00:00 GMT"},
+        )
+
+
+def test_conditional_revalidation() -> None:
+    """Sprawdza wysyłanie walidatorów i obsługę 304 dla nieświeżych wpisów."""
+    with open("index.html", "r", encoding="utf-8") as f:
+        html = f.read()
+
+    async def run(cache_dir):
+        # TTL = 0 - każdy wpis jest od razu nieświeży i wymaga rewalidacji
+        cache = HtmlCache(cache_dir, ttl_seconds=0)
+        backend = ConditionalBackend(html, '"v1"')
+        fetcher = CachingFetcher(backend, cache)
+
+        first = await fetcher.fetch(PAGE_URL)
+        assert first.status_code == 200 and "If-None-Match" not in backend.requests[0]
+        assert cache.get_meta(PAGE_URL)["etag"] == '"v1"'
+
+        second = await fetcher.fetch(PAGE_URL)
+        assert backend.requests[1]["If-None-Match"] == '"v1"'
+        assert backend.requests[1]["If-Modified-Since"] == "Mon, 05 Oct 2026 10:00:00 GMT"
+        assert second.backend == "revalidated" and second.html == html and second.status_code == 200
+        assert cache.get_meta(PAGE_URL)["revalidatedCount"] == 1
+
+        # Zmieniona treść - pełna odpowiedź zapisana w cache
+        backend.html = html.replace("Black Sea", "Black Sea 2")
+        backend.etag = '"v2"'
+        third = await fetcher.fetch(PAGE_URL)
+        assert third.status_code == 200 and "Black Sea 2" in third.html
+        assert cache.get_meta(PAGE_URL)["etag"] == '"v2"'
+        assert fetcher.stats()["revalidated"] == 1
+        assert fetcher.stats()["stored"] == 2
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        asyncio.run(run(cache_dir))
+    print("✓ Rewalidacja warunkowa działa poprawnie")
+
+
+def test_extraction_reuse() -> None:
+    """Po odpowiedzi 304 zwracane są dane wyciągnięte wcześniej z tej samej treści."""
+    with open("index.html", "r", encoding="utf-8") as f:
+        html = f.read()
+
+    async def run(cache_dir):
+        cache = HtmlCache(cache_dir, ttl_seconds=0)
+        backend = ConditionalBackend(html, '"v1"')
+        fetcher = CachingFetcher(backend, cache)
+
+        first = await fetcher.fetch(PAGE_URL)
+        assert first.extracted is None and "extractionReused" not in first.meta()
+        # Rewalidacja bez zapisanych danych - ekstrakcja jest potrzebna
+        assert (await fetcher.fetch(PAGE_URL)).extracted is None
+
+        data = parse_perfume_page(first.html, PAGE_URL)
+        content_hash = first.meta()["contentHash"]
+        cache.put_extracted(content_hash, data)
+        assert cache.get_extracted(content_hash) == data
+
+        revalidated = await fetcher.fetch(PAGE_URL)
+        assert revalidated.backend == "revalidated" and revalidated.extracted == data
+        assert revalidated.meta()["extractionReused"] is True
+        assert fetcher.stats()["reused"] == 1
+
+        # Zmieniona treść ma inny hash - brak danych do ponownego użycia
+        backend.html = html.replace("Black Sea", "Black Sea 2")
+        backend.etag = '"v2"'
+        changed = await fetcher.fetch(PAGE_URL)
+        assert changed.extracted is None and cache.get_extracted(changed.meta()["contentHash"]) is None
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        asyncio.run(run(cache_dir))
+    print("✓ Dane strony bez zmian (304) są używane ponownie")
+
+
+if __name__ == "__main__":
+    test_cache_roundtrip()
+    test_replay_extraction()
+    test_conditional_revalidation()
+    test_extraction_reuse()
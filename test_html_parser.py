@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Test wyboru parsera HTML i trybu zgodności parserów na zapisanych stronach."""
+
+from pathlib import Path
+
+from html_parser import (
+    SAMPLE_FILES,
+    available_parsers,
+    diff_json,
+    locate_element,
+    make_region_soup,
+    make_soup,
+    resolve_parser,
+    run_conformance,
+    strip_dropped_elements,
+)
+
+
+def test_resolve_parser() -> None:
+    """Domyślnie wybierany jest najszybszy dostępny parser, nieznany parser jest błędem."""
+    assert available_parsers()[0] == resolve_parser()
+    assert resolve_parser("html.parser") == "html.parser"
+    try:
+        resolve_parser("html5")
+        raise AssertionError("Brak błędu dla nieznanego parsera")
+    except ValueError:
+        pass
+    assert make_soup("<div id='x'><span>a</span></div>").find(id="x").get_text() == "a"
+    print(f"✓ Parsery HTML: {available_parsers()} (domyślny: {resolve_parser()})")
+
+
+def test_diff_json() -> None:
+    """Różnice są raportowane ze ścieżką."""
+    assert diff_json({"a": [1, {"b": 2}]}, {"a": [1, {"b": 2}]}) == []
+    assert diff_json({"a": [1, {"b": 2}], "c": 1}, {"a": [1, {"b": 3}, 4], "d": 1}) == [
+        "$.a[1].b: 2 != 3",
+        "$.a: długość 2 != 3",
+        "$.c: brak klucza",
+        "$.d: nadmiarowy klucz",
+    ]
+    print("✓ Porównanie danych JSON działa poprawnie")
+
+
+def test_regions() -> None:
+    """Regiony są wyszukiwane w surowym HTML, a skrypty, iframy i SVG wycinane przed parsowaniem."""
+    html = (
+        "<html><head><script>var x = '</div>';</script></head><body><nav>Menu</nav>"
+        "<div id=\"main-content\"><div class='a'>A<!-- </div> --></div>"
+        "<svg><svg><use href='#i'/></svg></svg><svg class='x'/>B"
+        "<iframe src='x'><div>frame</div></iframe><script type='x'>if (a > b) {}</script>C</div>"
+        "<footer>Stopka</footer><div id='all-reviews'><div itemprop='review'>R</div></div></body></html>"
+    )
+    start, end = locate_element(html, "main-content")
+    assert html[start:end].startswith('<div id="main-content">') and html[start:end].endswith("C</div>")
+    assert locate_element(html, "missing") is None
+    assert strip_dropped_elements(html[start:end]) == (
+        '<div id="main-content"><div class=\'a\'>A<!-- </div> --></div>BC</div>'
+    )
+
+    for parser in available_parsers():
+        soup = make_region_soup(html, parser=parser)
+        assert soup.find(id="main-content").get_text() == "ABC"
+        assert soup.find(itemprop="review").get_text() == "R"
+        assert soup.find("nav") is None and soup.find("footer") is None
+        assert soup.find(["script", "iframe", "svg"]) is None
+        # Region zawarty w innym regionie nie jest dodawany ponownie
+        nested = make_region_soup("<div id='main-content'><div id='all-reviews'>R</div></div>", parser=parser)
+        assert len(nested.find_all(id="all-reviews")) == 1
+    assert make_region_soup("<html><body><div id='all-reviews'></div></body></html>") is None
+
+    # Atrybuty kończące się na "id" (data-id, aria-id) nie są identyfikatorem elementu
+    decoy = (
+        "<body><a data-id=\"main-content\" href='#'>Przejdź</a><span aria-id='main-content'>X</span>"
+        "<div\nid=\"main-content\"><p>Treść</p></div></body>"
+    )
+    start, end = locate_element(decoy, "main-content")
+    assert decoy[start:end] == "<div\nid=\"main-content\"><p>Treść</p></div>"
+    assert locate_element("<div data-id='main-content'></div>", "main-content") is None
+    for parser in available_parsers():
+        assert make_region_soup(decoy, parser=parser).get_text() == "Treść"
+    print("✓ Regiony #main-content i #all-reviews są parsowane bez skryptów, iframów i SVG")
+
+
+def test_conformance() -> None:
+    """Wszystkie parsery dają te same dane na zapisanych stronach."""
+    report = run_conformance([Path(name) for name in SAMPLE_FILES])
+    for path, results in report.items():
+        assert set(results) == set(available_parsers())
+        for parser, result in results.items():
+            assert result["diffs"] == [], f"{path} [{parser}]: {result['diffs'][:5]}"
+    print("✓ Parsery dają identyczne dane na zapisanych stronach")
+
+
+if __name__ == "__main__":
+    test_resolve_parser()
+    test_diff_json()
+    test_regions()
+    test_conformance()
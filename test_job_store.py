@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Test magazynu zadań SQLite (statusy, partie zmian, import/eksport all-links.json)."""
+
+import json
+import tempfile
+from pathlib import Path
+
+from job_store import JobStore
+
+
+BASE_URL = "https://www.fragrantica.com/perfume/A/B-{}.html"
+
+
+def test_job_store() -> None:
+    """Sprawdza cykl życia zadań oraz zgodność z formatem all-links.json."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        links_file = Path(tmp_dir) / "all-links.json"
+        with open(links_file, "w", encoding="utf-8") as f:
+            json.dump({"links": [BASE_URL.format(i) for i in range(5)] + [BASE_URL.format(0), ""]}, f)
+
+        store = JobStore(Path(tmp_dir) / "jobs.sqlite3", batch_size=3, flush_interval=3600)
+        assert store.import_json(links_file) == 5
+        assert store.import_json(links_file) == 0
+        assert store.pending_urls() == [BASE_URL.format(i) for i in range(5)]
+
+        store.mark_started(BASE_URL.format(0))
+        store.mark_done(BASE_URL.format(0), "output/b_0.json", "abc123")
+        # Zmiany są w buforze do zapełnienia partii
+        raw = store.conn.execute("SELECT status FROM jobs WHERE url = ?", (BASE_URL.format(0),)).fetchone()
+        assert raw[0] == "pending"
+
+        store.mark_started(BASE_URL.format(1))
+        store.mark_failed(BASE_URL.format(1), "Timeout")
+        store.mark_started(BASE_URL.format(2))
+
+        done = store.get(BASE_URL.format(0))
+        assert done["status"] == "done" and done["attempts"] == 1
+        assert done["output_path"] == "output/b_0.json" and done["content_hash"] == "abc123"
+        assert store.get(BASE_URL.format(1))["last_error"] == "Timeout"
+        assert store.counts() == {"done": 1, "failed": 1, "in_progress": 1, "pending": 2}
+
+        # Przerwane zadanie wraca do kolejki, nieudane po limicie prób jest pomijane
+        assert store.reset_in_progress() == 1
+        assert store.pending_urls(max_attempts=1) == [BASE_URL.format(3), BASE_URL.format(4)]
+        assert store.pending_urls() == [BASE_URL.format(i) for i in range(1, 5)]
+
+        assert store.export_json(links_file) == 4
+        store.close()
+        with open(links_file, "r", encoding="utf-8") as f:
+            assert json.load(f) == {"links": [BASE_URL.format(i) for i in range(1, 5)]}
+
+        # Stan przetrwał zamknięcie bazy
+        reopened = JobStore(Path(tmp_dir) / "jobs.sqlite3")
+        assert reopened.get(BASE_URL.format(0))["status"] == "done"
+        reopened.close()
+    print("✓ Magazyn zadań działa poprawnie")
+
+
+if __name__ == "__main__":
+    test_job_store()
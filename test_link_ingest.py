@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Test strumieniowego wczytywania linków (kanonizacja i deduplikacja po ID perfum)."""
+
+import json
+import tempfile
+from pathlib import Path
+
+from link_ingest import (
+    LinkIngestor, PerfumeIdSet, canonicalize_url, iter_raw_links, parse_shard_spec, shard_of, shard_tag
+)
+
+
+CANONICAL = "https://www.fragrantica.com/perfume/Chanel/No-5-40069.html"
+
+
+def test_canonicalize_url() -> None:
+    """Sprawdza sprowadzanie wariantów URL do postaci kanonicznej."""
+    test_cases = [
+        (CANONICAL, CANONICAL),
+        ("https://www.fragrantica.com/perfumy/Chanel/No-5-40069.html", CANONICAL),
+        ("http://fragrantica.pl/perfumy/Chanel/No-5-40069.html#all-reviews", CANONICAL),
+        ("www.fragrantica.com/perfume/Chanel/No-5-40069.html?utm_source=x", CANONICAL),
+        ("  https://WWW.FRAGRANTICA.COM/perfume/Chanel/No-5-40069.html  ", CANONICAL),
+        ("https://www.fragrantica.com/designers/Chanel.html", None),
+        ("https://www.fragrantica.com/news/Chanel-No-5-123.html", None),
+        ("https://example.com/perfume/Chanel/No-5-40069.html", None),
+        ("", None),
+    ]
+    for url, expected in test_cases:
+        result = canonicalize_url(url)
+        status = "✓ PASS" if result == expected else "✗ FAIL"
+        print(f"{url!r}: {status} (expected: {expected}, got: {result})")
+        assert result == expected
+
+
+def test_perfume_id_set() -> None:
+    """Sprawdza zwarty zbiór ID."""
+    seen = PerfumeIdSet()
+    assert seen.add("69652") and not seen.add(69652)
+    assert seen.add(3) and seen.add(1000000)
+    assert "69652" in seen and 4 not in seen and 99999999 not in seen
+    assert len(seen) == 3
+
+
+def test_streaming_ingest() -> None:
+    """Sprawdza czytanie fragmentami i odrzucanie duplikatów pod innymi wariantami URL."""
+    with open("all-links.json", "r", encoding="utf-8") as f:
+        expected = json.load(f)["links"]
+    # Mały fragment - łańcuchy są cięte na granicach fragmentów
+    assert list(iter_raw_links(Path("all-links.json"), chunk_size=7))[:500] == expected[:500]
+    assert sum(1 for _ in iter_raw_links(Path("all-links.json"))) == len(expected)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        links_file = Path(tmp_dir) / "links.json"
+        with open(links_file, "w", encoding="utf-8") as f:
+            json.dump({"links": [
+                CANONICAL,
+                "https://www.fragrantica.com/perfumy/Chanel/No-5-40069.html",
+                "https://www.fragrantica.com/perfume/Chanel/N5-Renamed-40069.html",
+                "https://www.fragrantica.com/designers/Chanel.html",
+                "https://www.fragrantica.com/perfume/Dior/Sauvage-31861.html#all-reviews",
+            ]}, f)
+
+        ingestor = LinkIngestor()
+        links = list(ingestor.ingest_file(links_file))
+    assert links == [CANONICAL, "https://www.fragrantica.com/perfume/Dior/Sauvage-31861.html"]
+    assert ingestor.counts == {"accepted": 2, "invalid": 1, "duplicates": 2, "otherShard": 0}
+    print("✓ Strumieniowe wczytywanie linków działa poprawnie")
+
+
+def test_shards() -> None:
+    """Sprawdza, że shardy są rozłączne, pokrywają cały zbiór i nie zależą od wariantu URL."""
+    assert parse_shard_spec("1/4") == (1, 4) and parse_shard_spec(" 0 / 1 ") == (0, 1)
+    for spec in ("4/4", "1/0", "1", "a/b", ""):
+        try:
+            parse_shard_spec(spec)
+            raise AssertionError(f"Brak błędu dla {spec!r}")
+        except ValueError:
+            pass
+    assert shard_tag((1, 4)) == "shard-1-of-4"
+    # Stała wartość - ten sam podział na każdej maszynie i przy każdym uruchomieniu
+    assert shard_of("40069", 4) == shard_of(40069, 4) == 3
+
+    links = list(iter_raw_links(Path("all-links.json")))[:2000]
+    expected = list(LinkIngestor().ingest(links))
+    shards = []
+    for index in range(4):
+        ingestor = LinkIngestor(shard=(index, 4))
+        shards.append(list(ingestor.ingest(links)))
+        assert ingestor.counts["otherShard"] == len(links) - ingestor.counts["invalid"] - len(shards[-1]) - \
+            ingestor.counts["duplicates"]
+    assert sorted(url for shard in shards for url in shard) == sorted(expected)
+    assert all(len(shard) > len(expected) / 8 for shard in shards)
+    assert list(LinkIngestor(shard=(3, 4)).ingest(["https://fragrantica.pl/perfumy/Chanel/No-5-40069.html"])) == [
+        CANONICAL]
+    print("✓ Podział linków na shardy działa poprawnie")
+
+
+if __name__ == "__main__":
+    test_canonicalize_url()
+    test_perfume_id_set()
+    test_streaming_ingest()
+    test_shards()
@@ -5,6 +5,8 @@ import json
 import sys
 import os
 
+from link_ingest import canonicalize_url
+
 
 def test_links_in_all_links(links_file: str = "links.json", all_links_file: str = "all-links.json") -> bool:
     """Testuje czy wszystkie linki z links.json są w all-links.json.
@@ -61,10 +63,10 @@ def test_links_in_all_links(links_file: str = "links.json", all_links_file: str
         print(f"   Typ danych: {type(all_links_data)}")
         return False
     
-    # Funkcja normalizująca URL - zamienia /perfumy/ na /perfume/
+    # Funkcja normalizująca URL - postać kanoniczna (host, /perfumy/ -> /perfume/, bez fragmentu)
     def normalize_url(url: str) -> str:
-        """Normalizuje URL zamieniając /perfumy/ na /perfume/."""
-        return url.replace("/perfumy/", "/perfume/")
+        """Normalizuje URL do postaci kanonicznej (linki spoza stron perfum bez zmian)."""
+        return canonicalize_url(url) or url
     
     # Normalizuj linki z links.json
     normalized_links = [normalize_url(link) for link in links]
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Test ujść wyników: pliki JSON i shardy JSON Lines."""
+
+import json
+import tempfile
+from pathlib import Path
+
+from link_ingest import shard_tag
+from output_sink import (
+    JsonFileSink,
+    JsonlShardSink,
+    OutputSink,
+    create_sink,
+    generate_filename_from_url,
+    iter_result_files,
+    iter_results,
+    recover_shards,
+)
+
+
+def record(i: int) -> dict:
+    return {"perfumeName": f"Perfume {i}", "brand": "Brand", "review": ["ą" * 10]}
+
+
+def url(i: int) -> str:
+    return f"https://www.fragrantica.com/perfume/Brand/Perfume-{i}.html"
+
+
+def test_jsonl_shard_sink() -> None:
+    """Sprawdza partie, rotację shardów, atomowe domykanie i trwałość zgłaszanych rekordów."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_dir = Path(tmp_dir)
+        sink = JsonlShardSink(output_dir, max_records=4, batch_size=3, flush_interval=3600)
+
+        locations = [sink.write(url(i), record(i)) for i in range(2)]
+        # Partia niepełna - nic nie jest jeszcze trwałe, shard nie jest widoczny
+        assert sink.pop_committed() == []
+        assert list(output_dir.glob("*.jsonl")) == []
+
+        locations += [sink.write(url(i), record(i)) for i in range(2, 10)]
+        committed = sink.pop_committed()
+        assert [entry[0] for entry in committed] == [url(i) for i in range(len(committed))]
+        # Po zmianie sharda wcześniejsze rekordy są trwałe, a shard ma docelową nazwę
+        assert (output_dir / "perfumes-000001.jsonl").exists()
+        sink.close()
+        committed += sink.pop_committed()
+        assert [location for _, location, _ in committed] == locations
+        assert locations[0] == "perfumes-000001.jsonl:1" and locations[9] == "perfumes-000003.jsonl:2"
+
+        shards = sorted(output_dir.glob("perfumes-*.jsonl"))
+        lines = [json.loads(line) for shard in shards for line in shard.read_text(encoding="utf-8").splitlines()]
+        assert [path.name for path in shards] == ["perfumes-000001.jsonl", "perfumes-000002.jsonl", "perfumes-000003.jsonl"]
+        assert [line["url"] for line in lines] == [url(i) for i in range(10)]
+        assert lines[0]["review"] == ["ą" * 10]
+        assert not list(output_dir.glob(".*.tmp"))
+        assert sink.stats()["records"] == 10 and sink.stats()["shards"] == 3
+
+        # Przerwany przebieg: shard tymczasowy z uciętym ostatnim rekordem
+        tmp_shard = output_dir / ".perfumes-000004.jsonl.tmp"
+        tmp_shard.write_bytes(b'{"url": "a"}\n{"url": "b"}\n{"url": "c')
+        # Shard innego workera (w trakcie zapisu) nie jest domykany
+        other_shard = output_dir / ".perfumes-w2-000001.jsonl.tmp"
+        other_shard.write_bytes(b'{"url": "d"}\n')
+        sink = JsonlShardSink(output_dir, max_records=4, batch_size=1)
+        assert (output_dir / "perfumes-000004.jsonl").read_bytes() == b'{"url": "a"}\n{"url": "b"}\n'
+        assert other_shard.exists()
+        other_shard.unlink()
+        # Nowy przebieg kontynuuje numerację shardów
+        assert sink.write(url(10), record(10)) == "perfumes-000005.jsonl:1"
+        sink.close()
+        assert recover_shards(output_dir) == []
+    print("✓ Shardy JSON Lines działają poprawnie")
+
+
+def test_json_file_sink() -> None:
+    """Sprawdza dotychczasowy format - plik JSON na perfumy."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sink = create_sink("files", Path(tmp_dir))
+        assert isinstance(sink, JsonFileSink)
+        location = sink.write(url(1), record(1))
+        assert Path(location).name == "brand_perfume_1.json"
+        assert json.loads(Path(location).read_text(encoding="utf-8")) == record(1)
+        # Bez nazwy perfum - nazwa pliku z URL
+        assert Path(sink.write(url(2), {"perfumeName": None})).name == generate_filename_from_url(url(2))
+        assert [entry[1] for entry in sink.pop_committed()][0] == location
+        sink.close()
+
+    # Ujście bez write() nie może zostać utworzone
+    class IncompleteSink(OutputSink):
+        name = "incomplete"
+
+    try:
+        IncompleteSink()
+        raise AssertionError("Utworzono ujście bez write()")
+    except TypeError as e:
+        assert "write" in str(e)
+    print("✓ Pliki JSON działają poprawnie")
+
+
+def test_iter_results_with_shard_dirs() -> None:
+    """Wyniki uruchomień z --shard (podkatalogi shard-i-of-N) są czytane razem z katalogiem głównym."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_dir = Path(tmp_dir)
+        create_sink("files", output_dir).write(url(0), record(0))
+        for index in range(2):
+            shard_dir = output_dir / shard_tag((index, 2))
+            shard_dir.mkdir()
+            sink = JsonlShardSink(shard_dir, batch_size=1)
+            sink.write(url(index + 1), record(index + 1))
+            sink.close()
+            (shard_dir / "job-log.jsonl").write_text("{}\n", encoding="utf-8")
+        # Inne podkatalogi (np. cache HTML) nie są wynikami
+        (output_dir / "html-cache").mkdir()
+        (output_dir / "html-cache" / "page.json").write_text("{}", encoding="utf-8")
+
+        files = list(iter_result_files([output_dir]))
+        assert [path.parent.name for path in files] == [output_dir.name, "shard-0-of-2", "shard-1-of-2"]
+        names = sorted(result["perfumeName"] for result in iter_results([output_dir]))
+        assert names == ["Perfume 0", "Perfume 1", "Perfume 2"]
+    print("✓ Wyniki z katalogów shardów są czytane")
+
+
+if __name__ == "__main__":
+    test_jsonl_shard_sink()
+    test_json_file_sink()
+    test_iter_results_with_shard_dirs()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Test archiwum stron w segmentach (indeks, mmap, odczyt sekwencyjny, kompaktowanie)."""
+
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+
+from html_cache import CachingFetcher
+from link_ingest import perfume_id_from_url
+from page_archive import PageArchive
+
+
+BASE_URL = "https://www.fragrantica.com/perfume/Lorenzo-Pazzaglia/Black-Sea-{}.html"
+
+
+def test_archive() -> None:
+    """Sprawdza zapis, odczyt po URL i ID, segmenty, odczyt sekwencyjny i kompaktowanie."""
+    with open("example.html", "r", encoding="utf-8") as f:
+        html = f.read()
+
+    with tempfile.TemporaryDirectory() as archive_dir:
+        # Mały limit segmentu - każdy rekord w osobnym segmencie
+        archive = PageArchive(archive_dir, max_segment_bytes=1024)
+        for perfume_id in range(1, 4):
+            archive.append(BASE_URL.format(perfume_id), html + f"<!-- {perfume_id} -->", backend="http")
+
+        # Ta sama treść nie jest zapisywana ponownie, zmieniona dostaje nowy rekord
+        archive.append(BASE_URL.format(1), html + "<!-- 1 -->")
+        archive.append(BASE_URL.format(2) + "#all-reviews", html + "<!-- 2 v2 -->")
+        assert archive.record_count == 4
+        assert len(archive.segment_numbers()) == 4
+
+        meta, page = archive.get_by_id("2")
+        assert page.endswith("<!-- 2 v2 -->") and meta["perfumeId"] == "2"
+        assert archive.get(BASE_URL.format(3))[1].endswith("<!-- 3 -->")
+        assert archive.get(BASE_URL.format(9)) is None
+
+        assert len(list(archive.scan())) == 3
+        assert len(list(archive.scan(latest_only=False))) == 4
+        archive.close()
+
+        # Indeks po ponownym otwarciu i po odtworzeniu z segmentów
+        reopened = PageArchive(archive_dir, max_segment_bytes=1024)
+        assert reopened.get_by_id("2")[1].endswith("<!-- 2 v2 -->")
+        assert reopened.rebuild_index() == 4
+        assert reopened.get_by_id("2")[1].endswith("<!-- 2 v2 -->")
+
+        result = reopened.compact()
+        assert result["recordsBefore"] == 4 and result["recordsAfter"] == 3
+        assert result["bytesAfter"] < result["bytesBefore"]
+        assert sorted(reopened.iter_urls()) == sorted(BASE_URL.format(i) for i in range(1, 4))
+        assert reopened.get_by_id("2")[1].endswith("<!-- 2 v2 -->")
+        assert PageArchive(archive_dir).record_count == 3
+        reopened.close()
+    print("✓ Archiwum stron działa poprawnie")
+
+
+def test_torn_index_line() -> None:
+    """Przerwana ostatnia linia indeksu jest obcinana i nie skleja się z kolejnym wpisem."""
+    with tempfile.TemporaryDirectory() as archive_dir:
+        archive = PageArchive(archive_dir, max_segment_bytes=64)
+        archive.append(BASE_URL.format(1), "<html>1</html>")
+        archive.close()
+        index_path = Path(archive_dir) / "index.jsonl"
+        with open(index_path, "a", encoding="utf-8") as f:
+            f.write('{"url": "https://www.fragrantica.com/perfume/A/B-2.html", "se')
+
+        reopened = PageArchive(archive_dir, max_segment_bytes=64)
+        lookups = []
+        original_segment_numbers = reopened.segment_numbers
+        reopened.segment_numbers = lambda: lookups.append(1) or original_segment_numbers()
+        for perfume_id in range(3, 6):
+            reopened.append(BASE_URL.format(perfume_id), f"<html>{perfume_id}</html>")
+        # Katalog segmentów przeglądany raz, a nie przy każdym zapisie
+        assert len(lookups) == 1
+        assert reopened.segment_numbers() == [1, 2, 3, 4]
+        reopened.close()
+
+        with open(index_path, "r", encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f]
+        assert [entry["id"] for entry in entries] == ["1", "3", "4", "5"]
+        assert PageArchive(archive_dir).get_by_id("4")[1] == "<html>4</html>"
+    print("✓ Przerwana linia indeksu jest obcinana")
+
+
+def test_archive_replay() -> None:
+    """Sprawdza odczyt stron z archiwum w trybie replay."""
+    with tempfile.TemporaryDirectory() as archive_dir:
+        archive = PageArchive(archive_dir)
+        archive.append(BASE_URL.format(69652), "<html>page</html>", backend="browser")
+
+        fetcher = CachingFetcher(None, archive, replay=True)
+        result = asyncio.run(fetcher.fetch(BASE_URL.format(69652)))
+        assert result.success and result.html == "<html>page</html>"
+        assert result.meta()["cache"]["backend"] == "browser"
+        asyncio.run(fetcher.close())
+
+    assert perfume_id_from_url(BASE_URL.format(69652)) == "69652"
+    assert perfume_id_from_url("https://www.fragrantica.com/designers/Chanel.html") is None
+    print("✓ Replay z archiwum działa poprawnie")
+
+
+if __name__ == "__main__":
+    test_archive()
+    test_torn_index_line()
+    test_archive_replay()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Test polityki gotowości strony (selektory z przejściem na networkidle)."""
+
+import asyncio
+
+from browser_pool import BrowserPool
+from page_readiness import ReadinessPolicy, ReadinessStats, parse_selectors
+
+
+class FakeResult:
+    """Wynik Crawl4AI z polami używanymi przez pulę."""
+
+    def __init__(self, success: bool, error_message: str = None):
+        self.success = success
+        self.error_message = error_message
+        self.html = "<h1 itemprop=\"name\">Black Sea</h1>" if success else ""
+        self.status_code = 200
+
+
+class FakeCrawler:
+    """Crawler testowy - przekracza czas oczekiwania na selektory, networkidle działa."""
+
+    crawler_strategy = None
+
+    def __init__(self):
+        self.wait_until = []
+
+    async def arun(self, url, config):
+        self.wait_until.append(config.wait_until)
+        if config.wait_for:
+            return FakeResult(False, "Wait condition failed: Timeout after 8000ms")
+        return FakeResult(True)
+
+
+def test_policy_config() -> None:
+    """Sprawdza parametry CrawlerRunConfig dla selektorów i networkidle."""
+    policy = ReadinessPolicy(selectors=("h1[itemprop=name]", "#pyramid"), timeout=5)
+    kwargs = policy.run_config_kwargs()
+    assert kwargs["wait_until"] == "domcontentloaded"
+    assert kwargs["wait_for"].startswith("js:")
+    assert '"h1[itemprop=name]"' in kwargs["wait_for"]
+    assert kwargs["wait_for_timeout"] == 5000
+
+    assert ReadinessPolicy(selectors=()).run_config_kwargs() == {"wait_until": "networkidle"}
+    assert parse_selectors(" #pyramid, ,.vote-button-legend ") == ("#pyramid", ".vote-button-legend")
+    assert parse_selectors("") == ()
+
+    assert ReadinessPolicy.is_timeout(FakeResult(False, "Wait condition failed: Timeout"))
+    assert not ReadinessPolicy.is_timeout(FakeResult(False, "net::ERR_CONNECTION_RESET"))
+    assert not ReadinessPolicy.is_timeout(FakeResult(True))
+    print("✓ Konfiguracja polityki gotowości działa poprawnie")
+
+
+def test_stats() -> None:
+    """Sprawdza percentyle czasu gotowości."""
+    stats = ReadinessStats()
+    assert stats.summary() == {"counts": {}, "p50": None, "p95": None}
+    for i in range(1, 101):
+        stats.record("selectors", i / 100)
+    stats.record("networkidle-fallback", 9.0)
+
+    summary = stats.summary()
+    assert summary["counts"] == {"selectors": 100, "networkidle-fallback": 1}
+    assert summary["p50"] == 0.51
+    assert summary["p95"] == 0.96
+    print("✓ Statystyki gotowości działają poprawnie")
+
+
+def test_fallback_to_networkidle() -> None:
+    """Sprawdza ponowne pobranie strony z networkidle po przekroczeniu czasu."""
+    pool = BrowserPool(max_rss_mb=None, readiness=ReadinessPolicy(timeout=1))
+    crawler = FakeCrawler()
+    pool.slots[0].crawler = crawler
+
+    result, readiness = asyncio.run(pool.fetch_with_readiness("https://www.fragrantica.com/perfume/A/B-1.html"))
+    assert result.success
+    assert crawler.wait_until == ["domcontentloaded", "networkidle"]
+    assert readiness["mode"] == "networkidle-fallback"
+    assert pool.stats()["readiness"]["counts"] == {"networkidle-fallback": 1}
+    print("✓ Przejście na networkidle działa poprawnie")
+
+
+if __name__ == "__main__":
+    test_policy_config()
+    test_stats()
+    test_fallback_to_networkidle()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Test parsowania stron w puli procesów i w bieżącym procesie."""
+
+import asyncio
+
+from parse_executor import ParseExecutor
+from scraper import parse_perfume_page
+
+
+URL = "https://www.fragrantica.com/perfume/Lorenzo-Pazzaglia/Black-Sea-69652.html"
+
+
+def test_parse_executor(html_file: str = "index.html") -> None:
+    """Sprawdza, że pula procesów i parsowanie w bieżącym procesie dają te same dane."""
+    with open(html_file, "r", encoding="utf-8") as f:
+        html = f.read()
+    expected = parse_perfume_page(html, URL)
+
+    async def run(executor: ParseExecutor):
+        try:
+            # Dwie strony równolegle - pętla zdarzeń nie jest blokowana parsowaniem
+            ticks = {"count": 0}
+
+            async def ticker():
+                while True:
+                    await asyncio.sleep(0.05)
+                    ticks["count"] += 1
+
+            ticker_task = asyncio.ensure_future(ticker())
+            results = await asyncio.gather(executor.parse(html, URL), executor.parse(html.encode("utf-8"), URL))
+            ticker_task.cancel()
+            return results, ticks["count"]
+        finally:
+            executor.close()
+
+    executor = ParseExecutor(workers=2)
+    assert executor.mode == "process"
+    (first, second), ticks = asyncio.run(run(executor))
+    assert first == expected and second == expected
+    assert ticks > 0, "Pętla zdarzeń była zablokowana podczas parsowania"
+    assert executor.stats()["tasks"] == 2 and executor.stats()["inProcess"] == 0
+
+    inline = ParseExecutor(workers=0)
+    assert inline.mode == "inline"
+    assert asyncio.run(inline.parse(html, URL)) == expected
+    assert inline.stats()["inProcess"] == 1
+    print(f"✓ Parsowanie w puli procesów działa poprawnie: {executor.stats()}")
+
+
+if __name__ == "__main__":
+    test_parse_executor()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Test sprawdzający czy jedno parsowanie strony daje te same dane co osobne scrapowanie danych i recenzji."""
+
+import sys
+from bs4 import BeautifulSoup
+
+from scraper import parse_perfume_page, find_main_content, extract_perfume_details
+from scrape_reviews import extract_reviews
+
+
+URL = "https://www.fragrantica.com/perfume/Lorenzo-Pazzaglia/Black-Sea-69652.html"
+
+
+def test_parse_perfume_page(html_file: str = "index.html") -> None:
+    """Porównuje wynik parse_perfume_page z osobnym wyciąganiem danych i recenzji."""
+    with open(html_file, "r", encoding="utf-8") as f:
+        html = f.read()
+
+    combined = parse_perfume_page(html, URL)
+
+    # Stara ścieżka: osobny soup dla danych i osobny dla recenzji
+    details_soup = BeautifulSoup(html, "html.parser")
+    details = extract_perfume_details(find_main_content(details_soup, html), URL)
+    reviews = extract_reviews(BeautifulSoup(html, "html.parser"))
+
+    print("\n=== Test jednego parsowania strony (dane + recenzje) ===\n")
+    print(f"Liczba recenzji: {len(combined['review'])}")
+
+    assert combined["review"] == reviews, "Recenzje różnią się od osobnego scrapowania"
+    combined_details = {k: v for k, v in combined.items() if k != "review"}
+    assert combined_details == details, "Dane perfum różnią się od osobnego scrapowania"
+    assert combined["perfumeName"], "Brak nazwy perfum"
+    assert len(combined["review"]) > 0, "Brak recenzji"
+
+    # Wersja bez recenzji nie powinna zawierać klucza "review"
+    without_reviews = parse_perfume_page(html, URL, include_reviews=False)
+    assert "review" not in without_reviews
+
+    print("✓ Dane i recenzje z jednego pobrania są zgodne")
+
+
+if __name__ == "__main__":
+    html_file = sys.argv[1] if len(sys.argv) > 1 else "index.html"
+    test_parse_perfume_page(html_file)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Test strony perfum z jednym drzewem DOM (klasyfikacja 404, #main-content i ekstraktory bez ponownego parsowania)."""
+
+import sys
+
+from html_parser import available_parsers
+from scraper import PerfumePage, is_404_error_page, parse_perfume_page, parse_perfume_sections
+from test_404_detection import is_404_error_page as reference_is_404_error_page
+
+
+URL = "https://www.fragrantica.com/perfume/Lorenzo-Pazzaglia/Black-Sea-69652.html"
+
+ERROR_PAGES = [
+    "<html><head><title>404 Not Found</title></head><body><p>Sorry</p></body></html>",
+    "<html><head><title>Error &amp; Not Found</title></head><body>" + "x" * 6000 + "</body></html>",
+    "<html><body><h1>Error</h1><p>Not found</p></body></html>",
+    "<html><body><script>var error = 'not found';</script><p>Error 404</p></body></html>",
+    "<html><body><script>var error = 'page not found';</script><div id='pyramid'>Notes</div></body></html>",
+    "<html><body><div>Error</div><h1 itemprop='name'>Black Sea</h1></body></html>",
+    "<html><body><p>Some content</p></body></html>",
+]
+
+
+def test_404_equivalence(html_file: str = "index.html") -> None:
+    """Klasyfikacja 404 na PerfumePage jest taka sama jak dotychczasowa."""
+    with open(html_file, "r", encoding="utf-8") as f:
+        html = f.read()
+    for page_html in ERROR_PAGES + [html]:
+        assert is_404_error_page(page_html) == reference_is_404_error_page(page_html), page_html[:80]
+        assert is_404_error_page(PerfumePage(page_html)) == reference_is_404_error_page(page_html)
+    assert is_404_error_page(PerfumePage(html), 404)
+    assert not is_404_error_page("", 200)
+
+    # Duża strona perfum jest klasyfikowana bez budowania drzewa DOM
+    page = PerfumePage(html, URL)
+    assert not is_404_error_page(page)
+    assert not page.parsed and page.parse_count == 0
+    print("✓ Klasyfikacja 404 zgodna z dotychczasową (duże strony bez parsowania)")
+
+
+def test_single_parse(html_file: str = "index.html") -> None:
+    """Klasyfikator 404, #main-content i ekstraktory nie parsują strony ponownie."""
+    with open(html_file, "r", encoding="utf-8") as f:
+        html = f.read()
+    expected = parse_perfume_page(html, URL)
+
+    page = PerfumePage(html, URL)
+    assert not is_404_error_page(page)
+    assert parse_perfume_page(page, URL) == expected
+    assert page.parse_count == 1
+    # Ekstraktory dostały drzewo samych regionów treści - cały dokument nie był parsowany
+    assert not page.parsed
+    assert page.main_content is page.content_soup.find(id="main-content")
+    assert page.content_soup.find(["script", "iframe", "svg"]) is None
+
+    page = PerfumePage(html, URL)
+    results, errors = parse_perfume_sections(page, URL)
+    assert errors == {} and page.parse_count == 1
+    assert results["reviews"] == expected["review"]
+
+    # Strona bez #main-content: sprawdzenie 404 w find_main_content na tym samym drzewie
+    fallback = PerfumePage("<html><body>" + "<p>Perfume</p>" * 600 + "<div id='pyramid'></div></body></html>", URL)
+    assert fallback.main_content is fallback.soup.find("body")
+    assert fallback.parse_count == 1
+    error_page = PerfumePage("<html><body><p>Error 404</p>" + " " * 200 + "</body></html>", URL)
+    try:
+        parse_perfume_page(error_page, URL)
+        raise AssertionError("Brak błędu dla strony 404")
+    except Exception as e:
+        assert "404" in str(e)
+    assert error_page.parse_count == 1
+    print("✓ Strona jest parsowana dokładnie raz")
+
+
+def test_fragment_fallback() -> None:
+    """Fragment HTML bez #main-content i body jest parsowany tak samo każdym parserem."""
+    fragment = "<h1 itemprop='name'>Black Sea</h1>" + "<p>Perfume</p>" * 20
+    results = {}
+    for parser in available_parsers():
+        page = PerfumePage(fragment, URL, parser)
+        assert page.main_content.find("h1") is not None, parser
+        results[parser] = parse_perfume_page(fragment, URL, parser=parser)
+    assert all(data == results["html.parser"] for data in results.values()), results
+    assert results["html.parser"]["perfumeName"] == "Black Sea"
+    print("✓ Fallback bez #main-content nie zależy od parsera")
+
+
+if __name__ == "__main__":
+    html_file = sys.argv[1] if len(sys.argv) > 1 else "index.html"
+    test_404_equivalence(html_file)
+    test_single_parse(html_file)
+    test_fragment_fallback()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Test limitera żądań (token bucket z AIMD per host i tunel)."""
+
+import asyncio
+
+from fetch_backends import FallbackFetcher, FetchResult, RateLimitedFetcher, create_fetcher
+from rate_limiter import RateLimiter, TokenBucket, is_throttled
+from test_fetch_backends import StaticBackend
+
+
+class FakeClock:
+    """Zegar testowy przesuwany ręcznie."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_aimd() -> None:
+    """Sprawdza tokeny, addytywny wzrost i multiplikatywny spadek tempa."""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1.0, burst=1.0, min_rate=0.1, max_rate=1.2, increase_step=0.1, clock=clock)
+
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() == 1.0  # brak tokenu - następny za 1 s
+    clock.now = 1.0
+    assert bucket.try_acquire() == 0.0
+
+    for _ in range(5):
+        bucket.on_success()
+    assert bucket.rate == 1.2  # ograniczone przez max_rate
+
+    bucket.on_throttle()
+    assert abs(bucket.rate - 0.6) < 1e-9
+    for _ in range(10):
+        bucket.on_throttle()
+    assert bucket.rate == 0.1  # ograniczone przez min_rate
+    assert bucket.snapshot()["throttles"] == 11
+    print("✓ Token bucket z AIMD działa poprawnie")
+
+
+def test_is_throttled() -> None:
+    """Sprawdza rozpoznawanie 429 i miękkich blokad."""
+    url = "https://www.fragrantica.com/perfume/A/B-1.html"
+    assert is_throttled(FetchResult(url, status_code=429, success=False))
+    assert is_throttled(FetchResult(url, status_code=503, success=False))
+    assert is_throttled(FetchResult(url, success=False, error_message="Too Many Requests"))
+    assert is_throttled(FetchResult(url, html="<title>Just a moment...</title>", status_code=200))
+    assert not is_throttled(FetchResult(url, html="<h1 itemprop='name'>A</h1>", status_code=200))
+    assert not is_throttled(FetchResult(url, status_code=404, success=False))
+    print("✓ Rozpoznawanie ograniczeń ruchu działa poprawnie")
+
+
+def test_rate_limited_fetcher() -> None:
+    """Sprawdza osobny stan limitera per tunel VPN."""
+    limiter = RateLimiter(rate=2.0, increase_step=0.5, max_rate=10.0)
+    tunnel = {"name": "pl-waw.ovpn"}
+
+    async def run():
+        ok = RateLimitedFetcher(StaticBackend("http", "<html>ok</html>"), limiter, lambda: tunnel["name"])
+        await ok.fetch("https://www.fragrantica.com/perfume/A/B-1.html")
+
+        tunnel["name"] = "de-fra.ovpn"
+        blocked = RateLimitedFetcher(StaticBackend("http", "", status_code=429), limiter, lambda: tunnel["name"])
+        await blocked.fetch("https://www.fragrantica.com/perfume/A/B-1.html")
+
+    asyncio.run(run())
+    snapshot = limiter.snapshot()
+    assert snapshot["www.fragrantica.com|pl-waw.ovpn"]["rate"] == 2.5
+    assert snapshot["www.fragrantica.com|de-fra.ovpn"]["rate"] == 1.0
+    assert snapshot["www.fragrantica.com|de-fra.ovpn"]["throttles"] == 1
+    print("✓ Limiter per tunel działa poprawnie")
+
+
+def test_fallback_acquires_token_per_backend() -> None:
+    """Przejście na przeglądarkę pobiera osobny token - oba żądania przechodzą przez limiter."""
+    limiter = RateLimiter(rate=0.001, burst=2.0, increase_step=0.0)
+    fetcher = FallbackFetcher(
+        RateLimitedFetcher(StaticBackend("http", "<html></html>"), limiter),
+        RateLimitedFetcher(StaticBackend("browser", "<html>pełna strona</html>"), limiter),
+    )
+    url = "https://www.fragrantica.com/perfume/A/B-1.html"
+    result = asyncio.run(fetcher.fetch(url))
+    assert result.backend == "browser"
+
+    bucket = limiter.snapshot()["www.fragrantica.com|direct"]
+    assert bucket["tokens"] == 0.0 and bucket["successes"] == 2
+    stats = fetcher.stats()
+    assert stats["http"] == 0 and stats["browser"] == 1 and stats["fallbacks"] == 1
+    assert stats["rateLimiter"] == limiter.snapshot()
+
+    auto = create_fetcher("auto", rate_limiter=limiter)
+    assert isinstance(auto, FallbackFetcher)
+    assert isinstance(auto.primary, RateLimitedFetcher) and isinstance(auto.fallback, RateLimitedFetcher)
+    assert (auto.primary.name, auto.fallback.name) == ("http", "browser")
+    asyncio.run(auto.close())
+    print("✓ Każdy backend w łańcuchu pobiera własny token")
+
+
+if __name__ == "__main__":
+    test_token_bucket_aimd()
+    test_is_throttled()
+    test_rate_limited_fetcher()
+    test_fallback_acquires_token_per_backend()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Test harmonogramu odświeżania (odstępy zależne od zmian i popularności, budżet dzienny)."""
+
+import asyncio
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from html_cache import CachingFetcher, HtmlCache
+from job_store import JobStore
+from recrawl_scheduler import DAY_SECONDS, RecrawlPolicy, RecrawlScheduler, vote_total
+from test_html_cache import ConditionalBackend
+
+
+BASE_URL = "https://www.fragrantica.com/perfume/A/B-{}.html"
+NOW = 1_700_000_000.0
+
+
+def perfume(rating_count: int, weak: int = 10) -> dict:
+    return {
+        "ratingCount": rating_count,
+        "longevity": {"veryWeak": 1, "weak": weak, "moderate": 5, "longLasting": 0, "eternal": 0},
+        "season": {"winter": 55.5, "spring": 20.0},
+    }
+
+
+def test_vote_total() -> None:
+    """Suma głosów pomija kategorie procentowe (pory roku i dnia)."""
+    assert vote_total(perfume(100)) == 16
+    assert vote_total({"ratingCount": 3}) is None
+    print("✓ Suma głosów liczona poprawnie")
+
+
+def test_policy_intervals() -> None:
+    """Szybko zmieniające się i popularne perfumy są odświeżane częściej."""
+    policy = RecrawlPolicy(min_interval_days=1, max_interval_days=90, initial_interval_days=30, target_change=0.05)
+    first_niche = policy.interval_days(None, 0, None, NOW)
+    first_popular = policy.interval_days(None, 10000, None, NOW)
+    assert first_niche == 30 and first_popular < first_niche
+
+    previous = (1000, 500, NOW - 10 * DAY_SECONDS)
+    unchanged = policy.interval_days(previous, 1000, 500, NOW)
+    slow = policy.interval_days(previous, 1010, 500, NOW)
+    fast = policy.interval_days(previous, 1200, 600, NOW)
+    assert unchanged == 90 / policy.popularity_factor(1000)
+    assert fast < slow < unchanged
+    # Zmiana o 20% w 10 dni -> 5% po 2.5 dnia (podzielone przez mnożnik popularności)
+    assert abs(fast - 2.5 / policy.popularity_factor(1200)) < 1e-9
+    assert policy.interval_days(previous, 100000, 600, NOW) == 1
+    print("✓ Odstępy odświeżania zależą od tempa zmian i popularności")
+
+
+def test_scheduler_budget() -> None:
+    """Budżet dzienny jest przydzielany najbardziej przeterminowanym perfumom."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = JobStore(Path(tmp_dir) / "jobs.sqlite3")
+        scheduler = RecrawlScheduler(store, daily_budget=2)
+        urls = [BASE_URL.format(i) for i in range(4)]
+        store.import_links(urls)
+        for i, url in enumerate(urls):
+            store.mark_started(url)
+            scheduler.record_crawl(url, perfume(10 ** i), crawled_at=NOW - 40 * DAY_SECONDS)
+            store.mark_done(url)
+
+        row = store.get(urls[0])
+        assert row["rating_count"] == 1 and row["vote_total"] == 16
+        interval = scheduler.policy.initial_interval_days / scheduler.policy.popularity_factor(1)
+        assert row["next_due_at"] == NOW - 40 * DAY_SECONDS + interval * DAY_SECONDS
+
+        # Popularne perfumy mają krótszy odstęp, więc są bardziej przeterminowane
+        due = scheduler.due_urls(NOW)
+        assert [url for url, _ in due] == urls[::-1]
+        assert due[0][1] > due[-1][1] > 1
+
+        assert scheduler.enqueue_due(NOW) == [urls[3], urls[2]]
+        assert store.pending_urls() == [urls[2], urls[3]]
+        assert scheduler.enqueue_due(NOW + 60) == []
+        assert scheduler.stats(NOW) == {"dailyBudget": 2, "usedToday": 2, "overdue": 2}
+        # Następnej doby budżet jest odnawiany
+        assert scheduler.enqueue_due(NOW + DAY_SECONDS) == [urls[1], urls[0]]
+
+        # Kolejne pobranie bez zmian - odstęp rośnie
+        store.mark_started(urls[2])
+        next_due = scheduler.record_crawl(urls[2], perfume(100), crawled_at=NOW)
+        store.mark_done(urls[2])
+        assert next_due == NOW + 90 / scheduler.policy.popularity_factor(100) * DAY_SECONDS
+        store.close()
+    print("✓ Budżet dzienny trafia do najbardziej przeterminowanych perfum")
+
+
+def test_record_crawl_keeps_batching() -> None:
+    """Zapis liczników nie wymusza zapisu bufora zmian (zadania są nadal zapisywane partiami)."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = JobStore(Path(tmp_dir) / "jobs.sqlite3", batch_size=100, flush_interval=3600)
+        scheduler = RecrawlScheduler(store)
+        url = BASE_URL.format(1)
+        store.import_links([url])
+        store.mark_started(url)
+        scheduler.record_crawl(url, perfume(100), crawled_at=NOW - DAY_SECONDS)
+        store.mark_done(url)
+        assert len(store._pending_updates) == 3
+
+        # Drugie pobranie przed zapisem bufora widzi liczniki z bufora
+        first_due = scheduler.record_crawl(url, perfume(100), crawled_at=NOW)
+        assert len(store._pending_updates) == 4
+        assert store.snapshot(url) == (100, 16, NOW)
+        store.flush()
+        assert store.snapshot(url) == (100, 16, NOW)
+        assert store.get(url)["next_due_at"] == first_due
+        store.close()
+    print("✓ Harmonogram nie przerywa zapisu zmian partiami")
+
+
+def test_recrawl_bypasses_cache() -> None:
+    """Odświeżenie w odstępie krótszym niż TTL cache HTML sprawdza aktualną treść strony."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = JobStore(Path(tmp_dir) / "jobs.sqlite3")
+        scheduler = RecrawlScheduler(store, policy=RecrawlPolicy(min_interval_days=3, max_interval_days=90))
+        url = BASE_URL.format(1)
+        store.import_links([url])
+
+        # Poprzednie pobranie 3 dni temu - wpis cache jest nadal świeży (TTL 7 dni)
+        crawled_at = time.time() - 3 * DAY_SECONDS
+        cache = HtmlCache(Path(tmp_dir) / "cache", ttl_seconds=7 * DAY_SECONDS)
+        cache.put(url, "<html>v1</html>", fetched_at=crawled_at, validators={"etag": '"v1"'})
+        scheduler.record_crawl(url, perfume(1000), crawled_at=crawled_at)
+        store.mark_done(url)
+
+        backend = ConditionalBackend("<html>v2</html>", '"v2"')
+        cached = asyncio.run(CachingFetcher(backend, cache).fetch(url))
+        assert cached.backend == "cache" and backend.requests == []
+
+        # Z harmonogramem: wpis użyty przy poprzednim pobraniu jest rewalidowany
+        fetcher = CachingFetcher(backend, cache, last_crawled_provider=scheduler.last_crawled_at)
+        result = asyncio.run(fetcher.fetch(url))
+        assert backend.requests == [{"If-None-Match": '"v1"'}]
+        assert result.html == "<html>v2</html>" and result.cache_meta is None
+
+        # Zmienione liczniki skracają odstęp zamiast wydłużać go jak przy "braku zmian"
+        next_due = scheduler.record_crawl(url, perfume(1100), crawled_at=time.time() - 60)
+        assert next_due - time.time() < 3.5 * DAY_SECONDS
+
+        # Strona pobrana po ostatnim zapisanym pobraniu (np. ponowna próba) jest brana z cache
+        cache.put(url, "<html>v2</html>", validators={"etag": '"v2"'})
+        assert asyncio.run(fetcher.fetch(url)).backend == "cache"
+        assert len(backend.requests) == 1
+        store.close()
+    print("✓ Odświeżenie nie używa HTML z poprzedniego pobrania")
+
+
+def test_migration() -> None:
+    """Baza z poprzedniej wersji (bez kolumn harmonogramu) jest uzupełniana przy otwarciu."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "jobs.sqlite3"
+        conn = sqlite3.connect(str(path))
+        conn.execute("CREATE TABLE jobs (url TEXT PRIMARY KEY, status TEXT NOT NULL DEFAULT 'done', "
+                     "attempts INTEGER NOT NULL DEFAULT 0, last_error TEXT, output_path TEXT, "
+                     "content_hash TEXT, created_at REAL, updated_at REAL)")
+        conn.execute("INSERT INTO jobs (url) VALUES (?)", (BASE_URL.format(1),))
+        conn.commit()
+        conn.close()
+
+        store = JobStore(path)
+        row = store.get(BASE_URL.format(1))
+        assert row["status"] == "done" and row["next_due_at"] is None
+        # Zadania bez historii pobrań nie są odświeżane
+        assert RecrawlScheduler(store).due_urls(NOW) == []
+        store.close()
+    print("✓ Migracja starej bazy zadań działa poprawnie")
+
+
+if __name__ == "__main__":
+    test_vote_total()
+    test_policy_intervals()
+    test_scheduler_budget()
+    test_record_crawl_keeps_batching()
+    test_recrawl_bypasses_cache()
+    test_migration()
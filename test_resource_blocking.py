@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Test profilu blokowania zasobów przeglądarki."""
+
+from resource_blocking import BlockingProfile, get_blocking_profile
+
+
+PAGE_URL = "https://www.fragrantica.com/perfume/Lorenzo-Pazzaglia/Black-Sea-69652.html"
+
+
+def test_block_reason() -> None:
+    """Sprawdza które żądania są blokowane w profilu domyślnym."""
+    profile = get_blocking_profile("default")
+
+    test_cases = [
+        # (url, typ zasobu, iframe, oczekiwany powód)
+        (PAGE_URL, "document", False, None),
+        ("https://www.fragrantica.com/js/app.js", "script", False, None),
+        ("https://cdn.example.com/lib.js", "script", False, "third-party-script"),
+        ("https://fimgs.net/mdimg/perfume/375x500.69652.jpg", "image", False, "image"),
+        ("https://fonts.gstatic.com/s/roboto.woff2", "font", False, "font"),
+        ("https://securepubads.g.doubleclick.net/tag/js/gpt.js", "script", False, "tracker"),
+        ("https://www.google-analytics.com/collect", "xhr", False, "tracker"),
+        ("https://www.youtube.com/embed/abc", "document", True, "iframe"),
+        ("https://www.fragrantica.com/css/app.css", "stylesheet", False, None),
+    ]
+
+    for url, resource_type, is_subframe, expected in test_cases:
+        result = profile.block_reason(url, resource_type, is_subframe)
+        status = "✓ PASS" if result == expected else "✗ FAIL"
+        print(f"{resource_type:<10} {url}: {status} (expected: {expected}, got: {result})")
+        assert result == expected
+
+    assert get_blocking_profile("off") is None
+    assert get_blocking_profile("strict").block_reason("https://www.fragrantica.com/a.css", "stylesheet") == "stylesheet"
+
+
+def test_allowlist() -> None:
+    """Sprawdza czy lista dozwolonych per typ zasobu omija blokadę."""
+    profile = BlockingProfile(allowlist={"image": [r"fimgs\.net/.*/vote"]})
+
+    assert profile.block_reason("https://fimgs.net/images/vote/longevity.png", "image") is None
+    assert profile.block_reason("https://fimgs.net/mdimg/perfume/1.jpg", "image") == "image"
+    # Lista dozwolonych dotyczy tylko podanego typu zasobu
+    assert profile.block_reason("https://fimgs.net/images/vote/font.woff", "font") == "font"
+    print("✓ Lista dozwolonych działa poprawnie")
+
+
+if __name__ == "__main__":
+    test_block_reason()
+    test_allowlist()
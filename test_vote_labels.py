@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Test i mikro-benchmark skompilowanego dopasowania etykiet głosów (VoteLabelMatcher)."""
+
+import sys
+import time
+from typing import Dict, List, Optional
+
+from scraper import VOTE_LABEL_MATCHERS, VOTING_CATEGORIES, VoteLabelMatcher
+
+
+def reference_match(label: str, options_mapping: Dict[str, List[str]]) -> Optional[str]:
+    """Dotychczasowe dopasowanie etykiety (normalizacja i sortowanie wariantów przy każdym głosie)."""
+    vote_name_lower = label.lower()
+    vote_name_normalized = vote_name_lower.replace(" ", "")
+
+    # KROK 1: Sprawdź dokładne dopasowania (po normalizacji spacji)
+    for eng_option, variants in options_mapping.items():
+        for variant in variants:
+            variant_normalized = variant.lower().replace(" ", "")
+            if variant_normalized == vote_name_normalized:
+                return eng_option
+
+    # KROK 2: Częściowe dopasowania (najdłuższe najpierw)
+    sorted_options = sorted(
+        options_mapping.items(),
+        key=lambda x: max(len(v.replace(" ", "")) for v in x[1]),
+        reverse=True
+    )
+    for eng_option, variants in sorted_options:
+        sorted_variants = sorted(variants, key=lambda v: len(v.replace(" ", "")), reverse=True)
+        for variant in sorted_variants:
+            if variant.lower() in vote_name_lower:
+                return eng_option
+    return None
+
+
+# Etykiety spoza mapowań: odmiany, dodatkowy tekst, wielkość liter, brak dopasowania
+EXTRA_LABELS = [
+    "More Female", "more  female", "MoreFemale", "kobieta / unisex", "for women and men", "Unisex ",
+    "Woman", "more masculine scent", "mężczyźni", "long lasting", "LongLasting", "very weak (2)",
+    "price too high!", "good value for money", "autumn/fall", "evening", "Wieczór", "noc", "something else", "",
+]
+
+
+def all_labels(options_mapping: Dict[str, List[str]]) -> List[str]:
+    """Wszystkie warianty mapowania i etykiety dodatkowe."""
+    return [variant for variants in options_mapping.values() for variant in variants] + EXTRA_LABELS
+
+
+def test_vote_label_matcher() -> None:
+    """Skompilowane dopasowanie daje te same opcje co dotychczasowe (z pierwszeństwem dłuższych wariantów)."""
+    for category, (_, options_mapping) in VOTING_CATEGORIES.items():
+        matcher = VOTE_LABEL_MATCHERS[category]
+        for label in all_labels(options_mapping):
+            assert matcher.match(label) == reference_match(label, options_mapping), (category, label)
+
+    gender = VOTE_LABEL_MATCHERS["gender"]
+    assert gender.match("more female") == "moreFemale"
+    assert gender.match("more female votes") == "moreFemale"
+    assert gender.match("female") == "female"
+    assert gender.match("kobieta / unisex") == "female"
+    assert gender.match("nic") is None
+    assert VoteLabelMatcher.of(gender) is gender
+    assert VoteLabelMatcher.of({"a": ["x"]}).match("X") == "a"
+    print("✓ Skompilowane dopasowanie etykiet głosów zgodne z dotychczasowym")
+
+
+def benchmark(repeat: int = 200) -> Dict[str, float]:
+    """Mierzy czas dopasowania wszystkich etykiet: dotychczasowe vs skompilowane (µs na etykietę)."""
+    cases = [
+        (label, options_mapping, VOTE_LABEL_MATCHERS[category])
+        for category, (_, options_mapping) in VOTING_CATEGORIES.items()
+        for label in all_labels(options_mapping)
+    ]
+
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        for label, options_mapping, _ in cases:
+            reference_match(label, options_mapping)
+    reference_seconds = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        for label, _, matcher in cases:
+            matcher.match(label)
+    matcher_seconds = time.perf_counter() - start_time
+
+    count = repeat * len(cases)
+    return {
+        "labels": len(cases),
+        "referenceMicros": round(reference_seconds / count * 1e6, 3),
+        "matcherMicros": round(matcher_seconds / count * 1e6, 3),
+        "speedup": round(reference_seconds / matcher_seconds, 1),
+    }
+
+
+def test_vote_label_benchmark() -> None:
+    """Mikro-benchmark: skompilowane dopasowanie jest szybsze od dotychczasowego."""
+    result = benchmark()
+    assert result["matcherMicros"] < result["referenceMicros"], result
+    print(f"✓ Benchmark dopasowania etykiet: {result}")
+
+
+if __name__ == "__main__":
+    test_vote_label_matcher()
+    if len(sys.argv) > 1:
+        print(benchmark(int(sys.argv[1])))
+    else:
+        test_vote_label_benchmark()
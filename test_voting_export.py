@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Test eksportu danych głosowania do Parquet i Arrow IPC."""
+
+import copy
+import tempfile
+from pathlib import Path
+
+import pyarrow.parquet as pq
+
+from output_sink import JsonFileSink, JsonlShardSink
+from voting_export import export_voting_data, load_voting_table, summarize_voting, voting_schema
+
+
+PERFUME = {
+    "perfumeName": "Black Sea",
+    "brand": "Lorenzo Pazzaglia",
+    "rating": 4.29,
+    "ratingCount": 1136,
+    "notes": {"topNotes": ["Salt", "Bergamot"], "heartNotes": ["Sea Notes"], "baseNotes": ["Ambergris"]},
+    "longevity": {"veryWeak": 18, "weak": 12, "moderate": 73, "longLasting": 246, "eternal": 519, "mostVoted": "eternal"},
+    "gender": {"female": 12, "moreFemale": 5, "unisex": 303, "moreMale": 285, "male": 232, "mostVoted": "unisex"},
+    "season": {"winter": 32.4695, "spring": 83.9939, "summer": 100.0, "fall": 54.4207, "mostVoted": "summer"},
+    "sillage": {"intimate": 25, "moderate": 112, "strong": 304, "enormous": 406, "mostVoted": "enormous"},
+}
+
+
+def test_voting_export() -> None:
+    """Sprawdza spłaszczenie danych, zapis partiami i odczyt wybranych kolumn."""
+    perfume = PERFUME
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_dir = Path(tmp_dir) / "output"
+        sink = JsonlShardSink(output_dir, max_records=3)
+        for i in range(5):
+            record = copy.deepcopy(perfume)
+            record["longevity"]["eternal"] = i
+            record["perfumeName"] = f"Perfume {i}"
+            sink.write(f"https://www.fragrantica.com/perfume/Brand/Perfume-{i + 1}.html", record)
+        sink.close()
+        # Plik w dotychczasowym formacie (bez URL) z brakującymi danymi głosowania
+        JsonFileSink(output_dir).write("https://www.fragrantica.com/perfume/Brand/Legacy-9.html",
+                                       {"perfumeName": "Legacy", "brand": "Brand", "rating": "4.1"})
+        # Dziennik zadań w katalogu wyników nie jest wynikiem perfum
+        (output_dir / "job-log.jsonl").write_text('{"url": "x", "status": "ok"}\n', encoding="utf-8")
+
+        parquet_path = Path(tmp_dir) / "voting.parquet"
+        rows = export_voting_data([output_dir], parquet_path, batch_size=2)
+        assert rows == 6
+        assert pq.ParquetFile(str(parquet_path)).metadata.num_row_groups == 3
+
+        table = load_voting_table(parquet_path)
+        assert table.schema == voting_schema()
+        # Pliki w kolejności nazw: brand_legacy.json, perfumes-000001.jsonl, perfumes-000002.jsonl
+        assert table.column("longevity_eternal").to_pylist() == [None, 0, 1, 2, 3, 4]
+        assert table.column("perfumeId").to_pylist() == [None, 1, 2, 3, 4, 5]
+        assert table.column("sillage_enormous").to_pylist()[1] == perfume["sillage"]["enormous"]
+        assert table.column("season_summer").to_pylist()[1] == perfume["season"]["summer"]
+        assert table.column("topNotes").to_pylist()[1] == perfume["notes"]["topNotes"]
+        assert table.column("rating").to_pylist()[0] == 4.1
+        assert table.column("topNotes").to_pylist()[0] == []
+
+        # Odczyt tylko wybranych kolumn i format Arrow IPC
+        assert load_voting_table(parquet_path, ["gender_mostVoted"]).num_columns == 1
+        arrow_path = Path(tmp_dir) / "voting.arrow"
+        assert export_voting_data([output_dir], arrow_path) == 6
+        assert load_voting_table(arrow_path).equals(table)
+
+        summary = summarize_voting(table)
+        assert summary["longevity"]["total"]["eternal"] == 10
+        assert summary["gender"]["mostVoted"] == {perfume["gender"]["mostVoted"]: 5}
+        # Kategoria nieobecna w danych - same wartości puste
+        assert summary["valueForMoney"]["mostVoted"] == {}
+        assert not list(Path(tmp_dir).glob(".*.tmp"))
+    print("✓ Eksport danych głosowania działa poprawnie")
+
+
+if __name__ == "__main__":
+    test_voting_export()
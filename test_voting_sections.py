@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Test indeksu tytułów sekcji głosowania (jedno przejście zamiast get_text() dla każdego elementu)."""
+
+from html_parser import available_parsers, make_soup
+from scraper import (
+    CATEGORY_TITLES,
+    HEADING_MAX_LENGTH,
+    build_heading_index,
+    clean_text,
+    extract_all_voting_data,
+    find_category_section,
+)
+
+
+def find_title(soup, title):
+    """Dotychczasowe wyszukiwanie tytułu sekcji (get_text() każdego elementu)."""
+    return soup.find(
+        lambda tag: tag.name in ["span", "h2", "h3", "h4", "div"] and clean_text(tag.get_text()).upper() == title.upper()
+    )
+
+
+def test_heading_index_edge_cases() -> None:
+    """Indeks daje pierwszy element w kolejności dokumentu i liczy tekst jak get_text()."""
+    html = (
+        "<div class='grid'><div id='outer'><span id='inner'> Longevity </span></div>"
+        "<div class='cell'><h3 id='gender'>GEN<!-- x -->DER<script>var a;</script></h3></div>"
+        "<p><span id='season'>SEA\n  <b>SON</b></span></p>"
+        "<div id='long'>SILLAGE <span>" + "x" * 100 + "</span></div><span id='sillage'>sillage</span></div>"
+    )
+    for parser in available_parsers():
+        soup = make_soup(html, parser)
+        index = build_heading_index(soup, HEADING_MAX_LENGTH)
+        for title in ["LONGEVITY", "GENDER", "SEA SON", "SEASON", "SILLAGE"]:
+            assert index.get(title) is find_title(soup, title), (parser, title)
+        # Element zewnętrzny ma ten sam tekst co wewnętrzny - wygrywa pierwszy w dokumencie
+        assert index["LONGEVITY"]["id"] == "outer"
+        assert index["SILLAGE"]["id"] == "sillage"
+        # div.cell ma ten sam tekst co h3 i jest pierwszy - sekcją jest jego kontener
+        assert index["GENDER"]["class"] == ["cell"]
+        assert find_category_section(soup, "gender", index)["class"] == ["grid"]
+        assert find_category_section(soup, "sillage") is find_category_section(soup, "sillage", index)
+        assert find_category_section(soup, "timeOfDay", index) is None
+    print("✓ Indeks tytułów sekcji zgodny z wyszukiwaniem po get_text()")
+
+
+def test_heading_index_pages() -> None:
+    """Na zapisanych stronach indeks daje te same sekcje co dotychczasowe wyszukiwanie."""
+    for html_file in ["index.html", "example.html", "reminad.html"]:
+        with open(html_file, "r", encoding="utf-8") as f:
+            soup = make_soup(f.read())
+        index = build_heading_index(soup, HEADING_MAX_LENGTH)
+        for titles in CATEGORY_TITLES.values():
+            for title in titles:
+                assert index.get(title.upper()) is find_title(soup, title), (html_file, title)
+    with open("index.html", "r", encoding="utf-8") as f:
+        voting = extract_all_voting_data(make_soup(f.read()))
+    assert voting["gender"]["mostVoted"] and voting["season"]
+    print("✓ Indeks tytułów sekcji zgodny na zapisanych stronach")
+
+
+if __name__ == "__main__":
+    test_heading_index_edge_cases()
+    test_heading_index_pages()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Test rozdziału pracy z dzierżawami (kilka procesów workerów, przejęcie zadań, scalanie wyników)."""
+
+import asyncio
+import json
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+
+from job_store import JobStore
+from output_sink import JsonlShardSink
+from work_lease import LeaseWorker, active_leases, merge_catalogue
+
+
+BASE_URL = "https://www.fragrantica.com/perfume/A/B-{}.html"
+
+
+def run_worker(store_path: str, output_dir: str, worker_id: str, die_after_write: bool = False) -> None:
+    """Proces workera: dzierżawi partie, zapisuje wyniki do własnych shardów i oznacza zadania."""
+    store = JobStore(store_path, batch_size=1, shared=True)
+    sink = JsonlShardSink(Path(output_dir), prefix=f"perfumes-{worker_id}", batch_size=2)
+    worker = LeaseWorker(store, worker_id, batch_size=3, lease_seconds=0.5 if die_after_write else 30)
+
+    async def process_batch(urls):
+        for url in urls:
+            sink.write(url, {"perfumeName": url.rsplit("-", 1)[1], "worker": worker_id})
+            await asyncio.sleep(0.05)
+            if die_after_write:
+                # Awaria po zapisie wyników, przed oznaczeniem zadań - dzierżawa wygaśnie
+                sink.close()
+                store.conn.close()
+                raise SystemExit(1)
+            for committed_url, location, _ in sink.pop_committed():
+                store.mark_done(committed_url, location, owner=worker_id)
+
+    asyncio.run(worker.run(process_batch))
+    sink.close()
+    for committed_url, location, _ in sink.pop_committed():
+        store.mark_done(committed_url, location, owner=worker_id)
+    worker.release()
+    store.close()
+
+
+def test_lease_batches() -> None:
+    """Dzierżawy nie nakładają się, a wygasłe i zwolnione zadania wracają do puli."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = JobStore(Path(tmp_dir) / "jobs.sqlite3")
+        store.import_links([BASE_URL.format(i) for i in range(6)])
+
+        first = store.lease_batch("a", 4, lease_seconds=30)
+        second = store.lease_batch("b", 4, lease_seconds=0.01)
+        assert first == [BASE_URL.format(i) for i in range(4)]
+        assert second == [BASE_URL.format(4), BASE_URL.format(5)]
+        assert store.lease_batch("c", 4, lease_seconds=30) == []
+        assert active_leases(store)["a"]["jobs"] == 4
+
+        # Worker "b" przestał wysyłać sygnał życia - jego zadania przejmuje "c"
+        time.sleep(0.05)
+        assert store.renew_leases("a", 30) == 4
+        assert store.lease_batch("c", 4, lease_seconds=30) == second
+
+        # Spóźniony worker "b" nie może rozpocząć, zakończyć ani oznaczyć błędu zadań przejętych przez "c"
+        store.mark_started(second[0], owner="b")
+        store.mark_done(second[0], "out:b", owner="b")
+        store.mark_failed(second[1], "timeout", owner="b")
+        assert [store.get(url)["lease_owner"] for url in second] == ["c", "c"]
+        assert {store.get(url)["status"] for url in second} == {"in_progress"}
+        assert store.get(second[0])["attempts"] == 0
+        store.mark_started(second[0], owner="c")
+        assert store.get(second[0])["attempts"] == 1
+        store.mark_done(second[0], "out:c", owner="c")
+        assert store.get(second[0])["status"] == "done"
+
+        store.mark_done(first[0], "out:1")
+        done = store.get(first[0])
+        assert done["status"] == "done" and done["lease_owner"] is None
+        assert store.release_leases("a") == 3
+        assert store.pending_urls() == first[1:]
+        store.close()
+    print("✓ Dzierżawy partii zadań działają poprawnie")
+
+
+def test_multiple_worker_processes() -> None:
+    """Kilka procesów workerów przetwarza wszystkie zadania, a scalony katalog nie ma duplikatów."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store_path = str(Path(tmp_dir) / "jobs.sqlite3")
+        output_dir = Path(tmp_dir) / "output"
+        output_dir.mkdir()
+        urls = [BASE_URL.format(i) for i in range(30)]
+        # Wspólny wolumen: dziennik DELETE zamiast WAL
+        store = JobStore(store_path, shared=True)
+        assert store.conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+        store.import_links(urls)
+        store.close()
+
+        context = multiprocessing.get_context("spawn")
+        # Worker, który zapisał wynik i zginął przed oznaczeniem zadania
+        dead = context.Process(target=run_worker, args=(store_path, str(output_dir), "dead", True))
+        dead.start()
+        dead.join(30)
+        assert dead.exitcode == 1
+        time.sleep(0.6)
+
+        workers = [
+            context.Process(target=run_worker, args=(store_path, str(output_dir), f"w{i}"))
+            for i in range(3)
+        ]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join(60)
+            assert process.exitcode == 0
+
+        store = JobStore(store_path, shared=True)
+        assert store.counts() == {"done": 30}
+        assert active_leases(store) == {}
+        store.close()
+
+        catalogue = Path(tmp_dir) / "catalogue.jsonl"
+        counts = merge_catalogue([output_dir], catalogue)
+        assert counts == {"records": 31, "unique": 30, "duplicates": 1}
+        with open(catalogue, "r", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        assert sorted(record["url"] for record in records) == sorted(urls)
+        # Pracowało kilku workerów (wyniki w osobnych shardach)
+        assert len({record["worker"] for record in records}) > 1
+    print("✓ Kilka procesów workerów tworzy katalog bez duplikatów")
+
+
+if __name__ == "__main__":
+    test_lease_batches()
+    test_multiple_worker_processes()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Moduł z eksportem danych głosowania do formatu kolumnowego (Parquet lub Arrow IPC).
+Dane głosowania (longevity, sillage, gender, valueForMoney, season, timeOfDay)
+są zagnieżdżonymi słownikami w wynikach każdego perfum - analiza wymagałaby
+parsowania wszystkich plików. Eksport spłaszcza korpus do jednej tabeli
+z kolumną na każdą opcję głosowania (np. longevity_eternal), kolumną
+<kategoria>_mostVoted i listami nut (topNotes, heartNotes, baseNotes).
+Wiersze są zapisywane partiami (jedna grupa wierszy na partię), więc zużycie
+pamięci nie zależy od wielkości korpusu.
+
+Użycie:
+    python voting_export.py export voting.parquet [output ...]   - eksport (katalogi, pliki .json i .jsonl)
+    python voting_export.py stats voting.parquet                  - podsumowanie głosowania z pliku
+"""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from link_ingest import perfume_id_from_url
+from output_sink import iter_results
+from scraper import VOTING_CATEGORIES
+
+
+NOTE_COLUMNS = ("topNotes", "heartNotes", "baseNotes")
+
+# Rozszerzenia plików Arrow IPC (pozostałe pliki są zapisywane jako Parquet)
+ARROW_SUFFIXES = (".arrow", ".feather", ".ipc")
+
+
+def voting_schema() -> pa.Schema:
+    """Zwraca schemat tabeli: kolumny perfum, kolumna na każdą opcję głosowania i listy nut."""
+    fields = [
+        pa.field("url", pa.string()),
+        pa.field("perfumeId", pa.int64()),
+        pa.field("perfumeName", pa.string()),
+        pa.field("brand", pa.string()),
+        pa.field("rating", pa.float64()),
+        pa.field("ratingCount", pa.int64()),
+    ]
+    for category, (kind, options_mapping) in VOTING_CATEGORIES.items():
+        # Głosy są liczbami całkowitymi, a pory roku/dnia - procentem szerokości paska
+        value_type = pa.int64() if kind == "votes" else pa.float64()
+        fields.extend(pa.field(f"{category}_{option}", value_type) for option in options_mapping)
+        fields.append(pa.field(f"{category}_mostVoted", pa.string()))
+    fields.extend(pa.field(note, pa.list_(pa.string())) for note in NOTE_COLUMNS)
+    return pa.schema(fields)
+
+
+def _number(value: Any, cast) -> Optional[Any]:
+    """Zamienia wartość na liczbę (None gdy brak lub niepoprawna)."""
+    if value is None or value == "":
+        return None
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def flatten_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Spłaszcza wynik scrapowania perfum do wiersza tabeli głosowania."""
+    url = record.get("url")
+    perfume_id = perfume_id_from_url(url) if url else None
+    row = {
+        "url": url,
+        "perfumeId": int(perfume_id) if perfume_id else None,
+        "perfumeName": record.get("perfumeName"),
+        "brand": record.get("brand"),
+        "rating": _number(record.get("rating"), float),
+        "ratingCount": _number(record.get("ratingCount"), int),
+    }
+    for category, (kind, options_mapping) in VOTING_CATEGORIES.items():
+        votes = record.get(category) or {}
+        cast = int if kind == "votes" else float
+        for option in options_mapping:
+            row[f"{category}_{option}"] = _number(votes.get(option), cast)
+        row[f"{category}_mostVoted"] = votes.get("mostVoted")
+    notes = record.get("notes") or {}
+    for note in NOTE_COLUMNS:
+        row[note] = list(notes.get(note) or [])
+    return row
+
+
+class _ColumnarWriter:
+    """Zapis partii wierszy do pliku Parquet lub Arrow IPC."""
+
+    def __init__(self, path: Path, schema: pa.Schema, arrow: bool = False):
+        if arrow:
+            self._sink = pa.OSFile(str(path), "wb")
+            self._writer = pa.ipc.new_file(self._sink, schema)
+        else:
+            self._sink = None
+            self._writer = pq.ParquetWriter(str(path), schema, compression="zstd")
+
+    def write_batch(self, batch: pa.RecordBatch) -> None:
+        self._writer.write_batch(batch)
+
+    def close(self) -> None:
+        self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+
+
+def export_voting_data(sources: Iterable[Path], output_path: Path, batch_size: int = 5000) -> int:
+    """Eksportuje dane głosowania do pliku Parquet (lub Arrow IPC dla .arrow/.feather/.ipc).
+
+    Zapis jest atomowy (plik tymczasowy i zmiana nazwy). Zwraca liczbę wierszy.
+
+    Args:
+        sources: Katalogi wyników lub pliki .json/.jsonl
+        output_path: Ścieżka pliku wynikowego
+        batch_size: Liczba wierszy w partii (grupie wierszy)
+    """
+    output_path = Path(output_path)
+    tmp_path = output_path.with_name(f".{output_path.name}.tmp")
+    schema = voting_schema()
+    writer = _ColumnarWriter(tmp_path, schema, arrow=output_path.suffix.lower() in ARROW_SUFFIXES)
+    rows: List[Dict[str, Any]] = []
+    total = 0
+    try:
+        for record in iter_results(sources):
+            rows.append(flatten_record(record))
+            if len(rows) >= batch_size:
+                writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=schema))
+                total += len(rows)
+                rows = []
+        if rows:
+            writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=schema))
+            total += len(rows)
+    except BaseException:
+        writer.close()
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+    writer.close()
+    os.replace(tmp_path, output_path)
+    return total
+
+
+def load_voting_table(path: Path, columns: Optional[List[str]] = None) -> pa.Table:
+    """Wczytuje tabelę głosowania (tylko wybrane kolumny - format kolumnowy czyta tylko je)."""
+    path = Path(path)
+    if path.suffix.lower() in ARROW_SUFFIXES:
+        # Plik IPC jest mapowany w pamięci - bez kopiowania danych
+        table = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+        return table.select(columns) if columns else table
+    return pq.read_table(str(path), columns=columns)
+
+
+def summarize_voting(table: pa.Table) -> Dict[str, Dict[str, Any]]:
+    """Zwraca dla każdej kategorii sumę głosów (średni procent dla pór) i rozkład mostVoted."""
+    summary = {}
+    for category, (kind, options_mapping) in VOTING_CATEGORIES.items():
+        aggregate = pc.sum if kind == "votes" else pc.mean
+        values = {}
+        for option in options_mapping:
+            value = aggregate(table.column(f"{category}_{option}")).as_py()
+            values[option] = round(value, 2) if isinstance(value, float) else value
+        most_voted = pc.value_counts(table.column(f"{category}_mostVoted").drop_null()).to_pylist()
+        summary[category] = {
+            "total" if kind == "votes" else "mean": values,
+            "mostVoted": {entry["values"]: entry["counts"] for entry in most_voted},
+        }
+    return summary
+
+
+def main():
+    """Narzędzie wiersza poleceń eksportu danych głosowania."""
+    if len(sys.argv) < 3 or sys.argv[1] not in ("export", "stats"):
+        print(__doc__)
+        sys.exit(1)
+
+    command = sys.argv[1]
+    path = Path(sys.argv[2])
+
+    if command == "export":
+        sources = [Path(arg) for arg in sys.argv[3:]] or [Path("output")]
+        start_time = time.time()
+        rows = export_voting_data(sources, path, batch_size=int(os.getenv("EXPORT_BATCH_SIZE", "5000")))
+        print(f"📊 Wyeksportowano {rows} perfum do {path} w {time.time() - start_time:.1f}s")
+    else:
+        start_time = time.time()
+        table = load_voting_table(path)
+        summary = summarize_voting(table)
+        elapsed_ms = (time.time() - start_time) * 1000
+        print(json.dumps(summary, indent=2, ensure_ascii=False))
+        print(f"📊 {table.num_rows} perfum, podsumowanie w {elapsed_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
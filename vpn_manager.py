@@ -35,6 +35,8 @@ class VPNManager:
         self.current_ovpn_file: Optional[Path] = None
         self.vpn_process: Optional[subprocess.Popen] = None
         self.connected = False
+        # Blokada zmiany konfiguracji (wiele równoległych workerów może jednocześnie dostać 429)
+        self._reconnect_lock: Optional[asyncio.Lock] = None
         
     def get_ovpn_files(self) -> list:
         """Zwraca listę wszystkich plików .ovpn w katalogu."""
@@ -535,7 +537,22 @@ class VPNManager:
                 self.current_ovpn_file = None  # Wyczyść aktualną konfigurację
     
     async def reconnect_with_new_config(self) -> bool:
-        """Rozłącza obecne połączenie i łączy z nową konfiguracją."""
+        """Rozłącza obecne połączenie i łączy z nową konfiguracją.
+        
+        Przy równoległych wywołaniach konfigurację zmienia tylko pierwsze - pozostałe
+        czekają na jego zakończenie i korzystają z nowego połączenia.
+        """
+        if self._reconnect_lock is None:
+            self._reconnect_lock = asyncio.Lock()
+        config_before = self.get_current_config()
+        async with self._reconnect_lock:
+            if self.get_current_config() != config_before and self.is_connected():
+                print(f"📋 Konfiguracja VPN została już zmieniona: {self.get_current_config()}")
+                return True
+            return await self._reconnect()
+    
+    async def _reconnect(self) -> bool:
+        """Zmienia konfigurację VPN (wywoływane pod blokadą)."""
         current_config = self.get_current_config()
         if current_config:
             print(f"🔄 Zmienianie konfiguracji VPN (obecna: {current_config})...")
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Moduł z rozdziałem pracy między workery na wielu maszynach (dzierżawy zadań).
+Workery (process_all_links.py --worker, każdy z własnym tunelem VPN) korzystają
+ze wspólnego magazynu zadań SQLite (np. na współdzielonym wolumenie) i pobierają
+z niego partie URL z czasową dzierżawą. W trakcie przetwarzania worker
+przedłuża dzierżawę sygnałem życia, a gdy przestanie (awaria maszyny, utrata
+połączenia), jego niezakończone zadania wracają do puli po wygaśnięciu dzierżawy.
+Każdy worker zapisuje wyniki do własnych shardów (<prefix>-<worker>-000001.jsonl),
+a merge_catalogue() łączy je w jeden katalog bez duplikatów (po ID perfum).
+
+Użycie:
+    python work_lease.py merge catalogue.jsonl [output ...]   - łączy wyniki workerów
+    python work_lease.py leases                               - dzierżawy aktywne per worker
+"""
+
+import asyncio
+import json
+import os
+import re
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from job_store import DEFAULT_JOB_STORE_PATH, STATUS_IN_PROGRESS, JobStore
+from link_ingest import perfume_id_from_url
+from output_sink import iter_results
+
+
+def default_worker_id() -> str:
+    """Zwraca identyfikator workera: WORKER_ID lub <host>-<pid> (znaki bezpieczne dla nazw plików)."""
+    worker_id = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+    return re.sub(r"[^\w.-]", "_", worker_id)
+
+
+class LeaseWorker:
+    """Worker pobierający partie zadań z dzierżawą i przedłużający ją w tle."""
+
+    def __init__(
+        self,
+        job_store: JobStore,
+        worker_id: Optional[str] = None,
+        batch_size: int = 50,
+        lease_seconds: float = 600.0,
+        heartbeat_interval: Optional[float] = None,
+        max_attempts: int = 3,
+    ):
+        """
+        Inicjalizuje LeaseWorker.
+
+        Args:
+            job_store: Wspólny magazyn zadań
+            worker_id: Identyfikator workera (domyślnie default_worker_id())
+            batch_size: Liczba zadań w dzierżawionej partii
+            lease_seconds: Czas dzierżawy (s) - po tym czasie bez sygnału życia zadania przejmują inni
+            heartbeat_interval: Co ile sekund przedłużać dzierżawę (domyślnie 1/3 czasu dzierżawy)
+            max_attempts: Limit prób zadania
+        """
+        self.job_store = job_store
+        self.worker_id = worker_id or default_worker_id()
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval or lease_seconds / 3
+        self.max_attempts = max_attempts
+        self.batches = 0
+        self.leased = 0
+        self.heartbeats = 0
+
+    def acquire(self) -> List[str]:
+        """Dzierżawi kolejną partię zadań (pusta lista gdy nie ma nic do zrobienia)."""
+        urls = self.job_store.lease_batch(self.worker_id, self.batch_size, self.lease_seconds, self.max_attempts)
+        if urls:
+            self.batches += 1
+            self.leased += len(urls)
+        return urls
+
+    def heartbeat(self) -> int:
+        """Przedłuża dzierżawy niezakończonych zadań workera."""
+        self.heartbeats += 1
+        return self.job_store.renew_leases(self.worker_id, self.lease_seconds)
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            self.heartbeat()
+
+    async def run(self, process_batch: Callable[[List[str]], Awaitable[Any]]) -> List[Any]:
+        """Przetwarza kolejne dzierżawione partie aż do wyczerpania zadań. Zwraca wyniki process_batch.
+
+        Niezakończone zadania pozostają dzierżawione (np. rekordy w buforze ujścia) -
+        po ich zapisaniu należy wywołać release().
+        """
+        heartbeat_task = asyncio.ensure_future(self._heartbeat_loop())
+        results = []
+        try:
+            while True:
+                urls = self.acquire()
+                if not urls:
+                    break
+                print(f"📦 Worker {self.worker_id}: partia {self.batches} ({len(urls)} zadań)")
+                results.append(await process_batch(urls))
+        finally:
+            heartbeat_task.cancel()
+        return results
+
+    def release(self) -> int:
+        """Zwraca niezakończone zadania workera do puli."""
+        return self.job_store.release_leases(self.worker_id)
+
+    def stats(self) -> Dict[str, object]:
+        """Zwraca statystyki workera."""
+        return {
+            "worker": self.worker_id,
+            "batches": self.batches,
+            "leased": self.leased,
+            "heartbeats": self.heartbeats,
+        }
+
+
+def active_leases(job_store: JobStore) -> Dict[str, Dict[str, float]]:
+    """Zwraca dzierżawy per worker: liczba zadań i najbliższe wygaśnięcie (s od teraz)."""
+    job_store.flush()
+    now = time.time()
+    return {
+        owner: {"jobs": count, "expiresIn": round(expires_at - now, 1)}
+        for owner, count, expires_at in job_store.conn.execute(
+            "SELECT lease_owner, COUNT(*), MIN(lease_expires_at) FROM jobs "
+            "WHERE lease_owner IS NOT NULL AND status = ? GROUP BY lease_owner",
+            (STATUS_IN_PROGRESS,),
+        )
+    }
+
+
+def _record_key(record: Dict[str, Any]) -> Tuple[str, ...]:
+    """Klucz deduplikacji: ID perfum z URL (lub marka i nazwa dla plików bez URL)."""
+    url = record.get("url")
+    perfume_id = perfume_id_from_url(url) if url else None
+    if perfume_id:
+        return ("id", perfume_id)
+    return ("name", str(record.get("brand")), str(record.get("perfumeName")))
+
+
+def merge_catalogue(sources: Iterable[Path], output_path: Path) -> Dict[str, int]:
+    """Łączy wyniki workerów w jeden katalog JSON Lines bez duplikatów.
+
+    Gdy te same perfumy pobrało kilku workerów (np. po przejęciu wygasłej
+    dzierżawy), zostaje ostatni rekord w kolejności plików. Dwa przebiegi
+    po wynikach - w pamięci są tylko klucze, nie rekordy. Zapis jest atomowy.
+
+    Args:
+        sources: Katalogi wyników lub pliki .json/.jsonl
+        output_path: Ścieżka katalogu wynikowego (.jsonl)
+    """
+    sources = list(sources)
+    output_path = Path(output_path)
+    winners: Dict[Tuple[str, ...], int] = {}
+    total = 0
+    for position, record in enumerate(iter_results(sources)):
+        winners[_record_key(record)] = position
+        total += 1
+
+    tmp_path = output_path.with_name(f".{output_path.name}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for position, record in enumerate(iter_results(sources)):
+            if winners.get(_record_key(record)) == position:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, output_path)
+    return {"records": total, "unique": len(winners), "duplicates": total - len(winners)}
+
+
+def main():
+    """Narzędzie wiersza poleceń rozdziału pracy."""
+    if len(sys.argv) < 2 or sys.argv[1] not in ("merge", "leases") or (sys.argv[1] == "merge" and len(sys.argv) < 3):
+        print(__doc__)
+        sys.exit(1)
+
+    if sys.argv[1] == "merge":
+        output_path = Path(sys.argv[2])
+        sources = [Path(arg) for arg in sys.argv[3:]] or [Path("output")]
+        counts = merge_catalogue(sources, output_path)
+        print(f"🗂️  Katalog {output_path}: {counts['unique']} perfum "
+              f"(rekordów: {counts['records']}, duplikaty: {counts['duplicates']})")
+    else:
+        store = JobStore(os.getenv("JOB_STORE_PATH", DEFAULT_JOB_STORE_PATH))
+        try:
+            print(json.dumps(active_leases(store), indent=2))
+        finally:
+            store.close()
+
+
+if __name__ == "__main__":
+    main()